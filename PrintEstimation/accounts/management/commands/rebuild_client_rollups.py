@@ -0,0 +1,22 @@
+"""
+Management command to rebuild the client rollups.
+"""
+
+from django.core.management.base import BaseCommand
+
+from PrintEstimation.accounts.models import Client, ClientRollup
+
+
+class Command(BaseCommand):
+    help = 'Recompute the job counts and revenue of every client (e.g. after bulk imports)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Clients refreshed per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        client_ids = list(Client.objects.order_by('pk').values_list('pk', flat=True))
+        count = 0
+        for start in range(0, len(client_ids), batch_size):
+            count += ClientRollup.refresh(client_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {count} clients'))
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from PrintEstimation.core.autocomplete import CreatePrefixIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        CreatePrefixIndex('client', 'company_name', 'accounts_client_name_prefix_idx'),
+    ]
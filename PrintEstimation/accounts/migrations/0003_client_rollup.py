@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:28
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Keep in sync with accounts.models.ClientRollup.REVENUE_STATUSES
+REVENUE_STATUSES = ('approved', 'urgent', 'finished')
+
+
+def build_rollups(apps, schema_editor):
+    """Compute every client's rollup from its jobs."""
+    Client = apps.get_model('accounts', 'Client')
+    ClientRollup = apps.get_model('accounts', 'ClientRollup')
+    Job = apps.get_model('jobs', 'Job')
+
+    revenue_filter = models.Q(status__in=REVENUE_STATUSES)
+    totals = {
+        row['client_id']: row
+        for row in Job.objects.filter(is_template=False).order_by().values('client_id').annotate(
+            jobs_count=models.Count('pk'),
+            orders_count=models.Count('pk', filter=revenue_filter),
+            revenue=models.Sum('total_cost', filter=revenue_filter),
+            last_order_at=models.Max('created_at'),
+        )
+    }
+    status_counts = {}
+    for row in Job.objects.filter(is_template=False).order_by().values('client_id', 'status').annotate(
+        count=models.Count('pk')
+    ):
+        status_counts.setdefault(row['client_id'], {})[row['status']] = row['count']
+
+    rollups = []
+    for client_id in Client.objects.values_list('pk', flat=True).iterator():
+        row = totals.get(client_id, {})
+        revenue = (row.get('revenue') or Decimal('0')).quantize(Decimal('0.01'))
+        orders_count = row.get('orders_count', 0)
+        rollups.append(ClientRollup(
+            client_id=client_id,
+            jobs_count=row.get('jobs_count', 0),
+            status_counts=status_counts.get(client_id, {}),
+            orders_count=orders_count,
+            revenue=revenue,
+            average_order_value=(revenue / orders_count).quantize(Decimal('0.01')) if orders_count else 0,
+            last_order_at=row.get('last_order_at'),
+        ))
+    ClientRollup.objects.bulk_create(rollups, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_client_company_name_prefix_index'),
+        ('jobs', '0020_job_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientRollup',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='accounts.client')),
+                ('jobs_count', models.PositiveIntegerField(default=0)),
+                ('status_counts', models.JSONField(default=dict, help_text='Number of jobs in each status')),
+                ('orders_count', models.PositiveIntegerField(default=0, help_text='Jobs in a revenue status')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('average_order_value', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_order_at', models.DateTimeField(blank=True, help_text='When the newest job was created', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['revenue'], name='accounts_cl_revenue_737082_idx'), models.Index(fields=['jobs_count'], name='accounts_cl_jobs_co_ae379c_idx'), models.Index(fields=['last_order_at'], name='accounts_cl_last_or_3179bc_idx')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
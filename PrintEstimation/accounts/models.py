@@ -156,6 +156,28 @@ class Client(models.Model):
     def __str__(self):
         return self.company_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the searchable names so save() can tell when jobs need reindexing
+        instance._loaded_names = (instance.__dict__.get('company_name'), instance.__dict__.get('contact_person'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        names_changed = (
+            not self._state.adding
+            and getattr(self, '_loaded_names', None) != (self.company_name, self.contact_person)
+        )
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        self._loaded_names = (self.company_name, self.contact_person)
+        if adding:
+            ClientRollup.objects.using(self._state.db).create(client_id=self.pk)
+        if names_changed:
+            # The client's jobs are searchable by its name
+            from PrintEstimation.jobs.search import refresh_search_documents
+            refresh_search_documents(self.jobs.all())
+
     def get_absolute_url(self):
         return reverse('accounts:client_detail', kwargs={'pk': self.pk})
 
@@ -180,28 +202,204 @@ class Client(models.Model):
     def get_jobs_count(self):
         """Get total number of jobs for this client."""
         try:
-            return self.jobs.count()
-        except Exception:
-            # If there's any import error, return 0
+            return self.rollup.jobs_count
+        except ClientRollup.DoesNotExist:
             return 0
 
     def get_total_revenue(self):
-        """Calculate total revenue from this client."""
+        """Revenue from this client's won orders."""
         try:
-            from django.db.models import Sum
-            from django.apps import apps
-            
-            # Use apps.get_model to avoid import issues
-            Job = apps.get_model('jobs', 'Job')
-            
-            total = Job.objects.filter(
-                client=self,
-                status__in=['approved', 'completed']
-            ).aggregate(
-                total=Sum('total_material_cost') + Sum('total_labor_cost') + Sum('total_outsourcing_cost')
-            )['total']
-
-            return total or 0
-        except Exception:
-            # If there's any import error, return 0
-            return 0
\ No newline at end of file
+            return self.rollup.revenue
+        except ClientRollup.DoesNotExist:
+            return 0
+
+
+class ClientRollup(models.Model):
+    """
+    Per-client job totals, kept current as jobs change.
+
+    Job writes apply their own difference (old values against new ones) to
+    the rollup of their client, so client lists can sort and filter on
+    revenue without aggregating jobs and a write never re-reads a client's
+    history. `manage.py rebuild_client_rollups` recomputes them all.
+    """
+    # Statuses whose jobs count as orders towards revenue
+    REVENUE_STATUSES = ('approved', 'urgent', 'finished')
+
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, primary_key=True, related_name='rollup')
+    jobs_count = models.PositiveIntegerField(default=0)
+    status_counts = models.JSONField(default=dict, help_text="Number of jobs in each status")
+    orders_count = models.PositiveIntegerField(default=0, help_text="Jobs in a revenue status")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    average_order_value = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_order_at = models.DateTimeField(null=True, blank=True, help_text="When the newest job was created")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['revenue']),
+            models.Index(fields=['jobs_count']),
+            models.Index(fields=['last_order_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id}: {self.jobs_count} jobs, {self.revenue} revenue"
+
+    @classmethod
+    def apply_job_changes(cls, changes, using='default'):
+        """
+        Apply the effect of changed jobs to the rollups of their clients.
+
+        changes are (before, after) pairs describing one job each, where a
+        side is None when the job does not count (not yet created, deleted or
+        a template) and otherwise a (client_id, status, total_cost,
+        created_at) tuple. Affected rollup rows are locked, adjusted and
+        written back in one transaction.
+        """
+        from collections import Counter
+        from decimal import Decimal
+        from django.db import transaction
+
+        deltas = {}
+        for before, after in changes:
+            if before == after:
+                continue
+            for sign, job in ((-1, before), (1, after)):
+                if job is None or job[0] is None:
+                    continue
+                client_id, status, total_cost, created_at = job
+                delta = deltas.setdefault(client_id, {
+                    'jobs_count': 0, 'status_counts': Counter(), 'orders_count': 0,
+                    'revenue': Decimal('0'), 'added': [], 'removed': [],
+                })
+                delta['jobs_count'] += sign
+                delta['status_counts'][status] += sign
+                if status in cls.REVENUE_STATUSES:
+                    delta['orders_count'] += sign
+                    delta['revenue'] += sign * (total_cost or 0)
+                delta['added' if sign > 0 else 'removed'].append(created_at)
+        if not deltas:
+            return 0
+
+        client_ids = sorted(deltas)
+        with transaction.atomic(using=using):
+            rollups = cls.objects.using(using).select_for_update().filter(client_id__in=client_ids)
+            missing = set(client_ids) - set(rollups.values_list('pk', flat=True))
+            if missing:
+                cls.objects.using(using).bulk_create(
+                    [cls(client_id=client_id) for client_id in missing], ignore_conflicts=True
+                )
+            for rollup in rollups.order_by('client_id'):
+                delta = deltas[rollup.client_id]
+                rollup.jobs_count += delta['jobs_count']
+                status_counts = Counter(rollup.status_counts)
+                status_counts.update(delta['status_counts'])
+                rollup.status_counts = {status: count for status, count in status_counts.items() if count > 0}
+                rollup.orders_count += delta['orders_count']
+                rollup.revenue = (Decimal(rollup.revenue) + delta['revenue']).quantize(Decimal('0.01'))
+                rollup.average_order_value = (
+                    (rollup.revenue / rollup.orders_count).quantize(Decimal('0.01')) if rollup.orders_count else 0
+                )
+                newest_added = max(filter(None, delta['added']), default=None)
+                if rollup.last_order_at is not None and rollup.last_order_at in delta['removed'] and (
+                    newest_added is None or newest_added < rollup.last_order_at
+                ):
+                    # The newest job left; find the one now newest
+                    rollup.last_order_at = cls._newest_job_created_at(rollup.client_id, using)
+                else:
+                    rollup.last_order_at = max(filter(None, (rollup.last_order_at, newest_added)), default=None)
+                rollup.save(using=using)
+        return len(client_ids)
+
+    @classmethod
+    def _newest_job_created_at(cls, client_id, using):
+        from django.apps import apps
+
+        Job = apps.get_model('jobs', 'Job')
+        ArchivedJob = apps.get_model('jobs', 'ArchivedJob')
+        return max(filter(None, (
+            Job.objects.using(using).filter(client_id=client_id, is_template=False)
+            .aggregate(newest=models.Max('created_at'))['newest'],
+            ArchivedJob.objects.using(using).filter(client_id=client_id)
+            .aggregate(newest=models.Max('created_at'))['newest'],
+        )), default=None)
+
+    @classmethod
+    def refresh(cls, client_ids=None, using='default'):
+        """
+        Recompute the rollups of client_ids (every client when None) from
+        all their jobs. Used to backfill and repair; job writes go through
+        apply_job_changes().
+
+        Runs in one transaction. Existing rollup rows are locked first, so
+        concurrent refreshes of the same client are applied one after the
+        other and the last one sees the other's committed jobs.
+        """
+        from django.apps import apps
+        from django.db import transaction
+        from decimal import Decimal
+
+        Job = apps.get_model('jobs', 'Job')
+        ArchivedJob = apps.get_model('jobs', 'ArchivedJob')
+
+        with transaction.atomic(using=using):
+            if client_ids is None:
+                client_ids = list(Client.objects.using(using).values_list('pk', flat=True))
+            client_ids = sorted({client_id for client_id in client_ids if client_id is not None})
+            if not client_ids:
+                return 0
+            list(
+                cls.objects.using(using).select_for_update()
+                .filter(client_id__in=client_ids).order_by('client_id').values_list('pk', flat=True)
+            )
+
+            revenue_filter = models.Q(status__in=cls.REVENUE_STATUSES)
+            totals = {}
+            # Archived jobs still count towards their client's totals
+            for queryset in (
+                Job.objects.using(using).filter(is_template=False),
+                ArchivedJob.objects.using(using),
+            ):
+                for row in queryset.filter(client_id__in=client_ids).order_by().values('client_id').annotate(
+                    jobs_count=models.Count('pk'),
+                    orders_count=models.Count('pk', filter=revenue_filter),
+                    revenue=models.Sum('total_cost', filter=revenue_filter),
+                    last_order_at=models.Max('created_at'),
+                    **{
+                        f'status_{status}': models.Count('pk', filter=models.Q(status=status))
+                        for status, _ in Job.STATUS_CHOICES
+                    }
+                ):
+                    total = totals.setdefault(row['client_id'], row)
+                    if total is not row:
+                        for key, value in row.items():
+                            if key == 'last_order_at':
+                                total[key] = max(filter(None, (total[key], value)), default=None)
+                            elif key != 'client_id':
+                                total[key] = (total[key] or 0) + (value or 0)
+
+            rollups = []
+            for client_id in client_ids:
+                row = totals.get(client_id, {})
+                revenue = (row.get('revenue') or Decimal('0')).quantize(Decimal('0.01'))
+                orders_count = row.get('orders_count', 0)
+                rollups.append(cls(
+                    client_id=client_id,
+                    jobs_count=row.get('jobs_count', 0),
+                    status_counts={
+                        status: row[f'status_{status}']
+                        for status, _ in Job.STATUS_CHOICES if row.get(f'status_{status}')
+                    },
+                    orders_count=orders_count,
+                    revenue=revenue,
+                    average_order_value=(revenue / orders_count).quantize(Decimal('0.01')) if orders_count else 0,
+                    last_order_at=row.get('last_order_at'),
+                ))
+            cls.objects.using(using).bulk_create(
+                rollups, update_conflicts=True, unique_fields=['client'],
+                update_fields=[
+                    'jobs_count', 'status_counts', 'orders_count', 'revenue',
+                    'average_order_value', 'last_order_at', 'updated_at',
+                ]
+            )
+        return len(rollups)
@@ -6,8 +6,11 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db.utils import IntegrityError
+from django.core.management import call_command
+from django.urls import reverse
 from decimal import Decimal
-from .models import Client
+from io import StringIO
+from .models import Client, ClientRollup
 
 User = get_user_model()
 
@@ -254,3 +257,120 @@ class ClientModelTest(TestCase):
         self.assertEqual(clients[0].company_name, 'Alpha Inc')
         self.assertEqual(clients[1].company_name, 'Beta LLC')
         self.assertEqual(clients[2].company_name, 'Zebra Corp')
+
+
+class ClientRollupTest(TestCase):
+    """Tests for the per-client job rollups."""
+
+    def setUp(self):
+        """Set up test data."""
+        from PrintEstimation.operations.models import PaperType, PaperSize
+
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass')
+        self.acme = Client.objects.create(company_name='Acme', email='acme@example.com')
+        self.globex = Client.objects.create(company_name='Globex', email='globex@example.com')
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        self.job_fields = {
+            'order_type': 'flyer', 'quantity': 1000, 'created_by': self.user,
+            'paper_type': PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50')),
+            'printing_size': paper_size, 'selling_size': paper_size,
+        }
+
+    def create_job(self, client, **kwargs):
+        from PrintEstimation.jobs.models import Job
+        return Job.objects.create(client=client, order_name='Job', **self.job_fields, **kwargs)
+
+    def rollup(self, client):
+        return ClientRollup.objects.get(client=client)
+
+    def test_rollup_follows_job_changes(self):
+        """Test that creating, pricing, approving, moving and deleting jobs update the rollup."""
+        job = self.create_job(self.acme)
+        self.create_job(self.acme, is_template=True)
+        self.assertEqual(self.rollup(self.acme).jobs_count, 1)
+        self.assertEqual(self.rollup(self.acme).status_counts, {'draft': 1})
+
+        job.total_cost = Decimal('120.50')
+        job.status = 'approved'
+        job.save()
+        rollup = self.rollup(self.acme)
+        self.assertEqual(rollup.revenue, Decimal('120.50'))
+        self.assertEqual(rollup.orders_count, 1)
+        self.assertEqual(rollup.average_order_value, Decimal('120.50'))
+        self.assertEqual(rollup.last_order_at, job.created_at)
+        self.assertEqual(self.acme.get_total_revenue(), Decimal('120.50'))
+
+        job.client = self.globex
+        job.save()
+        self.assertEqual(self.rollup(self.acme).jobs_count, 0)
+        self.assertEqual(self.rollup(self.acme).revenue, 0)
+        self.assertEqual(self.rollup(self.globex).revenue, Decimal('120.50'))
+
+        job.delete()
+        self.assertEqual(self.rollup(self.globex).jobs_count, 0)
+
+    def test_bulk_status_change_updates_rollup(self):
+        """Test that admin bulk status changes refresh the rollups too."""
+        from PrintEstimation.jobs.models import Job, JobStatusChange
+
+        self.create_job(self.acme, total_cost=Decimal('10.00'))
+        self.create_job(self.acme, total_cost=Decimal('30.00'))
+        JobStatusChange.set_status(Job.objects.filter(client=self.acme), 'finished')
+
+        rollup = self.rollup(self.acme)
+        self.assertEqual(rollup.revenue, Decimal('40.00'))
+        self.assertEqual(rollup.average_order_value, Decimal('20.00'))
+        self.assertEqual(rollup.status_counts, {'finished': 2})
+
+    def test_job_writes_apply_deltas(self):
+        """Test that job writes adjust the rollup without re-reading the client's jobs."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from PrintEstimation.jobs.models import ArchivedJob
+
+        for _ in range(3):
+            self.create_job(self.acme, total_cost=Decimal('10.00'), status='finished')
+        job = self.create_job(self.acme, total_cost=Decimal('20.00'))
+
+        job.status = 'approved'
+        with CaptureQueriesContext(connection) as queries:
+            job.save()
+        archive_table = ArchivedJob._meta.db_table
+        self.assertFalse([query for query in queries if archive_table in query['sql']])
+
+        newest = self.create_job(self.acme, total_cost=Decimal('5.00'), status='urgent')
+        newest.delete()
+        rollup = self.rollup(self.acme)
+        self.assertEqual(rollup.last_order_at, job.created_at)
+
+        ClientRollup.refresh([self.acme.pk])
+        refreshed = self.rollup(self.acme)
+        for field in ('jobs_count', 'status_counts', 'orders_count', 'revenue', 'average_order_value', 'last_order_at'):
+            self.assertEqual(getattr(rollup, field), getattr(refreshed, field), field)
+        self.assertEqual(rollup.revenue, Decimal('50.00'))
+
+    def test_rebuild_command(self):
+        """Test that the rebuild command restores lost or stale rollups."""
+        self.create_job(self.globex, total_cost=Decimal('75.00'), status='urgent')
+        ClientRollup.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_client_rollups', stdout=out)
+
+        self.assertIn('Rebuilt rollups for 2 clients', out.getvalue())
+        self.assertEqual(self.rollup(self.globex).revenue, Decimal('75.00'))
+        self.assertEqual(self.rollup(self.acme).jobs_count, 0)
+
+    def test_client_list_sorts_and_filters_by_revenue(self):
+        """Test that the client list orders and filters on the rollups."""
+        self.create_job(self.globex, total_cost=Decimal('500.00'), status='approved')
+        self.create_job(self.acme, total_cost=Decimal('50.00'), status='approved')
+        self.client.force_login(self.user)
+        url = reverse('accounts:client_list')
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'sort': 'revenue'})
+        self.assertEqual(list(response.context['clients']), [self.globex, self.acme])
+
+        response = self.client.get(url, {'min_revenue': '100'})
+        self.assertEqual(list(response.context['clients']), [self.globex])
@@ -18,6 +18,7 @@ urlpatterns = [
 
     # Client management
     path('clients/', views.ClientListView.as_view(), name='client_list'),
+    path('clients/autocomplete/', views.client_autocomplete, name='client_autocomplete'),
     path('clients/create/', views.ClientCreateView.as_view(), name='client_create'),
     path('clients/<int:pk>/', views.ClientDetailView.as_view(), name='client_detail'),
     path('clients/<int:pk>/edit/', views.ClientUpdateView.as_view(), name='client_edit'),
@@ -8,9 +8,13 @@ from django.views.generic import (
 )
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
+from django.db.models import F
 from django.http import JsonResponse
+from decimal import Decimal, InvalidOperation
 from .models import User, Client
 from .forms import ClientForm, CustomUserCreationForm
+from PrintEstimation.core.autocomplete import autocomplete_response
+from PrintEstimation.core.replicas import ReplicaReadMixin
 
 
 class SuperuserRequiredMixin(UserPassesTestMixin):
@@ -36,7 +40,7 @@ class RegisterView(CreateView):
         return super().form_invalid(form)
 
 
-class ProfileView(LoginRequiredMixin, TemplateView):
+class ProfileView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
     """User profile view."""
     template_name = 'accounts/profile.html'
 
@@ -48,12 +52,18 @@ class ProfileView(LoginRequiredMixin, TemplateView):
             from django.apps import apps
             Job = apps.get_model('jobs', 'Job')
             
-            user_jobs = Job.objects.filter(created_by=self.request.user)
+            from django.db.models import Count
+            from PrintEstimation.jobs.dashboard import status_counts
+
+            counts = status_counts(
+                Job.objects.filter(created_by=self.request.user), ('draft', 'calculated', 'sent'),
+                total=Count('pk')
+            )
             context.update({
-                'total_jobs': user_jobs.count(),
-                'draft_jobs': user_jobs.filter(status='draft').count(),
-                'calculated_jobs': user_jobs.filter(status='calculated').count(),
-                'sent_jobs': user_jobs.filter(status='sent').count(),
+                'total_jobs': counts['total'],
+                'draft_jobs': counts['draft'],
+                'calculated_jobs': counts['calculated'],
+                'sent_jobs': counts['sent'],
             })
         except Exception:
             # If there's any import error, set default values
@@ -185,21 +195,46 @@ class PasswordChangeView(LoginRequiredMixin, TemplateView):
 
 # Client Management Views
 
-class ClientListView(LoginRequiredMixin, ListView):
+class ClientListView(LoginRequiredMixin, ReplicaReadMixin, ListView):
     """List all clients."""
     model = Client
     template_name = 'accounts/client_list.html'
     context_object_name = 'clients'
     paginate_by = 20
 
+    # ?sort= options; ties are broken by name
+    SORT_ORDERS = {
+        'name': ('company_name', 'pk'),
+        'revenue': ('-rollup__revenue', 'company_name', 'pk'),
+        'jobs': ('-rollup__jobs_count', 'company_name', 'pk'),
+        'last_order': (F('rollup__last_order_at').desc(nulls_last=True), 'company_name', 'pk'),
+    }
+
     def get_queryset(self):
-        queryset = Client.objects.filter(is_active=True)
+        queryset = Client.objects.filter(is_active=True).select_related('rollup')
         search = self.request.GET.get('search')
         if search:
             queryset = queryset.filter(
                 company_name__icontains=search
             )
-        return queryset.order_by('company_name')
+        min_revenue = self.request.GET.get('min_revenue')
+        if min_revenue:
+            try:
+                queryset = queryset.filter(rollup__revenue__gte=Decimal(min_revenue))
+            except InvalidOperation:
+                pass
+        return queryset.order_by(*self.SORT_ORDERS.get(self.request.GET.get('sort'), self.SORT_ORDERS['name']))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        sort = self.request.GET.get('sort')
+        context['current_sort'] = sort if sort in self.SORT_ORDERS else 'name'
+        return context
+
+
+def client_autocomplete(request):
+    """Active clients whose company name starts with ?q=, for client pickers."""
+    return autocomplete_response(request, Client.objects.filter(is_active=True), 'company_name')
 
 
 class ClientDetailView(LoginRequiredMixin, DetailView):
@@ -1,3 +1,33 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import BackgroundTask, TaskEvent
+
+
+class TaskEventInline(admin.TabularInline):
+    model = TaskEvent
+    fields = ['event', 'data', 'created_at']
+    readonly_fields = ['event', 'data', 'created_at']
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'reference', 'status', 'attempts', 'progress_percent', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'reference']
+    readonly_fields = ['locked_by', 'locked_at', 'started_at', 'finished_at', 'created_at']
+    inlines = [TaskEventInline]
+    actions = ['requeue_tasks']
+
+    @admin.action(description='Requeue selected tasks')
+    def requeue_tasks(self, request, queryset):
+        from django.utils import timezone
+
+        updated = queryset.exclude(status=BackgroundTask.STATUS_RUNNING).update(
+            status=BackgroundTask.STATUS_QUEUED, attempts=0, run_after=timezone.now(), error=''
+        )
+        self.message_user(request, f'{updated} tasks requeued.')
@@ -0,0 +1,256 @@
+"""
+Admission control for expensive endpoints.
+
+Each scope (e.g. "calculation", "export") has a global and a per-user
+concurrency limit. Slots are cache keys claimed with cache.add(), so the
+limits hold across worker processes whenever a shared cache (Redis) is
+configured. Requests that find no free slot wait in a bounded queue for up
+to ADMISSION_MAX_WAIT seconds and are then rejected with 429 (user limit)
+or 503 (global limit or queue full) and a Retry-After header.
+
+Work handed to the background task queue holds no slot; admit_task()
+applies the same limits to the user's and everyone's queued and running
+tasks before more are enqueued.
+"""
+
+import asyncio
+import functools
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+
+from .models import BackgroundTask
+
+ADMISSION_COUNTERS = ('admitted', 'rejected_user', 'rejected_global', 'rejected_queue_full')
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot get a slot."""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """Slots held by one admitted request; release them when done."""
+
+    def __init__(self, keys, token):
+        self.keys = keys
+        self.token = token
+
+    def release(self):
+        for key in self.keys:
+            # Only free the slot if it has not expired and been re-taken
+            if cache.get(key) == self.token:
+                cache.delete(key)
+        self.keys = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class AdmissionController:
+    """Concurrency limits for one scope."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        config = {
+            'global_limit': getattr(settings, 'ADMISSION_GLOBAL_LIMIT', 8),
+            'user_limit': getattr(settings, 'ADMISSION_USER_LIMIT', 2),
+        }
+        config.update(getattr(settings, 'ADMISSION_SCOPES', {}).get(scope, {}))
+        self.global_limit = config['global_limit']
+        self.user_limit = config['user_limit']
+        self.queue_limit = getattr(settings, 'ADMISSION_QUEUE_LIMIT', 16)
+        self.max_wait = getattr(settings, 'ADMISSION_MAX_WAIT', 5)
+        self.slot_timeout = getattr(settings, 'ADMISSION_SLOT_TIMEOUT', 300)
+        self.retry_after = getattr(settings, 'ADMISSION_RETRY_AFTER', 5)
+        self.poll_interval = 0.1
+
+    def _key(self, *parts):
+        return ':'.join(['admission', self.scope, *map(str, parts)])
+
+    def _claim(self, prefix, limit, token):
+        for index in range(limit):
+            key = self._key(prefix, index)
+            if cache.add(key, token, timeout=self.slot_timeout):
+                return key
+        return None
+
+    def try_acquire(self, user_id):
+        """
+        Claim a user slot and a global slot without waiting.
+
+        Returns an AdmissionTicket, or the status code (429/503) explaining
+        which limit is saturated.
+        """
+        token = uuid.uuid4().hex
+        user_key = self._claim(f'user:{user_id}', self.user_limit, token)
+        if user_key is None:
+            return 429
+        global_key = self._claim('global', self.global_limit, token)
+        if global_key is None:
+            AdmissionTicket([user_key], token).release()
+            return 503
+        return AdmissionTicket([user_key, global_key], token)
+
+    def _incr(self, name, delta=1):
+        key = self._key('stats', name)
+        cache.add(key, 0, timeout=None)
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, max(delta, 0), timeout=None)
+            return max(delta, 0)
+
+    def _enter_queue(self):
+        if self._incr('waiting') > self.queue_limit:
+            self._incr('waiting', -1)
+            self._incr('rejected_queue_full')
+            raise AdmissionRejected(503, 'Too many requests are waiting. Please retry shortly.', self.retry_after)
+
+    def _leave_queue(self):
+        self._incr('waiting', -1)
+
+    def _admit(self, result):
+        if isinstance(result, AdmissionTicket):
+            self._incr('admitted')
+            return result
+        if result == 429:
+            self._incr('rejected_user')
+            raise AdmissionRejected(
+                429, 'You already have calculations running. Please wait for them to finish.', self.retry_after
+            )
+        self._incr('rejected_global')
+        raise AdmissionRejected(503, 'The server is busy. Please retry shortly.', self.retry_after)
+
+    def acquire(self, user_id):
+        """Wait up to max_wait for slots; raise AdmissionRejected if none free up."""
+        result = self.try_acquire(user_id)
+        if isinstance(result, AdmissionTicket) or self.max_wait <= 0:
+            return self._admit(result)
+
+        self._enter_queue()
+        try:
+            deadline = time.monotonic() + self.max_wait
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                result = self.try_acquire(user_id)
+                if isinstance(result, AdmissionTicket):
+                    break
+        finally:
+            self._leave_queue()
+        return self._admit(result)
+
+    async def aacquire(self, user_id):
+        """Async variant of acquire() that waits without blocking the event loop."""
+        try_acquire = sync_to_async(self.try_acquire)
+        result = await try_acquire(user_id)
+        if isinstance(result, AdmissionTicket) or self.max_wait <= 0:
+            return await sync_to_async(self._admit)(result)
+
+        await sync_to_async(self._enter_queue)()
+        try:
+            deadline = time.monotonic() + self.max_wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                result = await try_acquire(user_id)
+                if isinstance(result, AdmissionTicket):
+                    break
+        finally:
+            await sync_to_async(self._leave_queue)()
+        return await sync_to_async(self._admit)(result)
+
+    def admit_task(self, user_id, reference='', names=None):
+        """
+        Check that one more background task may be queued for user_id.
+
+        Raises AdmissionRejected when the user's or everyone's queued and
+        running tasks are at the limit. With names, only tasks of those names
+        count against the user, so work queued on their behalf (such as
+        automatic recalculations) does not use up their limit. A request
+        joining such a task already active for reference adds no work and is
+        always admitted.
+        """
+        active = BackgroundTask.objects.active()
+        requested = active.filter(name__in=names) if names is not None else active
+        if reference and requested.for_reference(reference).exists():
+            return
+        if requested.filter(created_by_id=user_id).count() >= self.user_limit:
+            self._admit(429)
+        if active.count() >= self.global_limit:
+            self._admit(503)
+        self._incr('admitted')
+
+    def stats(self):
+        """Return current load and cumulative counters for monitoring."""
+        slot_keys = [self._key('global', index) for index in range(self.global_limit)]
+        counters = cache.get_many([self._key('stats', name) for name in ('waiting', *ADMISSION_COUNTERS)])
+        return {
+            'in_flight': len(cache.get_many(slot_keys)),
+            'global_limit': self.global_limit,
+            'user_limit': self.user_limit,
+            'queue_depth': max(0, counters.get(self._key('stats', 'waiting'), 0)),
+            'queue_limit': self.queue_limit,
+            **{name: counters.get(self._key('stats', name), 0) for name in ADMISSION_COUNTERS},
+        }
+
+
+def rejected_response(request, exc):
+    """Build the 429/503 response for a rejected request."""
+    wants_json = (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('accept', '')
+        or 'text/html' not in request.headers.get('accept', 'text/html')
+    )
+    if wants_json:
+        response = JsonResponse({'success': False, 'error': exc.reason}, status=exc.status)
+    else:
+        response = TemplateResponse(
+            request, 'core/overloaded.html',
+            {'reason': exc.reason, 'retry_after': exc.retry_after},
+            status=exc.status
+        )
+    response['Retry-After'] = str(exc.retry_after)
+    return response
+
+
+def admission_control(scope):
+    """Limit concurrent executions of a view per user and globally."""
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @functools.wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                user = await request.auser()
+                try:
+                    ticket = await AdmissionController(scope).aacquire(user.pk or 'anonymous')
+                except AdmissionRejected as exc:
+                    return rejected_response(request, exc)
+                try:
+                    return await view_func(request, *args, **kwargs)
+                finally:
+                    await sync_to_async(ticket.release)()
+            return async_wrapper
+
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            try:
+                ticket = AdmissionController(scope).acquire(request.user.pk or 'anonymous')
+            except AdmissionRejected as exc:
+                return rejected_response(request, exc)
+            with ticket:
+                return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
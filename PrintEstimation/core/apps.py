@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'PrintEstimation.core'
+
+    def ready(self):
+        # Register background tasks defined in each app's tasks module.
+        autodiscover_modules('tasks')
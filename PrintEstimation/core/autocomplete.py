@@ -0,0 +1,135 @@
+"""
+Server-side autocomplete for large dropdowns.
+
+Endpoints answer ?q=<prefix>&cursor=<cursor> with one page of
+{"id", "text"} results, filtered by a case-insensitive prefix on an indexed
+column and paged by keyset. Forms use AutocompleteSelect, which renders only
+the selected option; main.js loads the rest from the endpoint on demand.
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db.migrations.operations.base import Operation
+from django.http import JsonResponse
+from django.urls import reverse
+
+from .pagination import InvalidCursor, paginate_keyset
+
+AUTOCOMPLETE_PAGE_SIZE = 20
+
+
+def autocomplete_response(request, queryset, search_field=None, ordering=None, label=str,
+                          page_size=AUTOCOMPLETE_PAGE_SIZE):
+    """
+    Return one page of queryset as autocomplete results.
+
+    With search_field, q filters by case-insensitive prefix and results are
+    ordered by (search_field, id) so each page is an index range scan.
+    Callers that filter queryset themselves pass the ordering instead.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+
+    query = request.GET.get('q', '').strip()
+    if search_field and query:
+        queryset = queryset.filter(**{f'{search_field}__istartswith': query})
+    try:
+        page = paginate_keyset(
+            queryset, ordering or (search_field, 'id'), page_size,
+            cursor=request.GET.get('cursor') or None
+        )
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'results': [{'id': obj.pk, 'text': label(obj)} for obj in page],
+        'next_cursor': page.next_cursor,
+    })
+
+
+def selected_object(queryset, value):
+    """Return the object picked in an autocomplete filter, or None."""
+    if not value:
+        return None
+    try:
+        return queryset.filter(pk=value).first()
+    except (ValueError, ValidationError):
+        return None
+
+
+class CreatePrefixIndex(Operation):
+    """
+    Migration operation adding an index that serves __istartswith lookups.
+
+    PostgreSQL needs an expression index on UPPER(column) with
+    text_pattern_ops; SQLite's LIKE uses a NOCASE index.
+    """
+    reversible = True
+
+    def __init__(self, model_name, field_name, name):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.name = name
+
+    def deconstruct(self):
+        return self.__class__.__name__, [], {
+            'model_name': self.model_name, 'field_name': self.field_name, 'name': self.name,
+        }
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        table = schema_editor.quote_name(model._meta.db_table)
+        column = schema_editor.quote_name(model._meta.get_field(self.field_name).column)
+        name = schema_editor.quote_name(self.name)
+        vendor = schema_editor.connection.vendor
+        if vendor == 'postgresql':
+            schema_editor.execute(f'CREATE INDEX {name} ON {table} ((UPPER({column}::text)) text_pattern_ops)')
+        elif vendor == 'sqlite':
+            schema_editor.execute(f'CREATE INDEX {name} ON {table} ({column} COLLATE NOCASE)')
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+            schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(self.name)}')
+
+    def describe(self):
+        return f'Create prefix search index {self.name} on {self.model_name}.{self.field_name}'
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select for a ModelChoiceField that renders only the selected option.
+
+    The remaining choices are fetched from url (an autocomplete endpoint) as
+    the user searches, so rendering does not grow with the table.
+    """
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse(self.url_name)
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [item for item in value if item not in (None, '')]
+        options = []
+        if not self.is_required or not selected:
+            options.append(self.create_option(name, '', self.choices.field.empty_label or '', not selected, 0))
+        if selected:
+            field = self.choices.field
+            try:
+                objects = list(self.choices.queryset.filter(pk__in=selected))
+            except (ValueError, ValidationError):
+                # Submitted garbage; the field reports the error
+                objects = []
+            for obj in objects:
+                options.append(self.create_option(
+                    name, field.prepare_value(obj), field.label_from_instance(obj), True, len(options)
+                ))
+        return [(None, [option], option['index']) for option in options]
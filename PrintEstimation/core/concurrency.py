@@ -0,0 +1,39 @@
+"""
+Helpers for running blocking work from async views.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_calculation_executor():
+    """Return the shared, size-bounded executor for calculation work."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'CALCULATION_EXECUTOR_WORKERS', 4),
+                    thread_name_prefix='calculation',
+                )
+    return _executor
+
+
+async def run_calculation(func, *args, **kwargs):
+    """
+    Run func in the calculation executor and await its result.
+
+    func must not touch the database: load everything it needs with the
+    async ORM first, so executor threads never hold connections.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_calculation_executor(), functools.partial(func, *args, **kwargs)
+    )
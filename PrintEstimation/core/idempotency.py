@@ -0,0 +1,131 @@
+"""
+Idempotency keys for state-changing POSTs.
+
+A client sends a unique key with a POST, either in the Idempotency-Key header
+or in an `idempotency_key` form field. The first request with that key runs
+the view and its response is stored. A retry with the same key replays the
+stored response instead of repeating the action. A retry that arrives while
+the first request is still running gets 409. Reusing the key for a different
+request gets 422.
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_FIELD = 'idempotency_key'
+
+_IGNORED_FIELDS = {'csrfmiddlewaretoken', IDEMPOTENCY_FIELD}
+
+
+def get_idempotency_key(request):
+    """Return the key sent with the request, or an empty string."""
+    key = request.headers.get(IDEMPOTENCY_HEADER) or request.POST.get(IDEMPOTENCY_FIELD, '')
+    return key.strip()[:100]
+
+
+def request_fingerprint(request):
+    """Hash the method, path and payload that the key is bound to."""
+    if request.content_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+        payload = sorted(
+            (name, request.POST.getlist(name))
+            for name in request.POST if name not in _IGNORED_FIELDS
+        )
+    else:
+        payload = request.body.decode(errors='replace')
+    data = json.dumps([request.method, request.path, payload], sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _wants_json(request):
+    return (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or request.content_type == 'application/json'
+        or 'application/json' in request.headers.get('accept', '')
+    )
+
+
+def _conflict_response(request, status, error):
+    if _wants_json(request):
+        return JsonResponse({'success': False, 'error': error}, status=status)
+    # A double-submitted form: send the user back to the page they came from
+    messages.warning(request, error)
+    return redirect(request.path)
+
+
+def _replay(record):
+    response = HttpResponse(
+        bytes(record.response_body),
+        status=record.response_status,
+        content_type=record.response_content_type or None,
+    )
+    if record.response_location:
+        response['Location'] = record.response_location
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _claim_key(user, key, fingerprint):
+    """Create the key record, or return (record, False) if it already exists."""
+    ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 86400)
+    IdempotencyKey.objects.filter(
+        user=user, key=key, created_at__lt=timezone.now() - timedelta(seconds=ttl)
+    ).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, request_fingerprint=fingerprint), True
+    except IntegrityError:
+        return IdempotencyKey.objects.get(user=user, key=key), False
+
+
+def idempotent(view_func):
+    """Make a POST view safe to retry with an idempotency key."""
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = get_idempotency_key(request) if request.method == 'POST' else ''
+        if not key or not request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+
+        fingerprint = request_fingerprint(request)
+        record, created = _claim_key(request.user, key, fingerprint)
+        if not created:
+            if record.request_fingerprint != fingerprint:
+                return _conflict_response(
+                    request, 422, 'This idempotency key was already used for a different request.'
+                )
+            if not record.completed:
+                return _conflict_response(request, 409, 'This request is already being processed.')
+            return _replay(record)
+
+        try:
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500 or response.streaming:
+            # Let the client retry failures for real
+            record.delete()
+            return response
+
+        record.completed = True
+        record.response_status = response.status_code
+        record.response_content_type = response.get('Content-Type', '')
+        record.response_location = response.get('Location', '')
+        record.response_body = response.content
+        record.save()
+        return response
+    return wrapper
@@ -0,0 +1,70 @@
+"""
+Named locks shared by all worker processes.
+
+On PostgreSQL these are session-level advisory locks. Other databases fall
+back to a cache lock, which is only shared across processes when a shared
+cache (Redis) is configured.
+"""
+
+import contextlib
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+
+class LockTimeout(Exception):
+    """Raised when a lock could not be acquired in time."""
+
+
+def _advisory_key(name):
+    """Map a lock name onto PostgreSQL's signed 64-bit advisory key space."""
+    digest = hashlib.sha256(name.encode()).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+@contextlib.contextmanager
+def named_lock(name, timeout=None, poll_interval=0.05):
+    """
+    Hold an exclusive lock called name for the duration of the block.
+
+    Waits up to timeout seconds (CALCULATION_LOCK_TIMEOUT by default) and
+    raises LockTimeout if the lock stays taken.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'CALCULATION_LOCK_TIMEOUT', 60)
+    deadline = time.monotonic() + timeout
+
+    if connection.vendor == 'postgresql':
+        key = _advisory_key(name)
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', [key])
+                if cursor.fetchone()[0]:
+                    break
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(name)
+                time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [key])
+        return
+
+    cache_key = f'lock:{name}'
+    token = uuid.uuid4().hex
+    # Expire eventually so a crashed holder cannot block forever
+    expires = max(int(timeout) * 2, 60)
+    while not cache.add(cache_key, token, timeout=expires):
+        if time.monotonic() >= deadline:
+            raise LockTimeout(name)
+        time.sleep(poll_interval)
+    try:
+        yield
+    finally:
+        if cache.get(cache_key) == token:
+            cache.delete(cache_key)
@@ -0,0 +1,60 @@
+"""
+Management command to process queued background tasks.
+"""
+
+import threading
+
+from django.core.management.base import BaseCommand
+
+from PrintEstimation.core.tasks import make_worker_id, requeue_stale_tasks, run_worker
+
+
+class Command(BaseCommand):
+    help = 'Run background task workers against the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of worker threads (default: 1)'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait when the queue is empty (default: 1.0)'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit once the queue is empty'
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_tasks()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale tasks')
+
+        stop_event = threading.Event()
+        threads = []
+        for index in range(options['workers']):
+            thread = threading.Thread(
+                target=run_worker,
+                kwargs={
+                    'worker_id': make_worker_id(index),
+                    'stop_event': stop_event,
+                    'poll_interval': options['poll_interval'],
+                    'burst': options['burst'],
+                },
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+
+        self.stdout.write(self.style.SUCCESS(f"Started {len(threads)} worker(s)"))
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping workers...')
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
@@ -2,7 +2,11 @@
 Core models and utilities for the printing estimation system.
 """
 
+import json
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -80,4 +84,209 @@ class SystemSetting(models.Model):
         elif self.setting_type == 'json':
             import json
             return json.loads(self.value)
-        return self.value
\ No newline at end of file
+        return self.value
+
+class BackgroundTaskQuerySet(models.QuerySet):
+    """QuerySet helpers for background tasks."""
+
+    def active(self):
+        return self.filter(status__in=[BackgroundTask.STATUS_QUEUED, BackgroundTask.STATUS_RUNNING])
+
+    def for_reference(self, reference):
+        return self.filter(reference=reference)
+
+
+class BackgroundTask(models.Model):
+    """
+    A unit of work queued in the database and executed by `run_workers`.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100, help_text="Registered task name")
+    kwargs = models.JSONField(default=dict, blank=True)
+    reference = models.CharField(
+        max_length=100,
+        blank=True,
+        db_index=True,
+        help_text="Object the task works on, e.g. 'job:42'"
+    )
+    dedupe_key = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="Hash of name and arguments; identical active tasks are not queued twice"
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    # Progress reported by the running task
+    progress_current = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    progress_message = models.CharField(max_length=255, blank=True)
+
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='background_tasks'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = BackgroundTaskQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Background Task'
+        verbose_name_plural = 'Background Tasks'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='core_task_status_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    @property
+    def progress_percent(self):
+        if self.is_finished:
+            return 100
+        if not self.progress_total:
+            return 0
+        return min(100, round(self.progress_current * 100 / self.progress_total))
+
+    def set_progress(self, current, total=None, message=None):
+        """Record progress without touching other columns."""
+        self.progress_current = current
+        fields = {'progress_current': current}
+        if total is not None:
+            self.progress_total = total
+            fields['progress_total'] = total
+        if message is not None:
+            self.progress_message = message[:255]
+            fields['progress_message'] = self.progress_message
+        if self.locked_by:
+            # Progress also shows the worker running the task is alive
+            self.locked_at = fields['locked_at'] = timezone.now()
+        BackgroundTask.objects.filter(pk=self.pk).update(**fields)
+        self.emit('progress', {
+            'current': self.progress_current,
+            'total': self.progress_total,
+            'percent': self.progress_percent,
+            'message': self.progress_message,
+        })
+
+    def emit(self, event, data=None):
+        """Append an event to the task's progress stream."""
+        return TaskEvent.objects.create(task_id=self.pk, event=event, data=data or {})
+
+    def to_dict(self):
+        """Return the task state for the status endpoint."""
+        return {
+            'id': self.pk,
+            'name': self.name,
+            'status': self.status,
+            'status_display': self.get_status_display(),
+            'is_finished': self.is_finished,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'progress': {
+                'current': self.progress_current,
+                'total': self.progress_total,
+                'percent': self.progress_percent,
+                'message': self.progress_message,
+            },
+            'result': self.result,
+            'error': self.error_message,
+        }
+
+    @property
+    def error_message(self):
+        """Last line of the stored traceback, without the exception type."""
+        if not self.error:
+            return ''
+        return self.error.strip().splitlines()[-1].split(': ', 1)[-1]
+
+
+class TaskEvent(models.Model):
+    """
+    Append-only progress event emitted by a running background task.
+
+    The primary key doubles as the Server-Sent Events id, so clients can
+    resume a stream with Last-Event-ID.
+    """
+    task = models.ForeignKey(BackgroundTask, on_delete=models.CASCADE, related_name='events')
+    event = models.CharField(max_length=30)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['pk']
+        verbose_name = 'Task Event'
+        verbose_name_plural = 'Task Events'
+
+    def __str__(self):
+        return f"{self.event} for task #{self.task_id}"
+
+    def to_sse(self):
+        """Format the event as a Server-Sent Events message."""
+        return f"id: {self.pk}\nevent: {self.event}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response for a POST sent with an Idempotency-Key.
+
+    Retrying the same request with the same key replays this response
+    instead of performing the action again.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=100)
+    request_fingerprint = models.CharField(max_length=64)
+
+    completed = models.BooleanField(default=False)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_content_type = models.CharField(max_length=100, blank=True)
+    response_location = models.CharField(max_length=500, blank=True)
+    response_body = models.BinaryField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='core_idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user})"
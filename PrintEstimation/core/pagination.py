@@ -0,0 +1,165 @@
+"""
+Keyset (cursor) pagination for list views.
+
+A page is addressed by an opaque cursor that holds the sort key of the last
+row already shown. The next page is the rows that sort after it, so page 500
+costs the same index range scan as page 1: there is no OFFSET and no COUNT(*).
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor cannot be decoded for the current ordering."""
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    """Pack a row's sort key into a URL-safe string."""
+    data = json.dumps([_json_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Unpack a cursor made by encode_cursor() for an ordering of size fields."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def _field_value(obj, field):
+    for attname in field.split('__'):
+        obj = getattr(obj, attname)
+    return obj
+
+
+def keyset_filter(ordering, values):
+    """
+    Match rows that sort after values under ordering.
+
+    For ('-created_at', '-id') this is
+    created_at < v0 OR (created_at = v0 AND id < v1).
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset."""
+
+    def __init__(self, object_list, next_cursor, cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return bool(self.cursor)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(queryset, ordering, page_size, cursor=None):
+    """
+    Return the KeysetPage of queryset that follows cursor.
+
+    The last field of ordering must be unique (normally the primary key) so
+    that every row has a distinct position.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, len(ordering))))
+
+    # One extra row tells us whether there is a next page without counting
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([_field_value(last, field.lstrip('-')) for field in ordering])
+    return KeysetPage(rows, next_cursor, cursor)
+
+
+class KeysetPaginationMixin:
+    """
+    Keyset pagination for a ListView, selected with ?cursor=.
+
+    AJAX requests get JSON with the rendered rows (rows_template_name) and the
+    URL of the following page, which the list pages use for infinite scroll.
+    """
+    keyset_ordering = ('-created_at', '-id')
+    cursor_kwarg = 'cursor'
+    rows_template_name = None
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = paginate_keyset(
+                queryset, self.get_keyset_ordering(), page_size,
+                cursor=self.request.GET.get(self.cursor_kwarg) or None
+            )
+        except InvalidCursor:
+            raise Http404('Invalid page cursor.')
+        return None, page, page.object_list, page.has_other_pages()
+
+    def _page_url(self, cursor):
+        query = self.request.GET.copy()
+        query.pop(self.cursor_kwarg, None)
+        if cursor:
+            query[self.cursor_kwarg] = cursor
+        return f'?{query.urlencode()}' if query else self.request.path
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        if page is not None:
+            context['first_page_url'] = self._page_url(None)
+            context['next_page_url'] = self._page_url(page.next_cursor) if page.has_next() else ''
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' and self.rows_template_name:
+            return JsonResponse({
+                'success': True,
+                'html': render_to_string(self.rows_template_name, context, request=self.request),
+                'next_cursor': context['page_obj'].next_cursor,
+                'next_url': context['next_page_url'],
+            })
+        return super().render_to_response(context, **response_kwargs)
@@ -0,0 +1,102 @@
+"""
+Read replica routing.
+
+When DATABASE_REPLICA_URL is set, settings.DATABASE_REPLICA_ALIAS names a
+second database that replicates `default`. Reads made inside use_replica()
+go to it; every write, and every read inside a transaction, stays on
+`default`. Views opt in with ReplicaReadMixin, which covers their GET
+requests including template rendering.
+
+Replicas lag behind the primary, so someone who has just saved a job must
+not read it back from one. PrimaryStickinessMiddleware pins a browser to the
+primary for DATABASE_REPLICA_STICKY_SECONDS after each of its POSTs.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY_PIN_COOKIE = 'db_primary_pin'
+
+_read_alias = contextvars.ContextVar('replica_read_alias', default=None)
+
+
+def get_replica_alias():
+    """Return the alias of the read replica, or None when there is none."""
+    return getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
+
+
+@contextmanager
+def use_replica(request=None):
+    """
+    Send the reads made inside the block to the replica.
+
+    Does nothing without a replica or for a request pinned to the primary.
+    """
+    alias = get_replica_alias()
+    if not alias or getattr(request, 'db_primary_pinned', False):
+        yield
+        return
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Route reads inside use_replica() to the replica and all else to default."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # A transaction must read its own writes
+        if alias and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Also for objects that were read from the replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows
+        return True
+
+
+class ReplicaReadMixin:
+    """Serve a view's GET requests from the read replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with use_replica(request):
+            response = super().dispatch(request, *args, **kwargs)
+            # Render now so queries made by the template use the replica too
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Pin a browser to the primary for a while after it writes.
+
+    Any POST (or other unsafe method) sets a short-lived cookie; requests
+    carrying it get request.db_primary_pinned, which use_replica() honours.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.db_primary_pinned = PRIMARY_PIN_COOKIE in request.COOKIES
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE') and get_replica_alias():
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE, '1',
+                max_age=getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 10),
+                httponly=True, samesite='Lax',
+            )
+        return response
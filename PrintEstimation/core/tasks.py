@@ -0,0 +1,297 @@
+"""
+Database-backed background task queue.
+
+Tasks are plain functions registered with the `task` decorator. They receive
+the BackgroundTask row as their first argument (for progress reporting)
+followed by the JSON keyword arguments they were enqueued with. Queued tasks
+are executed by `python manage.py run_workers`; with
+BACKGROUND_TASKS_EAGER enabled they run inline when enqueued instead.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .locks import named_lock
+from .models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+# A debounced task is never postponed more than this many delays after it
+# was first queued, so a steady stream of calls still lets it run.
+DEBOUNCE_MAX_FACTOR = 6
+
+
+def task(name=None, max_attempts=3):
+    """Register a function as a background task."""
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        _registry[task_name] = func
+        func.task_name = task_name
+        func.max_attempts = max_attempts
+        return func
+    return decorator
+
+
+def get_task(name):
+    """Return the function registered under name."""
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f'Unknown background task: {name}')
+
+
+def task_dedupe_key(name, kwargs):
+    """Hash identifying a task by its name and arguments."""
+    payload = json.dumps([name, kwargs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def enqueue(func, reference='', user=None, max_attempts=None, dedupe=False, debounce=None, **kwargs):
+    """
+    Queue a registered task and return its BackgroundTask.
+
+    Keyword arguments must be JSON serializable; pass ids, not model instances.
+    With dedupe=True an identical queued or running task is returned instead
+    of queueing the same work a second time.
+
+    With debounce=seconds the task runs that long after the last enqueue: an
+    identical task still waiting in the queue is pushed back rather than
+    queued again, but never beyond DEBOUNCE_MAX_FACTOR times the delay after
+    it was first queued. A task that is already running does not absorb the
+    call, so changes made while it runs get a run of their own.
+    """
+    if not dedupe and debounce is None:
+        return _enqueue(func, reference, user, max_attempts, '', kwargs)
+
+    dedupe_key = task_dedupe_key(func.task_name, kwargs)
+    with named_lock(f'enqueue:{dedupe_key}'):
+        if debounce is None:
+            existing = BackgroundTask.objects.active().filter(dedupe_key=dedupe_key).order_by('created_at').first()
+            if existing is not None:
+                return existing
+            return _enqueue(func, reference, user, max_attempts, dedupe_key, kwargs)
+
+        now = timezone.now()
+        delay = timedelta(seconds=debounce)
+        existing = BackgroundTask.objects.filter(
+            status=BackgroundTask.STATUS_QUEUED, dedupe_key=dedupe_key
+        ).order_by('created_at').first()
+        if existing is not None:
+            run_after = max(existing.run_after, min(now + delay, existing.created_at + delay * DEBOUNCE_MAX_FACTOR))
+            # Only push it back if no worker claimed it in the meantime
+            if BackgroundTask.objects.filter(
+                pk=existing.pk, status=BackgroundTask.STATUS_QUEUED
+            ).update(run_after=run_after):
+                existing.run_after = run_after
+                return existing
+        return _enqueue(func, reference, user, max_attempts, dedupe_key, kwargs, run_after=now + delay)
+
+
+def _enqueue(func, reference, user, max_attempts, dedupe_key, kwargs, run_after=None):
+    eager = getattr(settings, 'BACKGROUND_TASKS_EAGER', False)
+    background_task = BackgroundTask.objects.create(
+        name=func.task_name,
+        kwargs=kwargs,
+        reference=reference,
+        dedupe_key=dedupe_key,
+        run_after=run_after or timezone.now(),
+        created_by=user if user is not None and user.is_authenticated else None,
+        # Inline runs have no worker to pick up a retry
+        max_attempts=1 if eager else (max_attempts or func.max_attempts),
+    )
+    if eager:
+        if _claim(background_task.pk, 'eager'):
+            background_task.refresh_from_db()
+            run_task(background_task)
+            background_task.refresh_from_db()
+    return background_task
+
+
+def _claim(task_id, worker_id):
+    """Atomically mark a queued task as running; return True if we got it."""
+    now = timezone.now()
+    return BackgroundTask.objects.filter(
+        pk=task_id, status=BackgroundTask.STATUS_QUEUED
+    ).update(
+        status=BackgroundTask.STATUS_RUNNING,
+        attempts=F('attempts') + 1,
+        locked_by=worker_id,
+        locked_at=now,
+        started_at=now,
+    ) == 1
+
+
+def claim_next_task(worker_id):
+    """Claim the oldest runnable task, or return None when the queue is empty."""
+    while True:
+        candidate_ids = list(
+            BackgroundTask.objects.filter(
+                status=BackgroundTask.STATUS_QUEUED, run_after__lte=timezone.now()
+            ).order_by('run_after', 'pk').values_list('pk', flat=True)[:5]
+        )
+        if not candidate_ids:
+            return None
+        for task_id in candidate_ids:
+            if _claim(task_id, worker_id):
+                return BackgroundTask.objects.get(pk=task_id)
+        # Another worker claimed every candidate first; look again.
+
+
+def retry_delay(attempts):
+    """Exponential backoff before the next attempt."""
+    base = getattr(settings, 'BACKGROUND_TASKS_RETRY_DELAY', 10)
+    return timedelta(seconds=base * (2 ** (attempts - 1)))
+
+
+def run_task(background_task):
+    """Execute a claimed task and record its outcome."""
+    background_task.emit('status', background_task.to_dict())
+    # Only the run still holding the lock records an outcome
+    claimed = BackgroundTask.objects.filter(
+        pk=background_task.pk, status=BackgroundTask.STATUS_RUNNING, locked_by=background_task.locked_by
+    )
+    try:
+        func = get_task(background_task.name)
+        result = func(background_task, **background_task.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Background task %s failed', background_task)
+        retry = background_task.attempts < background_task.max_attempts
+        claimed.update(
+            status=BackgroundTask.STATUS_QUEUED if retry else BackgroundTask.STATUS_FAILED,
+            run_after=timezone.now() + retry_delay(background_task.attempts),
+            error=error,
+            locked_by='',
+            locked_at=None,
+            finished_at=None if retry else timezone.now(),
+        )
+        _emit_status(background_task)
+        return False
+
+    claimed.update(
+        status=BackgroundTask.STATUS_SUCCEEDED,
+        result=result,
+        error='',
+        locked_by='',
+        locked_at=None,
+        finished_at=timezone.now(),
+    )
+    _emit_status(background_task)
+    return True
+
+
+def _emit_status(background_task):
+    """Publish the task's final (or retry) state to its event stream."""
+    background_task.refresh_from_db()
+    background_task.emit('status', background_task.to_dict())
+
+
+@contextmanager
+def heartbeat(background_task):
+    """
+    Keep refreshing a running task's lock while the block runs.
+
+    Long tasks would otherwise look stale after BACKGROUND_TASKS_STALE_AFTER
+    seconds and be requeued while still running.
+    """
+    interval = max(1, getattr(settings, 'BACKGROUND_TASKS_STALE_AFTER', 600) / 3)
+    stop_event = threading.Event()
+
+    def beat():
+        try:
+            while not stop_event.wait(interval):
+                BackgroundTask.objects.filter(
+                    pk=background_task.pk, status=BackgroundTask.STATUS_RUNNING,
+                    locked_by=background_task.locked_by,
+                ).update(locked_at=timezone.now())
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop_event.set()
+        thread.join()
+
+
+def requeue_stale_tasks():
+    """
+    Return tasks whose worker died mid-run to the queue.
+
+    A task that died on its last attempt is marked failed instead. Each task
+    is only touched if the worker that was seen holding it still does and
+    has not refreshed the lock since. Returns the number of tasks requeued.
+    """
+    timeout = getattr(settings, 'BACKGROUND_TASKS_STALE_AFTER', 600)
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=timeout)
+    stale = BackgroundTask.objects.filter(status=BackgroundTask.STATUS_RUNNING, locked_at__lt=cutoff)
+    requeued = 0
+    for task_id, locked_by, attempts, max_attempts in stale.values_list(
+        'pk', 'locked_by', 'attempts', 'max_attempts'
+    ):
+        still_stale = stale.filter(pk=task_id, locked_by=locked_by)
+        if attempts >= max_attempts:
+            still_stale.update(
+                status=BackgroundTask.STATUS_FAILED,
+                error='WorkerLost: Worker stopped before the task finished',
+                locked_by='',
+                locked_at=None,
+                finished_at=now,
+            )
+        else:
+            requeued += still_stale.update(status=BackgroundTask.STATUS_QUEUED, locked_by='', locked_at=None)
+    return requeued
+
+
+def make_worker_id(index=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def run_worker(worker_id, stop_event=None, poll_interval=1.0, burst=False):
+    """
+    Process tasks until stop_event is set.
+
+    In burst mode the worker exits as soon as the queue is empty.
+    Returns the number of tasks processed.
+    """
+    stop_event = stop_event or threading.Event()
+    stale_after = getattr(settings, 'BACKGROUND_TASKS_STALE_AFTER', 600)
+    next_requeue = time.monotonic() + stale_after
+    processed = 0
+    while not stop_event.is_set():
+        close_old_connections()
+        # Workers that die mid-run are only noticed by the workers still alive
+        if time.monotonic() >= next_requeue:
+            requeued = requeue_stale_tasks()
+            if requeued:
+                logger.warning('Requeued %s stale background tasks', requeued)
+            next_requeue = time.monotonic() + stale_after
+        background_task = claim_next_task(worker_id)
+        if background_task is None:
+            if burst:
+                break
+            stop_event.wait(poll_interval)
+            continue
+        with heartbeat(background_task):
+            run_task(background_task)
+        processed += 1
+    close_old_connections()
+    return processed
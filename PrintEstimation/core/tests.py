@@ -1,3 +1,389 @@
-from django.test import TestCase
+"""
+Tests for core functionality.
+"""
 
-# Create your tests here.
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django import forms
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from PrintEstimation.accounts.models import Client
+from .admission import AdmissionController, AdmissionRejected
+from .autocomplete import AUTOCOMPLETE_PAGE_SIZE, AutocompleteSelect
+from .locks import LockTimeout, named_lock
+from .pagination import InvalidCursor, paginate_keyset
+from .models import BackgroundTask, TaskEvent
+from .replicas import PRIMARY_PIN_COOKIE, PrimaryStickinessMiddleware, ReplicaRouter, use_replica
+from .tasks import claim_next_task, enqueue, requeue_stale_tasks, run_task, run_worker, task
+
+User = get_user_model()
+
+
+@task(name='core.tests.count_to')
+def count_to(background_task, total):
+    for number in range(1, total + 1):
+        background_task.set_progress(number, total, f'Counted {number}')
+    return {'counted': total}
+
+
+@task(name='core.tests.always_fails', max_attempts=2)
+def always_fails(background_task):
+    raise ValueError('Nothing to do')
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=False, BACKGROUND_TASKS_RETRY_DELAY=0)
+class BackgroundTaskTest(TestCase):
+    """Tests for the database-backed task queue."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass12345')
+
+    def test_enqueue_leaves_task_queued(self):
+        """Test that enqueued tasks wait for a worker."""
+        background_task = enqueue(count_to, user=self.user, total=3)
+
+        self.assertEqual(background_task.status, BackgroundTask.STATUS_QUEUED)
+        self.assertEqual(background_task.kwargs, {'total': 3})
+
+    def test_worker_runs_task_and_records_progress(self):
+        """Test that a worker executes queued tasks to completion."""
+        background_task = enqueue(count_to, total=3)
+
+        processed = run_worker('test-worker', burst=True)
+
+        self.assertEqual(processed, 1)
+        background_task.refresh_from_db()
+        self.assertEqual(background_task.status, BackgroundTask.STATUS_SUCCEEDED)
+        self.assertEqual(background_task.result, {'counted': 3})
+        self.assertEqual(background_task.progress_percent, 100)
+        self.assertEqual(background_task.progress_message, 'Counted 3')
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        """Test retries up to max_attempts."""
+        background_task = enqueue(always_fails)
+
+        with self.assertLogs('PrintEstimation.core.tasks', level='ERROR'):
+            run_worker('test-worker', burst=True)
+
+        background_task.refresh_from_db()
+        self.assertEqual(background_task.status, BackgroundTask.STATUS_FAILED)
+        self.assertEqual(background_task.attempts, 2)
+        self.assertEqual(background_task.error_message, 'Nothing to do')
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        """Test that eager mode completes the task during enqueue."""
+        background_task = enqueue(count_to, total=2)
+
+        self.assertEqual(background_task.status, BackgroundTask.STATUS_SUCCEEDED)
+
+    def test_status_endpoint_is_limited_to_owner(self):
+        """Test the task status endpoint."""
+        background_task = enqueue(count_to, user=self.user, total=1)
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        url = reverse('core:task_status', args=[background_task.pk])
+
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['task']['status'], BackgroundTask.STATUS_QUEUED)
+
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_task_emits_progress_and_status_events(self):
+        """Test that running a task records its event stream."""
+        background_task = enqueue(count_to, total=2)
+
+        run_worker('test-worker', burst=True)
+
+        events = list(background_task.events.values_list('event', flat=True))
+        self.assertEqual(events, ['status', 'progress', 'progress', 'status'])
+        self.assertEqual(background_task.events.last().data['status'], BackgroundTask.STATUS_SUCCEEDED)
+
+    async def test_event_stream_resumes_after_last_event_id(self):
+        """Test the Server-Sent Events endpoint."""
+        background_task = await sync_to_async(enqueue)(count_to, user=self.user, total=2)
+        await sync_to_async(run_worker)('test-worker', burst=True)
+        first_event = await background_task.events.afirst()
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(
+            reverse('core:task_events', args=[background_task.pk]),
+            headers={'Last-Event-ID': str(first_event.pk)}
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertNotIn(f'id: {first_event.pk}\n', body)
+        self.assertEqual(body.count('event: progress'), 2)
+        final_event = await TaskEvent.objects.filter(task=background_task).alast()
+        self.assertIn(final_event.to_sse(), body)
+        self.assertTrue(body.endswith('event: end\ndata: {}\n\n'))
+
+    @override_settings(BACKGROUND_TASKS_STALE_AFTER=0)
+    def test_worker_requeues_stale_tasks(self):
+        """Test that a running worker recovers tasks of workers that died."""
+        retried = enqueue(count_to, total=1)
+        exhausted = enqueue(count_to, total=1, max_attempts=1)
+        BackgroundTask.objects.update(
+            status=BackgroundTask.STATUS_RUNNING, attempts=1,
+            locked_by='dead-worker', locked_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        with self.assertLogs('PrintEstimation.core.tasks', level='WARNING'):
+            processed = run_worker('test-worker', burst=True)
+
+        self.assertEqual(processed, 1)
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retried.status, BackgroundTask.STATUS_SUCCEEDED)
+        self.assertEqual(exhausted.status, BackgroundTask.STATUS_FAILED)
+        self.assertEqual(exhausted.error_message, 'Worker stopped before the task finished')
+
+    @override_settings(BACKGROUND_TASKS_STALE_AFTER=60)
+    def test_live_tasks_are_not_requeued(self):
+        """Test that progress keeps a long task locked and a lost lock discards the old run."""
+        enqueue(count_to, total=1)
+        background_task = claim_next_task('slow-worker')
+        BackgroundTask.objects.update(locked_at=timezone.now() - timedelta(minutes=2))
+
+        background_task.set_progress(1, 2)
+        self.assertEqual(requeue_stale_tasks(), 0)
+
+        # Requeued and picked up by another worker: the first run's outcome is dropped
+        BackgroundTask.objects.update(locked_by='other-worker')
+        run_task(background_task)
+        background_task.refresh_from_db()
+        self.assertEqual(background_task.status, BackgroundTask.STATUS_RUNNING)
+        self.assertEqual(background_task.locked_by, 'other-worker')
+
+    def test_debounced_enqueue_pushes_back_waiting_task(self):
+        """Test that repeated debounced calls share one queued task."""
+        first = enqueue(count_to, debounce=30, total=2)
+        second = enqueue(count_to, debounce=60, total=2)
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertGreater(second.run_after, first.run_after)
+        self.assertEqual(BackgroundTask.objects.count(), 1)
+
+        # A task a worker already picked up does not absorb new calls
+        BackgroundTask.objects.filter(pk=first.pk).update(status=BackgroundTask.STATUS_RUNNING)
+        third = enqueue(count_to, debounce=30, total=2)
+        self.assertNotEqual(third.pk, first.pk)
+
+
+@override_settings(ADMISSION_GLOBAL_LIMIT=2, ADMISSION_USER_LIMIT=1, ADMISSION_MAX_WAIT=0, ADMISSION_SCOPES={})
+class AdmissionControllerTest(TestCase):
+    """Tests for per-user and global concurrency limits."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.controller = AdmissionController('calculation')
+
+    def test_user_limit_rejects_with_429(self):
+        """Test that a second concurrent request from one user is rejected."""
+        with self.controller.acquire(1):
+            with self.assertRaises(AdmissionRejected) as rejected:
+                self.controller.acquire(1)
+        self.assertEqual(rejected.exception.status, 429)
+
+        # Released slots can be taken again
+        self.controller.acquire(1).release()
+
+    def test_global_limit_rejects_with_503(self):
+        """Test that the global limit applies across users."""
+        first = self.controller.acquire(1)
+        second = self.controller.acquire(2)
+
+        with self.assertRaises(AdmissionRejected) as rejected:
+            self.controller.acquire(3)
+
+        self.assertEqual(rejected.exception.status, 503)
+        stats = self.controller.stats()
+        self.assertEqual(stats['in_flight'], 2)
+        self.assertEqual(stats['admitted'], 2)
+        self.assertEqual(stats['rejected_global'], 1)
+        first.release()
+        second.release()
+        self.assertEqual(self.controller.stats()['in_flight'], 0)
+
+    @override_settings(ADMISSION_MAX_WAIT=0.3, ADMISSION_QUEUE_LIMIT=0)
+    def test_full_wait_queue_rejects_immediately(self):
+        """Test that requests are shed when the wait queue is full."""
+        with self.controller.acquire(1):
+            with self.assertRaises(AdmissionRejected) as rejected:
+                AdmissionController('calculation').acquire(1)
+
+        self.assertEqual(rejected.exception.status, 503)
+        self.assertEqual(self.controller.stats()['rejected_queue_full'], 1)
+
+    def test_rejected_view_sets_retry_after(self):
+        """Test the 429 response of a guarded endpoint."""
+        user = User.objects.create_user(username='testuser', email='test@example.com')
+        self.client.force_login(user)
+
+        with self.controller.acquire(user.pk):
+            response = self.client.get(reverse('jobs:quote', args=[1]))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '5')
+
+
+class NamedLockTest(TestCase):
+    """Tests for locks shared across worker processes."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+
+    def test_held_lock_times_out(self):
+        """Test that a second holder waits and then gives up."""
+        with named_lock('job-calculation:1'):
+            with self.assertRaises(LockTimeout):
+                with named_lock('job-calculation:1', timeout=0.1):
+                    pass
+            # Other names are independent
+            with named_lock('job-calculation:2', timeout=0.1):
+                pass
+
+        with named_lock('job-calculation:1', timeout=0.1):
+            pass
+
+
+class KeysetPaginationTest(TestCase):
+    """Tests for cursor pagination."""
+
+    def test_pages_follow_cursor_through_ties(self):
+        """Test that every row is listed once, even with equal sort values."""
+        now = timezone.now()
+        for number in range(7):
+            BackgroundTask.objects.create(name=f'task-{number}')
+        # Rows with the same timestamp are ordered by id
+        BackgroundTask.objects.update(created_at=now)
+        ordering = ('-created_at', '-id')
+
+        seen = []
+        cursor = None
+        while True:
+            page = paginate_keyset(BackgroundTask.objects.all(), ordering, 3, cursor=cursor)
+            seen.extend(task.pk for task in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+
+        expected = list(BackgroundTask.objects.order_by('-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(page), 1)
+        self.assertTrue(page.has_previous())
+
+    def test_page_costs_one_query(self):
+        """Test that a page is a single query without COUNT(*) or OFFSET."""
+        for number in range(5):
+            BackgroundTask.objects.create(name=f'task-{number}')
+        first = paginate_keyset(BackgroundTask.objects.all(), ('-created_at', '-id'), 2)
+
+        with self.assertNumQueries(1) as context:
+            paginate_keyset(BackgroundTask.objects.all(), ('-created_at', '-id'), 2, cursor=first.next_cursor)
+        sql = context.captured_queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_invalid_cursor_is_rejected(self):
+        """Test that a tampered cursor raises InvalidCursor."""
+        with self.assertRaises(InvalidCursor):
+            paginate_keyset(BackgroundTask.objects.all(), ('-created_at', '-id'), 2, cursor='not-a-cursor')
+
+
+@override_settings(DATABASE_REPLICA_ALIAS='replica', DATABASE_REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTest(SimpleTestCase):
+    """Tests for read replica routing."""
+
+    def test_only_reads_inside_use_replica_go_to_replica(self):
+        """Test that the router sends opted-in reads to the replica and writes to default."""
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(BackgroundTask), DEFAULT_DB_ALIAS)
+        with use_replica():
+            self.assertEqual(router.db_for_read(BackgroundTask), 'replica')
+            self.assertEqual(router.db_for_write(BackgroundTask), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_read(BackgroundTask), DEFAULT_DB_ALIAS)
+
+        with override_settings(DATABASE_REPLICA_ALIAS=None), use_replica():
+            self.assertEqual(router.db_for_read(BackgroundTask), DEFAULT_DB_ALIAS)
+
+    def test_writes_pin_the_browser_to_the_primary(self):
+        """Test that a POST pins the following requests to the primary."""
+        factory = RequestFactory()
+        middleware = PrimaryStickinessMiddleware(lambda request: HttpResponse())
+
+        response = middleware(factory.get('/'))
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+        response = middleware(factory.post('/'))
+        self.assertEqual(response.cookies[PRIMARY_PIN_COOKIE]['max-age'], 10)
+
+        request = factory.get('/')
+        request.COOKIES[PRIMARY_PIN_COOKIE] = '1'
+        middleware(request)
+        self.assertTrue(request.db_primary_pinned)
+        with use_replica(request):
+            self.assertEqual(ReplicaRouter().db_for_read(BackgroundTask), DEFAULT_DB_ALIAS)
+
+
+class AutocompleteTest(TestCase):
+    """Tests for autocomplete endpoints and widgets."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass')
+        Client.objects.bulk_create(
+            Client(company_name=f'Acme {number:02d}', email=f'acme{number}@example.com')
+            for number in range(AUTOCOMPLETE_PAGE_SIZE + 5)
+        )
+        self.globex = Client.objects.create(company_name='Globex', email='globex@example.com')
+        self.url = reverse('accounts:client_autocomplete')
+
+    def test_results_match_prefix_page_by_page(self):
+        """Test that results match the prefix case-insensitively and page by cursor."""
+        self.client.force_login(self.user)
+
+        first = self.client.get(self.url, {'q': 'ACME'}).json()
+        second = self.client.get(self.url, {'q': 'ACME', 'cursor': first['next_cursor']}).json()
+
+        texts = [result['text'] for result in first['results'] + second['results']]
+        self.assertEqual(texts, [f'Acme {number:02d}' for number in range(AUTOCOMPLETE_PAGE_SIZE + 5)])
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(
+            [result['id'] for result in self.client.get(self.url, {'q': 'glo'}).json()['results']],
+            [self.globex.pk]
+        )
+
+    def test_endpoint_rejects_anonymous_users_and_bad_cursors(self):
+        """Test the error responses of an autocomplete endpoint."""
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 400)
+
+    def test_widget_renders_only_selected_option(self):
+        """Test that rendering does not list every row of the table."""
+        class PickerForm(forms.Form):
+            client = forms.ModelChoiceField(
+                queryset=Client.objects.all(), widget=AutocompleteSelect('accounts:client_autocomplete')
+            )
+
+        html = str(PickerForm(initial={'client': self.globex.pk})['client'])
+
+        self.assertIn(f'data-autocomplete-url="{self.url}"', html)
+        self.assertIn('Globex', html)
+        self.assertNotIn('Acme', html)
+        self.assertEqual(html.count('<option'), 1)
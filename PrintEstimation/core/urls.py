@@ -10,4 +10,8 @@ app_name = 'core'
 urlpatterns = [
     path('', views.HomeView.as_view(), name='home'),
     path('about/', views.AboutView.as_view(), name='about'),
+    path('admission/stats/', views.admission_stats, name='admission_stats'),
+    path('dashboard/changes/', views.dashboard_changes, name='dashboard_changes'),
+    path('tasks/<int:pk>/', views.task_status, name='task_status'),
+    path('tasks/<int:pk>/events/', views.task_events, name='task_events'),
 ]
\ No newline at end of file
@@ -4,11 +4,20 @@ Core views for the printing estimation system.
 
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from PrintEstimation.jobs.models import Job
-from PrintEstimation.accounts.models import Client
+import asyncio
+import time
 
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from .admission import AdmissionController
+from .models import BackgroundTask, TaskEvent
+from .replicas import ReplicaReadMixin
+from PrintEstimation.jobs.dashboard import get_dashboard
+from PrintEstimation.jobs.models import JobStatusChange
 
-class HomeView(TemplateView):
+
+class HomeView(ReplicaReadMixin, TemplateView):
     """
     Home page view - public landing page.
     """
@@ -19,35 +28,7 @@ class HomeView(TemplateView):
 
         # Add dashboard data for authenticated users
         if self.request.user.is_authenticated:
-            # Staff can see all jobs, regular users only their own
-            if self.request.user.is_staff_user():
-                # Staff users see all jobs
-                base_filter = {'is_template': False}
-                templates_filter = {'is_template': True}
-            else:
-                # Regular users see only their jobs
-                base_filter = {'created_by': self.request.user, 'is_template': False}
-                templates_filter = {'created_by': self.request.user, 'is_template': True}
-
-            # Get workflow-based job categories
-            urgent_jobs = Job.objects.filter(**base_filter, status='urgent').order_by('-created_at')
-            approved_jobs = Job.objects.filter(**base_filter, status='approved').order_by('-created_at')
-            waiting_manager_jobs = Job.objects.filter(**base_filter, status='waiting_manager').order_by('-created_at')
-            waiting_client_jobs = Job.objects.filter(**base_filter, status='waiting_client').order_by('-created_at')
-
-            context.update({
-                # Workflow job lists
-                'urgent_jobs': urgent_jobs,
-                'approved_jobs': approved_jobs,
-                'waiting_manager_jobs': waiting_manager_jobs,
-                'waiting_client_jobs': waiting_client_jobs,
-                
-                # Counts for the cards
-                'urgent_count': urgent_jobs.count(),
-                'approved_count': approved_jobs.count(),
-                'waiting_manager_count': waiting_manager_jobs.count(),
-                'waiting_client_count': waiting_client_jobs.count(),
-            })
+            context.update(get_dashboard(self.request.user))
 
         return context
 
@@ -56,4 +37,146 @@ class AboutView(TemplateView):
     """
     About page view.
     """
-    template_name = 'core/about.html'
\ No newline at end of file
+    template_name = 'core/about.html'
+
+@require_GET
+def task_status(request, pk):
+    """Return the status and progress of a background task as JSON."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+
+    background_task = _get_user_task(request, pk)
+    if background_task is None:
+        return JsonResponse({'success': False, 'error': 'Task not found'}, status=404)
+
+    return JsonResponse({'success': True, 'task': background_task.to_dict()})
+
+
+@require_GET
+async def task_events(request, pk):
+    """
+    Stream a background task's progress events as Server-Sent Events.
+
+    The stream ends once the task has finished and all its events were sent.
+    Clients reconnecting with Last-Event-ID resume after that event. Served
+    by an async generator, so under ASGI an open stream holds no thread.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+
+    background_task = await _user_tasks(user).filter(pk=pk).afirst()
+    if background_task is None:
+        return JsonResponse({'success': False, 'error': 'Task not found'}, status=404)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or 0
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        last_event_id = 0
+
+    response = StreamingHttpResponse(
+        _stream_task_events(background_task.pk, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+async def dashboard_changes(request):
+    """
+    Long-poll for job status changes after the `since` cursor.
+
+    Responds as soon as there are new changes, or with an empty list after
+    DASHBOARD_FEED_TIMEOUT seconds; clients then poll again with the
+    returned cursor. Waiting is async, so under ASGI it holds no thread.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+
+    try:
+        since = int(request.GET.get('since', 0))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+
+    changes = JobStatusChange.objects.select_related('job__client').order_by('pk')
+    if not user.is_staff_user():
+        changes = changes.filter(job__created_by=user)
+
+    poll_interval = getattr(settings, 'DASHBOARD_FEED_POLL_INTERVAL', 1.0)
+    deadline = time.monotonic() + getattr(settings, 'DASHBOARD_FEED_TIMEOUT', 20)
+    while not await changes.filter(pk__gt=since).aexists() and time.monotonic() < deadline:
+        await asyncio.sleep(poll_interval)
+    batch = [change async for change in changes.filter(pk__gt=since)[:100]]
+
+    return JsonResponse({
+        'success': True,
+        'cursor': batch[-1].pk if batch else since,
+        'changes': [change.to_dict() for change in batch],
+    })
+
+
+@require_GET
+def admission_stats(request):
+    """Expose admission control load and rejection counters to staff."""
+    if not request.user.is_authenticated or not request.user.is_staff_user():
+        return JsonResponse({'success': False, 'error': 'Staff access required'}, status=403)
+
+    scopes = {'calculation', 'export', *getattr(settings, 'ADMISSION_SCOPES', {})}
+    return JsonResponse({
+        'success': True,
+        'scopes': {scope: AdmissionController(scope).stats() for scope in sorted(scopes)},
+    })
+
+
+def _user_tasks(user):
+    """Return the tasks the user may see."""
+    tasks = BackgroundTask.objects.all()
+    if not user.is_staff_user():
+        tasks = tasks.filter(created_by=user)
+    return tasks
+
+
+def _get_user_task(request, pk):
+    """Return the task if the user may see it, else None."""
+    return _user_tasks(request.user).filter(pk=pk).first()
+
+
+async def _stream_task_events(task_id, last_event_id):
+    """Yield SSE messages for new task events until the task is finished."""
+    poll_interval = getattr(settings, 'TASK_EVENTS_POLL_INTERVAL', 0.5)
+    max_duration = getattr(settings, 'TASK_EVENTS_STREAM_TIMEOUT', 300)
+    heartbeat_every = 15
+    started = last_heartbeat = time.monotonic()
+
+    yield 'retry: 2000\n\n'
+    while True:
+        events = [
+            event async for event in
+            TaskEvent.objects.filter(task_id=task_id, pk__gt=last_event_id).order_by('pk')[:100]
+        ]
+        for event in events:
+            last_event_id = event.pk
+            yield event.to_sse()
+        if events:
+            continue
+
+        status = await BackgroundTask.objects.filter(pk=task_id).values_list('status', flat=True).afirst()
+        if status in (None, BackgroundTask.STATUS_SUCCEEDED, BackgroundTask.STATUS_FAILED):
+            # A final status event may have landed after the read above
+            if not await TaskEvent.objects.filter(task_id=task_id, pk__gt=last_event_id).aexists():
+                yield 'event: end\ndata: {}\n\n'
+                return
+            continue
+
+        now = time.monotonic()
+        if now - started > max_duration:
+            # Let the client reconnect with Last-Event-ID
+            return
+        if now - last_heartbeat > heartbeat_every:
+            last_heartbeat = now
+            yield ': keepalive\n\n'
+        await asyncio.sleep(poll_interval)
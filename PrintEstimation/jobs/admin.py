@@ -3,17 +3,17 @@ Admin configuration for jobs app.
 """
 
 from django.contrib import admin
-from .models import Job, JobOperation, JobVariant
+from .models import ArchivedJob, Job, JobOperation, JobVariant, JobStatusChange
 
 
 class JobOperationInline(admin.TabularInline):
     """Inline admin for JobOperation."""
     model = JobOperation
     extra = 0
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'operation_name']
     fields = [
-        'sequence_order', 'operation', 'operation_name', 'quantity_before',
-        'quantity_after', 'total_cost', 'total_time_minutes'
+        'sequence_order', 'operation', 'operation_name', 'catalog_version',
+        'quantity_before', 'quantity_after', 'total_cost', 'total_time_minutes'
     ]
 
 
@@ -21,9 +21,9 @@ class JobVariantInline(admin.TabularInline):
     """Inline admin for JobVariant."""
     model = JobVariant
     extra = 0
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'cost_per_piece']
     fields = [
-        'quantity', 'total_cost', 'total_time_minutes'
+        'quantity', 'total_cost', 'cost_per_piece', 'total_time_minutes'
     ]
 
 
@@ -32,7 +32,7 @@ class JobAdmin(admin.ModelAdmin):
     """Admin for Job model."""
     list_display = [
         'job_number', 'client', 'order_type', 'quantity', 'deadline',
-        'status', 'is_template', 'total_cost', 'paper_cost', 'created_by', 'created_at'
+        'status', 'is_template', 'total_cost', 'paper_cost', 'operations_cost', 'created_by', 'created_at'
     ]
     list_filter = [
         'status', 'order_type', 'is_template', 'created_at',
@@ -81,29 +81,29 @@ class JobAdmin(admin.ModelAdmin):
         ('Calculated Results', {
             'fields': (
                 'total_cost', 'total_material_cost', 'total_labor_cost', 'total_outsourcing_cost',
-                'paper_cost', 'total_time_minutes', 'print_run', 'waste_sheets', 
+                'paper_cost', 'operations_cost', 'total_time_minutes', 'print_run', 'waste_sheets', 
                 'sheets_to_buy', 'paper_weight_kg'
             ),
             'classes': ('collapse',)
         }),
         ('Metadata', {
-            'fields': ('created_by', 'created_at', 'updated_at', 'calculated_at'),
+            'fields': ('created_by', 'created_at', 'updated_at', 'calculated_at', 'catalog_version'),
             'classes': ('collapse',)
         })
     )
 
-    readonly_fields = ['created_at', 'updated_at', 'calculated_at']
+    readonly_fields = ['created_at', 'updated_at', 'calculated_at', 'operations_cost']
 
     actions = ['mark_as_sent', 'mark_as_approved', 'create_templates', 'duplicate_jobs']
 
     def mark_as_sent(self, request, queryset):
         """Mark selected jobs as sent to client."""
-        queryset.update(status='sent')
+        JobStatusChange.set_status(queryset, 'sent')
     mark_as_sent.short_description = "Mark as sent to client"
 
     def mark_as_approved(self, request, queryset):
         """Mark selected jobs as approved."""
-        queryset.update(status='approved')
+        JobStatusChange.set_status(queryset, 'approved')
     mark_as_approved.short_description = "Mark as approved"
 
     def create_templates(self, request, queryset):
@@ -136,10 +136,10 @@ class JobOperationAdmin(admin.ModelAdmin):
         'quantity_after', 'total_cost', 'total_time_minutes'
     ]
     list_filter = ['operation']
-    search_fields = ['job__job_number', 'job__client__company_name', 'operation_name']
+    search_fields = ['job__job_number', 'job__client__company_name', 'operation__name']
     ordering = ['job', 'sequence_order']
 
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'operation_name']
 
 
 @admin.register(JobVariant)
@@ -152,4 +152,18 @@ class JobVariantAdmin(admin.ModelAdmin):
     search_fields = ['job__job_number', 'job__client__company_name']
     ordering = ['job', 'quantity']
 
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at', 'cost_per_piece']
+
+@admin.register(ArchivedJob)
+class ArchivedJobAdmin(admin.ModelAdmin):
+    """Admin for the archive index (entries are written by archive_jobs)."""
+    list_display = ['job_number', 'client', 'order_name', 'status', 'total_cost', 'created_at', 'archived_at']
+    list_filter = ['status', 'order_type']
+    search_fields = ['job_number', 'client__company_name', 'order_name']
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
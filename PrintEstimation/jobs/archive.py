@@ -0,0 +1,251 @@
+"""
+Cold archive of finished and rejected jobs.
+
+`manage.py archive_jobs` moves jobs that have been finished or rejected for
+a while out of the job tables. Each job is written with its operations,
+variants, PDF exports and status history as one JSON line, gzip-compressed
+as its own member and appended to the archive file of the month the job was
+created (JOB_ARCHIVE_ROOT/jobs-YYYY-MM.jsonl.gz). Files are only ever
+appended to; `zcat` on one gives plain JSONL.
+
+An ArchivedJob row per job indexes it by job number, client and owner and
+records the member's offset and length, so the UI reads a job back with one
+seek. Records also keep the display names of everything they point to, as
+paper types or operations may be deleted once no live job uses them.
+
+The archive becomes the only copy of a job, so JOB_ARCHIVE_ROOT must be on
+persistent storage: outside DEBUG nothing is archived until it is set. Every
+member is synced and read back before the job rows are deleted.
+"""
+
+import calendar
+import gzip
+import json
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from PrintEstimation.core.locks import named_lock
+from .models import ArchivedJob, Job
+
+ARCHIVE_STATUSES = ('finished', 'rejected')
+
+# Related records stored with each job, by Job reverse accessor
+ARCHIVED_RELATIONS = ('job_operations', 'variants', 'pdf_exports', 'status_changes')
+
+
+class ArchiveWriteError(Exception):
+    """Raised when an appended archive member does not read back intact."""
+
+
+def archive_root():
+    """
+    Directory holding the archive files.
+
+    Raises ImproperlyConfigured when JOB_ARCHIVE_ROOT is not set, unless in
+    DEBUG, where a directory inside the project is used.
+    """
+    root = getattr(settings, 'JOB_ARCHIVE_ROOT', '')
+    if root:
+        return root
+    if settings.DEBUG:
+        return os.path.join(settings.BASE_DIR, 'archive')
+    raise ImproperlyConfigured('Set JOB_ARCHIVE_ROOT to a directory on persistent storage to archive jobs.')
+
+
+def archive_file_name(created_at):
+    """Name of the archive file holding jobs created at created_at."""
+    return f'jobs-{timezone.localtime(created_at):%Y-%m}.jsonl.gz'
+
+
+def months_ago(moment, months):
+    """The same day and time the given number of months earlier (clamped to the month's end)."""
+    month_index = moment.year * 12 + moment.month - 1 - months
+    year, month = divmod(month_index, 12)
+    day = min(moment.day, calendar.monthrange(year, month + 1)[1])
+    return moment.replace(year=year, month=month + 1, day=day)
+
+
+def archivable_jobs(before):
+    """Finished and rejected jobs last changed before the given datetime."""
+    return Job.objects.filter(is_template=False, status__in=ARCHIVE_STATUSES, updated_at__lt=before)
+
+
+def _label(obj):
+    return str(obj) if obj is not None else ''
+
+
+def _records(objects, labels):
+    return [
+        dict(record, labels=labels(obj))
+        for obj, record in zip(objects, serializers.serialize('python', objects))
+    ]
+
+
+def build_archive_document(job):
+    """Return the archive record of job; related rows must be prefetched."""
+    return {
+        'job': _records([job], lambda job: {
+            'client': _label(job.client),
+            'created_by': job.created_by.get_display_name() if job.created_by else '',
+            'paper_type': _label(job.paper_type),
+            'end_size': job.effective_end_size_name,
+            'printing_size': _label(job.printing_size),
+            'selling_size': _label(job.selling_size),
+        })[0],
+        'job_operations': _records(
+            list(job.job_operations.all()), lambda step: {'operation': step.operation_name}
+        ),
+        'variants': _records(list(job.variants.all()), lambda variant: {}),
+        'pdf_exports': _records(list(job.pdf_exports.all()), lambda export: {
+            'created_by': export.created_by.get_display_name() if export.created_by else '',
+        }),
+        'status_changes': _records(list(job.status_changes.all()), lambda change: {}),
+    }
+
+
+def append_documents(file_name, documents):
+    """
+    Append documents to an archive file as one gzip member each.
+
+    Returns the (offset, length) of every member. The file and its directory
+    are synced and every member is read back before returning, so index rows
+    are only committed, and job rows only deleted, for data that is on disk.
+    """
+    root = archive_root()
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, file_name)
+    lines = [
+        (json.dumps(document, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n').encode()
+        for document in documents
+    ]
+    positions = []
+    with open(path, 'ab') as archive:
+        archive.seek(0, os.SEEK_END)
+        for line in lines:
+            member = gzip.compress(line, mtime=0)
+            positions.append((archive.tell(), len(member)))
+            archive.write(member)
+        archive.flush()
+        os.fsync(archive.fileno())
+    # Makes a newly created file's directory entry durable too
+    directory = os.open(root, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+    with open(path, 'rb') as archive:
+        for line, (offset, length) in zip(lines, positions):
+            archive.seek(offset)
+            try:
+                intact = gzip.decompress(archive.read(length)) == line
+            except (OSError, EOFError):
+                intact = False
+            if not intact:
+                raise ArchiveWriteError(f'{file_name} member at offset {offset} did not read back intact')
+    return positions
+
+
+def archive_jobs(before, batch_size=100, using=DEFAULT_DB_ALIAS):
+    """
+    Move archivable jobs last changed before `before` to the archive.
+
+    Runs in transactions of batch_size jobs under a lock, so only one
+    archiver writes the files at a time. Returns the number of jobs moved.
+    """
+    # Fail before touching any rows when there is nowhere safe to write
+    archive_root()
+    archived = 0
+    with named_lock('jobs:archive', timeout=0):
+        while True:
+            count = _archive_batch(before, batch_size, using)
+            archived += count
+            if count < batch_size:
+                return archived
+
+
+def _archive_batch(before, batch_size, using):
+    with transaction.atomic(using=using):
+        pks = list(
+            archivable_jobs(before).using(using).select_for_update()
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return 0
+        jobs = list(
+            Job.objects.using(using).filter(pk__in=pks).order_by('pk')
+            .select_related('client', 'created_by', 'paper_type', 'end_size', 'printing_size', 'selling_size')
+            .prefetch_related(
+                'job_operations__operation', 'job_operations__catalog_version', 'variants',
+                'pdf_exports__created_by', 'status_changes',
+            )
+        )
+
+        by_file = defaultdict(list)
+        for job in jobs:
+            by_file[archive_file_name(job.created_at)].append(job)
+
+        entries = []
+        for file_name, file_jobs in by_file.items():
+            # Written inside the transaction: if it then rolls back, the
+            # appended members are simply never indexed
+            positions = append_documents(file_name, [build_archive_document(job) for job in file_jobs])
+            for job, (offset, length) in zip(file_jobs, positions):
+                entries.append(ArchivedJob(
+                    job_id=job.pk,
+                    job_number=job.job_number,
+                    client_id=job.client_id,
+                    created_by_id=job.created_by_id,
+                    order_type=job.order_type,
+                    order_name=job.order_name,
+                    status=job.status,
+                    quantity=job.quantity,
+                    total_cost=job.total_cost,
+                    created_at=job.created_at,
+                    archive_file=file_name,
+                    offset=offset,
+                    length=length,
+                ))
+
+        ArchivedJob.objects.using(using).bulk_create(entries)
+        # PDF files stay in storage; their export records are archived
+        # Rollups count archived jobs, so client totals do not change
+        Job.objects.using(using).filter(pk__in=pks).delete()
+    return len(jobs)
+
+
+def read_archive_document(entry):
+    """Return the stored record of an ArchivedJob."""
+    with open(os.path.join(archive_root(), entry.archive_file), 'rb') as archive:
+        archive.seek(entry.offset)
+        member = archive.read(entry.length)
+    return json.loads(gzip.decompress(member))
+
+
+def load_archived_job(entry):
+    """
+    Return an archived job as unsaved, read-only model instances.
+
+    Each instance carries the display names it was archived with in
+    `labels`. The result has the job and its related lists by accessor name.
+    """
+    document = read_archive_document(entry)
+
+    def instances(records):
+        objects = []
+        for record, deserialized in zip(records, serializers.deserialize('python', records, ignorenonexistent=True)):
+            obj = deserialized.object
+            obj.labels = record['labels']
+            objects.append(obj)
+        return objects
+
+    archived = {name: instances(document[name]) for name in ARCHIVED_RELATIONS}
+    archived['job'] = instances([document['job']])[0]
+    return archived
@@ -0,0 +1,96 @@
+"""
+Workflow dashboard data.
+
+For each workflow status the home page shows how many jobs are in it and the
+newest few. That is one conditional-aggregation query for the counts and one
+ROW_NUMBER() window query for the lists, whatever the number of jobs. The
+result is cached per user (and once for all staff) and dropped whenever one
+of the jobs it covers changes status. It is always built from the primary:
+a lagging replica read right after the invalidation would put stale counts
+back into the shared cache for everyone.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Max, Q, Subquery
+from django.db.models.functions import RowNumber
+from django.db.models.expressions import Window
+
+DASHBOARD_STATUSES = ('urgent', 'approved', 'waiting_manager', 'waiting_client')
+DASHBOARD_LIST_SIZE = 5
+
+STAFF_CACHE_KEY = 'dashboard:staff'
+
+
+def _user_cache_key(user_id):
+    return f'dashboard:user:{user_id}'
+
+
+def status_counts(queryset, statuses, **extra):
+    """Count the jobs of queryset in each status with a single query."""
+    return queryset.aggregate(
+        **{status: Count('pk', filter=Q(status=status)) for status in statuses},
+        **extra
+    )
+
+
+def latest_per_status(queryset, statuses, size=DASHBOARD_LIST_SIZE):
+    """Return {status: newest size jobs} with a single windowed query."""
+    ranked = queryset.filter(status__in=statuses).annotate(
+        status_row=Window(
+            RowNumber(), partition_by=[F('status')],
+            order_by=[F('created_at').desc(), F('id').desc()]
+        )
+    ).filter(status_row__lte=size).select_related('client').order_by('status', 'status_row')
+
+    jobs = {status: [] for status in statuses}
+    for job in ranked:
+        jobs[job.status].append(job)
+    return jobs
+
+
+def dashboard_jobs(user):
+    """Jobs shown on user's dashboard: every job for staff, else their own."""
+    from .models import Job
+
+    queryset = Job.objects.filter(is_template=False)
+    if not user.is_staff_user():
+        queryset = queryset.filter(created_by=user)
+    return queryset
+
+
+def get_dashboard(user):
+    """Return the home page context for user, from the cache when possible."""
+    cache_key = STAFF_CACHE_KEY if user.is_staff_user() else _user_cache_key(user.pk)
+    dashboard = cache.get(cache_key)
+    if dashboard is not None:
+        return dashboard
+
+    from .models import JobStatusChange
+
+    # Even inside use_replica(), as the result is cached for other requests
+    queryset = dashboard_jobs(user).using(DEFAULT_DB_ALIAS)
+    # The feed cursor rides along in the counts query; taking it with the
+    # snapshot means the live feed replays anything that happens after it
+    counts = status_counts(
+        queryset, DASHBOARD_STATUSES,
+        status_feed_cursor=Max(Subquery(JobStatusChange.objects.order_by('-pk').values('pk')[:1]))
+    )
+    lists = latest_per_status(queryset, DASHBOARD_STATUSES)
+
+    dashboard = {'status_feed_cursor': counts['status_feed_cursor'] or 0}
+    for status in DASHBOARD_STATUSES:
+        dashboard[f'{status}_count'] = counts[status]
+        dashboard[f'{status}_jobs'] = lists[status]
+
+    cache.set(cache_key, dashboard, timeout=getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+    return dashboard
+
+
+def invalidate_dashboards(owner_ids):
+    """Drop the cached dashboards that show jobs created by owner_ids."""
+    keys = [STAFF_CACHE_KEY, *(_user_cache_key(owner_id) for owner_id in set(owner_ids))]
+    cache.delete_many(keys)
+    # A dashboard built before the change commits may have been cached since
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,134 @@
+"""
+Faceted job filtering.
+
+JobFilters reads the job list filters from the query string: any number of
+values per facet (status, order type, client, paper type) plus date, quantity
+and total cost ranges.
+
+facet_counts() counts the jobs per value of every facet among the jobs that
+match all the *other* filters, so ticking one status still shows how many
+jobs the other statuses would add. All facets come back from one UNION ALL of
+grouped queries, each served by one of the composite (is_template, <facet>,
+status) indexes on Job.
+"""
+
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import CharField, Count, F, Q, Value
+from django.db.models.functions import Cast
+
+# Facet name -> (title, grouped column, label column or None for choices)
+FACETS = {
+    'status': ('Status', 'status', None),
+    'order_type': ('Order Type', 'order_type', None),
+    'client': ('Client', 'client_id', 'client__company_name'),
+    'paper_type': ('Paper', 'paper_type_id', 'paper_type__name'),
+}
+
+# Range name -> (lookup, parser); read from <name>_min and <name>_max
+RANGES = {
+    'created': ('created_at__date', datetime.date.fromisoformat),
+    'quantity': ('quantity', int),
+    'cost': ('total_cost', Decimal),
+}
+
+# Most frequent values listed per facet; selected values are always listed
+FACET_OPTIONS_LIMIT = 10
+
+
+class JobFilters:
+    """The facet and range filters of one job list request."""
+
+    def __init__(self, data):
+        self.selected = {
+            # Foreign key facets take ids only
+            name: [value for value in data.getlist(name) if value and (value.isdigit() or not column.endswith('_id'))]
+            for name, (title, column, label) in FACETS.items()
+        }
+        self.ranges = {}
+        for name, (lookup, parse) in RANGES.items():
+            for bound, suffix in (('gte', 'min'), ('lte', 'max')):
+                value = data.get(f'{name}_{suffix}')
+                if not value:
+                    continue
+                try:
+                    self.ranges[f'{lookup}__{bound}'] = parse(value)
+                except (ValueError, InvalidOperation):
+                    # Ignore malformed bounds like the other list filters do
+                    pass
+
+    @property
+    def is_active(self):
+        return bool(self.ranges) or any(self.selected.values())
+
+    def filter(self, queryset, exclude=None):
+        """Apply every filter except the facet named exclude."""
+        condition = Q(**self.ranges)
+        for name, values in self.selected.items():
+            if values and name != exclude:
+                condition &= Q(**{f'{FACETS[name][1]}__in': values})
+        return queryset.filter(condition)
+
+    def facet_counts(self, queryset, choices=None):
+        """
+        Return the facets of queryset for the filter sidebar.
+
+        choices maps facet names to (value, label) pairs for facets without a
+        label column. Each facet is a dict with its name, title and options
+        (value, label, count, selected), most frequent first.
+        """
+        choices = choices or {}
+        branches = []
+        for name, (title, column, label) in FACETS.items():
+            branches.append(
+                self.filter(queryset, exclude=name).order_by().values(
+                    facet=Value(name, output_field=CharField()),
+                    value=Cast(column, output_field=CharField()),
+                    label=F(label) if label else Value('', output_field=CharField()),
+                ).annotate(count=Count('pk'))
+            )
+        rows = branches[0].union(*branches[1:], all=True)
+
+        options = {name: [] for name in FACETS}
+        for row in rows:
+            if row['value'] is not None:
+                options[row['facet']].append(row)
+
+        facets = []
+        for name, (title, column, label) in FACETS.items():
+            labels = dict(choices.get(name, ()))
+            selected = set(self.selected[name])
+            missing = selected - {row['value'] for row in options[name]}
+            if missing and label:
+                # List selections that match nothing so they can be unticked
+                related_model = queryset.model._meta.get_field(column).related_model
+                labels.update(
+                    (str(pk), str(obj)) for pk, obj in
+                    related_model.objects.in_bulk(list(missing)).items()
+                )
+            rows = sorted(
+                options[name] + [
+                    {'value': value, 'label': labels.get(value, value), 'count': 0} for value in missing
+                ],
+                key=lambda row: (-row['count'], row['label'] or row['value'])
+            )
+            listed = [
+                row for position, row in enumerate(rows)
+                if position < FACET_OPTIONS_LIMIT or row['value'] in selected
+            ]
+            facets.append({
+                'name': name,
+                'title': title,
+                'options': [
+                    {
+                        'value': row['value'],
+                        'label': row['label'] or labels.get(row['value'], row['value']),
+                        'count': row['count'],
+                        'selected': row['value'] in selected,
+                    }
+                    for row in listed
+                ],
+                'more': len(rows) - len(listed),
+            })
+        return facets
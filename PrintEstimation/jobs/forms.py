@@ -4,9 +4,11 @@ Forms for job creation and management.
 
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import Job, JobOperation, JobVariant
+from django.db import models
+from .models import Job, JobOperation, JobVariant, SEQUENCE_GAP
 from PrintEstimation.accounts.models import Client
 from PrintEstimation.operations.models import Operation, PaperType, PaperSize
+from PrintEstimation.core.autocomplete import AutocompleteSelect
 
 
 class JobForm(forms.ModelForm):
@@ -22,16 +24,16 @@ class JobForm(forms.ModelForm):
             'n_up_signatures', 'notes', 'is_template', 'template_name'
         ]
         widgets = {
-            'client': forms.Select(attrs={'class': 'form-select'}),
+            'client': AutocompleteSelect('accounts:client_autocomplete', attrs={'class': 'form-select'}),
             'order_type': forms.Select(attrs={'class': 'form-select'}),
             'order_name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter order name'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
-            'paper_type': forms.Select(attrs={'class': 'form-select'}),
-            'end_size': forms.Select(attrs={'class': 'form-select'}),
+            'paper_type': AutocompleteSelect('operations:paper_type_autocomplete', attrs={'class': 'form-select'}),
+            'end_size': AutocompleteSelect('operations:paper_size_autocomplete', attrs={'class': 'form-select'}),
             'custom_end_width': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': 'Width (cm)'}),
             'custom_end_height': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': 'Height (cm)'}),
-            'printing_size': forms.Select(attrs={'class': 'form-select'}),
-            'selling_size': forms.Select(attrs={'class': 'form-select'}),
+            'printing_size': AutocompleteSelect('operations:paper_size_autocomplete', attrs={'class': 'form-select'}),
+            'selling_size': AutocompleteSelect('operations:paper_size_autocomplete', attrs={'class': 'form-select'}),
             'parts_of_selling_size': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
             'deadline': forms.DateTimeInput(attrs={'class': 'form-control', 'type': 'datetime-local'}),
             'n_up': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
@@ -150,10 +152,10 @@ class JobOperationForm(forms.ModelForm):
         # Filter active operations
         self.fields['operation'].queryset = Operation.objects.filter(is_active=True)
 
-        # Set default sequence order
+        # Set default sequence order (after the last step)
         if job:
-            next_order = job.job_operations.count() + 1
-            self.initial['sequence_order'] = next_order
+            last_order = job.job_operations.aggregate(last=models.Max('sequence_order'))['last']
+            self.initial['sequence_order'] = (last_order or 0) + SEQUENCE_GAP
 
 
 class JobStatusChangeForm(forms.ModelForm):
@@ -245,12 +247,12 @@ class ReorderOperationsForm(forms.Form):
         
         if job:
             operations = job.job_operations.all().order_by('sequence_order')
-            for op in operations:
+            for position, op in enumerate(operations, 1):
                 field_name = f'operation_{op.id}_order'
                 self.fields[field_name] = forms.IntegerField(
                     min_value=1,
                     max_value=operations.count(),
-                    initial=op.sequence_order,
+                    initial=position,
                     widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm'}),
                     label=f'{op.operation_name} - Order'
                 )
@@ -0,0 +1,37 @@
+"""
+Management command to move old finished and rejected jobs to the archive.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from PrintEstimation.core.locks import LockTimeout
+from PrintEstimation.jobs.archive import ArchiveWriteError, archivable_jobs, archive_jobs, months_ago
+
+
+class Command(BaseCommand):
+    help = 'Archive finished and rejected jobs not changed for the given number of months'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=12, help='Archive jobs last changed this many months ago')
+        parser.add_argument('--batch-size', type=int, default=100, help='Jobs archived per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the jobs that would be archived')
+
+    def handle(self, *args, **options):
+        if options['months'] < 1:
+            raise CommandError('--months must be at least 1')
+        before = months_ago(timezone.now(), options['months'])
+
+        if options['dry_run']:
+            count = archivable_jobs(before).count()
+            self.stdout.write(f'{count} jobs would be archived')
+            return
+
+        try:
+            count = archive_jobs(before, batch_size=options['batch_size'])
+        except LockTimeout:
+            raise CommandError('Another archive run is in progress')
+        except (ImproperlyConfigured, ArchiveWriteError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Archived {count} jobs'))
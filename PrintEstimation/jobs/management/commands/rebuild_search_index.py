@@ -0,0 +1,19 @@
+"""
+Management command to rebuild the job search index.
+"""
+
+from django.core.management.base import BaseCommand
+
+from PrintEstimation.jobs.models import Job
+from PrintEstimation.jobs.search import refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search document of every job (e.g. after bulk imports)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Jobs updated per query')
+
+    def handle(self, *args, **options):
+        count = refresh_search_documents(Job.objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reindexed {count} jobs'))
@@ -0,0 +1,143 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:43
+
+import hashlib
+import json
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of the catalog snapshot format as of this migration; later
+# changes to operations.models must not change what it writes
+OPERATION_SNAPSHOT_FIELDS = (
+    'name', 'category_id', 'makeready_price', 'price_per_sheet', 'plate_price',
+    'base_waste_sheets', 'waste_percentage', 'makeready_time_minutes',
+    'cleaning_time_minutes', 'sheets_per_minute', 'divides_quantity_by',
+    'multiplies_quantity_by', 'uses_colors', 'uses_front_colors_only',
+)
+PAPER_TYPE_SNAPSHOT_FIELDS = ('name', 'weight_gsm', 'price_per_kg')
+
+
+def _snapshot_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def build_catalog_payload(operations, paper_types):
+    return {
+        'operations': {
+            str(op['id']): {field: _snapshot_value(op[field]) for field in OPERATION_SNAPSHOT_FIELDS}
+            for op in operations
+        },
+        'paper_types': {
+            str(paper['id']): {field: _snapshot_value(paper[field]) for field in PAPER_TYPE_SNAPSHOT_FIELDS}
+            for paper in paper_types
+        },
+    }
+
+
+def catalog_content_hash(payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+# Settings that were copied onto each JobOperation before catalog versions
+COPIED_FIELDS = {
+    'name': 'operation_name',
+    'makeready_price': 'makeready_price',
+    'price_per_sheet': 'price_per_sheet',
+    'plate_price': 'plate_price',
+    'makeready_time_minutes': 'makeready_time_minutes',
+    'cleaning_time_minutes': 'cleaning_time_minutes',
+    'sheets_per_minute': 'sheets_per_minute',
+}
+
+
+def snapshot_existing_jobs(apps, schema_editor):
+    """
+    Move the per-row operation copies into catalog versions.
+
+    Each job gets a version built from the live catalog with its own copied
+    values overlaid, so existing quotes keep the prices they were made with.
+    Jobs quoted against identical prices share one deduplicated version.
+    """
+    Operation = apps.get_model('operations', 'Operation')
+    PaperType = apps.get_model('operations', 'PaperType')
+    PriceCatalogVersion = apps.get_model('operations', 'PriceCatalogVersion')
+    Job = apps.get_model('jobs', 'Job')
+    JobOperation = apps.get_model('jobs', 'JobOperation')
+
+    live_operations = {
+        op['id']: op for op in Operation.objects.values('id', *OPERATION_SNAPSHOT_FIELDS)
+    }
+    paper_types = list(PaperType.objects.values('id', *PAPER_TYPE_SNAPSHOT_FIELDS))
+
+    job_ids = JobOperation.objects.values_list('job_id', flat=True).distinct()
+    for job_id in job_ids:
+        operations = dict(live_operations)
+        # Steps whose operation no longer exists keep no catalog version
+        job_operations = JobOperation.objects.filter(job_id=job_id, operation_id__in=live_operations)
+        for job_operation in job_operations:
+            operation = dict(operations[job_operation.operation_id])
+            for snapshot_field, copied_field in COPIED_FIELDS.items():
+                operation[snapshot_field] = getattr(job_operation, copied_field)
+            operations[job_operation.operation_id] = operation
+
+        payload = build_catalog_payload(operations.values(), paper_types)
+        content_hash = catalog_content_hash(payload)
+        version, _ = PriceCatalogVersion.objects.get_or_create(
+            content_hash=content_hash, defaults={'data': payload}
+        )
+        job_operations.update(catalog_version=version)
+        Job.objects.filter(pk=job_id).update(catalog_version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_jobvariant_operations_cost_jobvariant_paper_cost'),
+        ('operations', '0003_price_catalog_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='catalog_version',
+            field=models.ForeignKey(blank=True, help_text='Price catalog version used for the last calculation', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='jobs', to='operations.pricecatalogversion'),
+        ),
+        migrations.AddField(
+            model_name='joboperation',
+            name='catalog_version',
+            field=models.ForeignKey(blank=True, help_text='Price catalog version this operation was priced with', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='job_operations', to='operations.pricecatalogversion'),
+        ),
+        migrations.RunPython(snapshot_existing_jobs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='joboperation',
+            name='cleaning_time_minutes',
+        ),
+        migrations.RemoveField(
+            model_name='joboperation',
+            name='makeready_price',
+        ),
+        migrations.RemoveField(
+            model_name='joboperation',
+            name='makeready_time_minutes',
+        ),
+        migrations.RemoveField(
+            model_name='joboperation',
+            name='operation_name',
+        ),
+        migrations.RemoveField(
+            model_name='joboperation',
+            name='plate_price',
+        ),
+        migrations.RemoveField(
+            model_name='joboperation',
+            name='price_per_sheet',
+        ),
+        migrations.RemoveField(
+            model_name='joboperation',
+            name='sheets_per_minute',
+        ),
+    ]
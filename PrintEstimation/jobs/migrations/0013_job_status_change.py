@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_price_catalog_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, help_text='Empty for newly created jobs', max_length=20)),
+                ('to_status', models.CharField(choices=[('draft', 'Draft'), ('calculated', 'Calculated'), ('waiting_manager', 'Waiting Manager Approval / Review'), ('waiting_client', 'Waiting for Client Approval'), ('approved', 'Approved Orders'), ('urgent', 'Urgent Orders'), ('finished', 'Finished Order'), ('rejected', 'Rejected')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='jobs.job')),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_job_status_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='calculation_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the inputs of the last calculation', max_length=64),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+# Keep in sync with jobs.models.SEQUENCE_GAP
+SEQUENCE_GAP = 1024
+
+
+def spread_sequence_keys(apps, schema_editor):
+    """Renumber every job's operations 1, 2, 3... to GAP, 2*GAP, 3*GAP..."""
+    JobOperation = apps.get_model('jobs', 'JobOperation')
+    job_ids = JobOperation.objects.order_by().values_list('job_id', flat=True).distinct()
+    for job_id in job_ids:
+        job_operations = JobOperation.objects.filter(job_id=job_id)
+        ordered_ids = list(job_operations.order_by('sequence_order').values_list('id', flat=True))
+        # Move everything above both the old and the final keys first so no
+        # step collides with another while renumbering
+        highest = job_operations.aggregate(highest=models.Max('sequence_order'))['highest']
+        offset = highest + (len(ordered_ids) + 1) * SEQUENCE_GAP
+        job_operations.update(sequence_order=models.F('sequence_order') + offset)
+        JobOperation.objects.bulk_update(
+            [
+                JobOperation(pk=operation_id, sequence_order=position * SEQUENCE_GAP)
+                for position, operation_id in enumerate(ordered_ids, 1)
+            ],
+            ['sequence_order'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_job_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_sequence_keys, migrations.RunPython.noop),
+    ]
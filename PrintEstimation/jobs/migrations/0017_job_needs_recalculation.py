@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_sparse_sequence_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='needs_recalculation',
+            field=models.BooleanField(default=False, editable=False, help_text='Inputs changed since the last calculation; a recalculation is queued'),
+        ),
+    ]
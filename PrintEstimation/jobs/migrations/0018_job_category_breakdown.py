@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:13
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def fill_category_breakdown(apps, schema_editor):
+    """Store the breakdown of jobs calculated before it was saved."""
+    Job = apps.get_model('jobs', 'Job')
+    JobOperation = apps.get_model('jobs', 'JobOperation')
+    job_operations = JobOperation.objects.filter(
+        job__calculated_at__isnull=False
+    ).select_related('operation__category').order_by('job_id')
+
+    breakdowns = {}
+    for job_operation in job_operations.iterator():
+        category = job_operation.operation.category
+        row = breakdowns.setdefault(job_operation.job_id, {}).setdefault(category.pk, {
+            'category': category.name,
+            'sort_order': category.sort_order,
+            'time_minutes': 0,
+            'cost': Decimal('0'),
+        })
+        row['time_minutes'] += job_operation.total_time_minutes or 0
+        row['cost'] += job_operation.total_cost or Decimal('0')
+
+    jobs = []
+    for job_id, categories in breakdowns.items():
+        rows = sorted(categories.values(), key=lambda row: (row['sort_order'], row['category']))
+        jobs.append(Job(pk=job_id, category_breakdown=[
+            {
+                'category': row['category'],
+                'time_minutes': row['time_minutes'],
+                'cost': str(row['cost'].quantize(Decimal('0.01'))),
+            }
+            for row in rows
+        ]))
+    Job.objects.bulk_update(jobs, ['category_breakdown'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_job_needs_recalculation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='category_breakdown',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Time and cost per operation category from the last calculation'),
+        ),
+        migrations.RunPython(fill_category_breakdown, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('jobs', '0018_job_category_breakdown'),
+        ('operations', '0003_price_catalog_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_template', 'created_at', 'id'], name='jobs_job_is_temp_bfc4d7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['created_by', 'is_template', 'created_at', 'id'], name='jobs_job_created_18c8db_idx'),
+        ),
+    ]
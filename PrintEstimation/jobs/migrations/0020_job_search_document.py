@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:19
+
+import PrintEstimation.jobs.search
+from django.db import migrations
+
+
+def fill_search_documents(apps, schema_editor):
+    """Build the search document of every existing job."""
+    Job = apps.get_model('jobs', 'Job')
+    batch = []
+    for job in Job.objects.select_related('client').order_by('pk').iterator(chunk_size=500):
+        job.search_document = PrintEstimation.jobs.search.build_search_document(job)
+        batch.append(job)
+        if len(batch) >= 500:
+            Job.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    Job.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        # search.search_jobs() must use exactly these expressions to hit the indexes
+        schema_editor.execute(
+            "CREATE INDEX jobs_job_search_tsv_idx ON jobs_job "
+            "USING gin (to_tsvector('simple', search_document))"
+        )
+        schema_editor.execute(
+            'CREATE INDEX jobs_job_search_trgm_idx ON jobs_job '
+            'USING gin (search_document gin_trgm_ops)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE jobs_job_fts USING fts5('
+            "search_document, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            'INSERT INTO jobs_job_fts (rowid, search_document) SELECT id, search_document FROM jobs_job'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS jobs_job_search_tsv_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS jobs_job_search_trgm_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS jobs_job_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_job_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='search_document',
+            field=PrintEstimation.jobs.search.SearchDocumentField(blank=True, default='', editable=False, help_text='Text the job is found by in search, rebuilt on save'),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
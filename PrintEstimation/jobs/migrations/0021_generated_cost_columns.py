@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:34
+
+import PrintEstimation.jobs.models
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_client_rollup'),
+        ('jobs', '0020_job_search_document'),
+        ('operations', '0004_paper_name_prefix_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='operations_cost',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Coalesce('total_material_cost', models.Value(Decimal('0'))), '-', django.db.models.functions.comparison.Coalesce('paper_cost', models.Value(Decimal('0')))), help_text='Operations cost (total material cost - paper cost)', output_field=models.DecimalField(decimal_places=2, max_digits=12)),
+        ),
+        migrations.AddField(
+            model_name='jobvariant',
+            name='cost_per_piece',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(quantity__gt=0, then=PrintEstimation.jobs.models.DecimalDivide('total_cost', 'quantity')), default=models.Value(Decimal('0'))), help_text='Total cost / quantity', output_field=models.DecimalField(decimal_places=6, max_digits=14)),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['operations_cost'], name='jobs_job_operati_482280_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobvariant',
+            index=models.Index(fields=['cost_per_piece'], name='jobs_jobvar_cost_pe_516efd_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_client_rollup'),
+        ('jobs', '0021_generated_cost_columns'),
+        ('operations', '0004_paper_name_prefix_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_template', 'status', 'order_type'], name='jobs_job_is_temp_1ab568_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_template', 'client', 'status'], name='jobs_job_is_temp_fe934c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_template', 'paper_type', 'status'], name='jobs_job_is_temp_a84176_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['created_by', 'is_template', 'status'], name='jobs_job_created_99838b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_template', 'quantity'], name='jobs_job_is_temp_9885a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_template', 'total_cost'], name='jobs_job_is_temp_353256_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from PrintEstimation.core.autocomplete import CreatePrefixIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_client_rollup'),
+        ('jobs', '0022_job_facet_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.PositiveIntegerField(help_text='Primary key the job had', unique=True)),
+                ('job_number', models.CharField(max_length=20, unique=True)),
+                ('order_type', models.CharField(choices=[('book', 'Book'), ('box', 'Box'), ('poster', 'Poster'), ('flyer', 'Flyer'), ('label', 'Label'), ('business_card', 'Business Card'), ('brochure', 'Brochure'), ('catalog', 'Catalog'), ('other', 'Other')], max_length=20)),
+                ('order_name', models.CharField(max_length=200)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('calculated', 'Calculated'), ('waiting_manager', 'Waiting Manager Approval / Review'), ('waiting_client', 'Waiting for Client Approval'), ('approved', 'Approved Orders'), ('urgent', 'Urgent Orders'), ('finished', 'Finished Order'), ('rejected', 'Rejected')], max_length=20)),
+                ('quantity', models.PositiveIntegerField()),
+                ('total_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('created_at', models.DateTimeField(help_text='When the job was created')),
+                ('archive_file', models.CharField(help_text='File name under JOB_ARCHIVE_ROOT', max_length=100)),
+                ('offset', models.PositiveBigIntegerField()),
+                ('length', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_jobs', to='accounts.client')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['client', 'created_at', 'id'], name='jobs_archiv_client__136aae_idx'), models.Index(fields=['created_by', 'created_at', 'id'], name='jobs_archiv_created_9a6a81_idx'), models.Index(fields=['created_at', 'id'], name='jobs_archiv_created_7d19e2_idx')],
+            },
+        ),
+        # Lookups by job number prefix from the archive page
+        CreatePrefixIndex('archivedjob', 'job_number', 'jobs_archivedjob_number_prefix_idx'),
+    ]
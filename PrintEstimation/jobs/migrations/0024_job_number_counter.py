@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:46
+
+import re
+
+from django.db import migrations, models
+
+JOB_NUMBER_RE = re.compile(r'^JOB-(\d{4})-(\d+)$')
+
+
+def seed_counters(apps, schema_editor):
+    """Start each year's counter at the highest number already used."""
+    Job = apps.get_model('jobs', 'Job')
+    ArchivedJob = apps.get_model('jobs', 'ArchivedJob')
+    JobNumberCounter = apps.get_model('jobs', 'JobNumberCounter')
+    db_alias = schema_editor.connection.alias
+
+    last_numbers = {}
+    for model in (Job, ArchivedJob):
+        job_numbers = model.objects.using(db_alias).filter(job_number__startswith='JOB-')
+        for job_number in job_numbers.values_list('job_number', flat=True).iterator():
+            match = JOB_NUMBER_RE.match(job_number)
+            if match:
+                year, number = int(match.group(1)), int(match.group(2))
+                last_numbers[year] = max(last_numbers.get(year, 0), number)
+
+    JobNumberCounter.objects.using(db_alias).bulk_create([
+        JobNumberCounter(year=year, last_number=number) for year, number in last_numbers.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0023_archived_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobNumberCounter',
+            fields=[
+                ('year', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
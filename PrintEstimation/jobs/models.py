@@ -4,15 +4,61 @@ Models for jobs, estimates, and calculations.
 
 from datetime import timedelta
 from decimal import Decimal
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, connections, models, router, transaction
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from PrintEstimation.operations.models import Operation, PaperType, PaperSize
+from PrintEstimation.accounts.models import ClientRollup
+from PrintEstimation.operations.models import Operation, PaperType, PaperSize, PriceCatalogVersion
+from .dashboard import invalidate_dashboards
+from .search import SEARCH_FIELDS, SearchDocumentField, index_jobs
 
 User = get_user_model()
 
 
+class DecimalDivide(models.Func):
+    """
+    Divide two columns as decimals.
+
+    SQLite stores whole decimals as integers, so a plain division there
+    would truncate; the numerator is cast to REAL first.
+    """
+    arity = 2
+    arg_joiner = ' / '
+    template = '(%(expressions)s)'
+    output_field = models.DecimalField(max_digits=14, decimal_places=6)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        numerator, denominator = (compiler.compile(expression) for expression in self.get_source_expressions())
+        return f'(CAST({numerator[0]} AS REAL) / {denominator[0]})', numerator[1] + denominator[1]
+
+
+def expire_generated_fields(instance):
+    """Forget database-generated values after a save; they reload when next read."""
+    for field in instance._meta.concrete_fields:
+        if field.generated:
+            instance.__dict__.pop(field.attname, None)
+
+
+class JobQuerySet(models.QuerySet):
+    """QuerySet helpers for jobs."""
+
+    def with_details(self):
+        """Load everything the job detail page shows in a fixed number of queries."""
+        return self.select_related(
+            'client', 'created_by', 'paper_type', 'end_size', 'printing_size', 'selling_size',
+        ).prefetch_related(
+            models.Prefetch(
+                'job_operations',
+                queryset=JobOperation.objects.select_related('operation__category').order_by('sequence_order'),
+            ),
+            # Catalog snapshots are shared by many steps, so fetch each one once
+            'job_operations__catalog_version',
+            models.Prefetch('variants', queryset=JobVariant.objects.order_by('quantity')),
+        )
+
+
 class Job(models.Model):
     """
     Main model representing both estimates and templates.
@@ -41,6 +87,9 @@ class Job(models.Model):
         ('other', 'Other'),
     ]
 
+    # Fields a job's contribution to its client's rollup is computed from
+    ROLLUP_FIELDS = ('client_id', 'status', 'total_cost', 'created_at', 'is_template')
+
     # Job identification
     job_number = models.CharField(max_length=20, unique=True, blank=True)
     client = models.ForeignKey(
@@ -188,6 +237,16 @@ class Job(models.Model):
         blank=True,
         help_text="Total time in minutes"
     )
+    # Computed by the database so lists can filter and sort on it
+    operations_cost = models.GeneratedField(
+        expression=(
+            Coalesce('total_material_cost', models.Value(Decimal('0')))
+            - Coalesce('paper_cost', models.Value(Decimal('0')))
+        ),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+        help_text="Operations cost (total material cost - paper cost)"
+    )
 
     # Paper calculations
     print_run = models.PositiveIntegerField(
@@ -220,6 +279,22 @@ class Job(models.Model):
         help_text="Total weight of paper in kg"
     )
 
+    # Price catalog the current totals were calculated with
+    catalog_version = models.ForeignKey(
+        PriceCatalogVersion,
+        on_delete=models.PROTECT,
+        related_name='jobs',
+        null=True,
+        blank=True,
+        help_text="Price catalog version used for the last calculation"
+    )
+    category_breakdown = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Time and cost per operation category from the last calculation"
+    )
+
     # Status and metadata
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     is_template = models.BooleanField(
@@ -237,6 +312,27 @@ class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     calculated_at = models.DateTimeField(null=True, blank=True)
+    calculation_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="Hash of the inputs of the last calculation"
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        help_text="Bumped by every change to the job's operations"
+    )
+    needs_recalculation = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Inputs changed since the last calculation; a recalculation is queued"
+    )
+    search_document = SearchDocumentField(
+        help_text="Text the job is found by in search, rebuilt on save"
+    )
+
+    objects = JobQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
@@ -244,6 +340,18 @@ class Job(models.Model):
             models.Index(fields=['status', 'is_template']),
             models.Index(fields=['created_by', 'created_at']),
             models.Index(fields=['order_type']),
+            # Keyset pagination of the job lists: (created_at, id) after a cursor
+            models.Index(fields=['is_template', 'created_at', 'id']),
+            models.Index(fields=['created_by', 'is_template', 'created_at', 'id']),
+            models.Index(fields=['operations_cost']),
+            # Faceted filtering (jobs.facets): each facet column followed by
+            # status, the filter most often combined with it
+            models.Index(fields=['is_template', 'status', 'order_type']),
+            models.Index(fields=['is_template', 'client', 'status']),
+            models.Index(fields=['is_template', 'paper_type', 'status']),
+            models.Index(fields=['created_by', 'is_template', 'status']),
+            models.Index(fields=['is_template', 'quantity']),
+            models.Index(fields=['is_template', 'total_cost']),
         ]
 
     def __str__(self):
@@ -285,92 +393,177 @@ class Job(models.Model):
             return timedelta(minutes=self.total_time_minutes)
         return None
 
-    @property
-    def operations_cost(self):
-        """Calculate operations cost (total_material_cost - paper_cost)."""
-        total_material = self.total_material_cost or Decimal('0')
-        paper_cost = self.paper_cost or Decimal('0')
-        return total_material - paper_cost
-    
     def get_time_by_category(self):
         """Return time breakdown by operation category."""
-        from collections import defaultdict
-        category_times = defaultdict(int)
-        
-        for job_operation in self.job_operations.all():
-            category_name = job_operation.operation.category.name
-            category_times[category_name] += job_operation.total_time_minutes
-        
-        return dict(category_times)
+        return {row['category']: row['time_minutes'] for row in self.category_breakdown}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can record transitions
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._indexed_document = instance.__dict__.get('search_document')
+        instance._rollup_state = instance._get_rollup_state()
+        return instance
+
+    def _get_rollup_state(self):
+        """
+        What this job adds to its client's rollup, as ClientRollup.apply_job_changes() takes it.
+
+        False when a field it needs was deferred, so the contribution is unknown.
+        """
+        if any(field not in self.__dict__ for field in self.ROLLUP_FIELDS):
+            return False
+        if self.is_template:
+            return None
+        return (self.client_id, self.status, self.total_cost, self.created_at)
 
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or 'status' in fields:
+            self._loaded_status = self.status
+        if fields is None or {'client', *self.ROLLUP_FIELDS} & set(fields):
+            self._rollup_state = self._get_rollup_state()
 
     def save(self, *args, **kwargs):
-        # Generate job number if not set
-        if not self.job_number and not self.is_template:
-            max_retries = 3
-            for retry in range(max_retries):
-                try:
-                    self.job_number = self._generate_job_number()
-                    super().save(*args, **kwargs)
-                    break
-                except Exception as e:
-                    if retry == max_retries - 1:
-                        # On final retry, use UUID fallback
-                        import uuid
-                        from django.utils import timezone
-                        year = timezone.now().year
-                        unique_id = str(uuid.uuid4())[:8].upper()
-                        self.job_number = f"JOB-{year}-{unique_id}"
-                        super().save(*args, **kwargs)
-                        break
-                    # Wait a tiny bit before retry
-                    import time
-                    time.sleep(0.01)
-        else:
+        adding = self._state.adding
+        loaded_status = getattr(self, '_loaded_status', None)
+        update_fields = kwargs.get('update_fields')
+        record_status = (
+            not self.is_template
+            and self.status != loaded_status
+            and (update_fields is None or 'status' in update_fields)
+        )
+
+        if update_fields is None and self.pk is not None and not self._state.adding:
+            # version and needs_recalculation are only written explicitly (by
+            # edits and calculations), so saving a stale instance cannot roll
+            # them back
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated
+                and field.name not in ('version', 'needs_recalculation')
+            ]
+        elif update_fields is not None and set(update_fields) & {*SEARCH_FIELDS, 'client_id'}:
+            kwargs['update_fields'] = [*update_fields, 'search_document']
+
+        self._save_job(*args, **kwargs)
+        expire_generated_fields(self)
+
+        if self.search_document != getattr(self, '_indexed_document', None):
+            index_jobs([self], using=self._state.db)
+            self._indexed_document = self.search_document
+
+        if record_status:
+            JobStatusChange.objects.create(
+                job=self,
+                from_status=loaded_status or '',
+                to_status=self.status
+            )
+            invalidate_dashboards([self.created_by_id])
+        self._loaded_status = self.status
+
+        rollup_state = self._get_rollup_state()
+        loaded_rollup_state = None if adding else getattr(self, '_rollup_state', False)
+        written = set(self.ROLLUP_FIELDS) if update_fields is None else {
+            self._meta.get_field(name).attname for name in update_fields
+        } & set(self.ROLLUP_FIELDS)
+        if not written:
+            # Nothing the rollup counts was stored
+            rollup_state = loaded_rollup_state
+        elif False in (rollup_state, loaded_rollup_state) or (
+            written != set(self.ROLLUP_FIELDS) and rollup_state != loaded_rollup_state
+        ):
+            # Saved from a partly loaded instance, or only some of the fields
+            # changed were stored: recount the clients involved
+            client_ids = [self.client_id, (loaded_rollup_state or (None,))[0]]
+            ClientRollup.refresh(client_ids, using=self._state.db)
+            if written != set(self.ROLLUP_FIELDS):
+                rollup_state = False
+        elif rollup_state != loaded_rollup_state:
+            ClientRollup.apply_job_changes([(loaded_rollup_state, rollup_state)], using=self._state.db)
+        self._rollup_state = rollup_state
+
+    def delete(self, *args, **kwargs):
+        if not self.is_template:
+            invalidate_dashboards([self.created_by_id])
+        # The stored values are what the rollup counted
+        rollup_state = getattr(self, '_rollup_state', False)
+        result = super().delete(*args, **kwargs)
+        if rollup_state is False:
+            ClientRollup.refresh([self.client_id], using=self._state.db)
+        elif rollup_state is not None:
+            ClientRollup.apply_job_changes([(rollup_state, None)], using=self._state.db)
+        return result
+
+    def _save_job(self, *args, **kwargs):
+        if self.job_number or self.is_template:
             super().save(*args, **kwargs)
-
-    def _generate_job_number(self):
-        """Generate unique job number."""
+            return
+
+        using = kwargs.get('using') or router.db_for_write(Job, instance=self)
+        try:
+            # The number is allocated and used in one transaction, so a
+            # failed insert gives it back
+            with transaction.atomic(using=using):
+                self.job_number = self._generate_job_number(using)
+                super().save(*args, **kwargs)
+        except Exception:
+            self.job_number = ''
+            raise
+
+    def _generate_job_number(self, using=DEFAULT_DB_ALIAS):
+        """Allocate the next job number of the current year."""
         from django.utils import timezone
-        from django.db import transaction
-        import re
-        
+
         year = timezone.now().year
-        
-        # Get the highest existing job number for this year
-        existing_jobs = Job.objects.filter(
-            job_number__startswith=f"JOB-{year}-",
-            is_template=False
-        ).values_list('job_number', flat=True)
-        
-        if existing_jobs:
-            # Extract numbers from existing job numbers and find the maximum
-            numbers = []
-            for job_num in existing_jobs:
-                match = re.search(r'JOB-\d{4}-(\d{4})', job_num)
-                if match:
-                    numbers.append(int(match.group(1)))
-            
-            if numbers:
-                next_number = max(numbers) + 1
-            else:
-                next_number = 1
-        else:
-            next_number = 1
-        
-        # Try to create unique job number with retry mechanism
-        max_attempts = 100
-        for attempt in range(max_attempts):
-            job_number = f"JOB-{year}-{next_number + attempt:04d}"
-            
-            # Check if this number already exists
-            if not Job.objects.filter(job_number=job_number).exists():
-                return job_number
-        
-        # Fallback: use timestamp if all attempts failed
-        import time
-        timestamp = int(time.time() * 1000) % 10000
-        return f"JOB-{year}-{timestamp:04d}"
+        return f"JOB-{year}-{JobNumberCounter.next_number(year, using=using):04d}"
+
+
+class JobNumberCounter(models.Model):
+    """
+    Last job number handed out in each year.
+
+    next_number() increments it in a single statement. Called inside the
+    transaction that inserts the job, the row stays locked until that
+    commits and rolls back with it, so numbers are consecutive and never
+    handed out twice.
+    """
+    year = models.PositiveIntegerField(primary_key=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+    @classmethod
+    def next_number(cls, year, using=DEFAULT_DB_ALIAS):
+        """Increment and return the counter of year, creating it at 1."""
+        connection = connections[using]
+        if connection.vendor == 'postgresql' or (
+            connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 35)
+        ):
+            table = connection.ops.quote_name(cls._meta.db_table)
+            year_column = connection.ops.quote_name('year')
+            number_column = connection.ops.quote_name('last_number')
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {table} ({year_column}, {number_column}) VALUES (%s, 1) '
+                    f'ON CONFLICT ({year_column}) DO UPDATE SET {number_column} = {table}.{number_column} + 1 '
+                    f'RETURNING {number_column}',
+                    [year]
+                )
+                return cursor.fetchone()[0]
+
+        with transaction.atomic(using=using):
+            counter, _ = cls.objects.using(using).select_for_update().get_or_create(year=year)
+            cls.objects.using(using).filter(pk=year).update(last_number=models.F('last_number') + 1)
+            return counter.last_number + 1
+
+
+# Distance between the sequence keys of neighbouring operations. Inserts and
+# moves take a key halfway between two neighbours; the job is renumbered only
+# when a gap has been split down to nothing.
+SEQUENCE_GAP = 1024
 
 
 class JobOperation(models.Model):
@@ -391,14 +584,15 @@ class JobOperation(models.Model):
         help_text="Order of execution in the job"
     )
 
-    # Snapshot of operation settings at calculation time
-    operation_name = models.CharField(max_length=150)
-    makeready_price = models.DecimalField(max_digits=10, decimal_places=2)
-    price_per_sheet = models.DecimalField(max_digits=10, decimal_places=4)
-    plate_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    makeready_time_minutes = models.PositiveIntegerField()
-    cleaning_time_minutes = models.PositiveIntegerField(default=0)
-    sheets_per_minute = models.PositiveIntegerField(default=1)
+    # Price catalog version holding this step's operation settings
+    catalog_version = models.ForeignKey(
+        PriceCatalogVersion,
+        on_delete=models.PROTECT,
+        related_name='job_operations',
+        null=True,
+        blank=True,
+        help_text="Price catalog version this operation was priced with"
+    )
 
     # Dynamic operation parameters (e.g., cut pieces, fold count)
     operation_parameters = models.JSONField(
@@ -447,6 +641,29 @@ class JobOperation(models.Model):
         """Return total time as timedelta."""
         return timedelta(minutes=self.total_time_minutes)
 
+    @property
+    def operation_snapshot(self):
+        """Operation settings from the catalog version (None if not captured)."""
+        if self.catalog_version_id is None:
+            return None
+        return self.catalog_version.get_operation_data(self.operation_id)
+
+    @property
+    def operation_name(self):
+        """Operation name as priced, falling back to the live operation."""
+        snapshot = self.operation_snapshot
+        if snapshot is not None:
+            return snapshot['name']
+        return self.operation.name
+
+    def get_priced_operation(self):
+        """Return the Operation carrying the prices this step was quoted with."""
+        if self.catalog_version_id is not None:
+            operation = self.catalog_version.build_operation(self.operation_id)
+            if operation is not None:
+                return operation
+        return self.operation
+
 
 class JobPDFExport(models.Model):
     """Track PDF exports of jobs."""
@@ -529,23 +746,137 @@ class JobVariant(models.Model):
         help_text="Operations cost for this quantity" 
     )
 
+    # Computed by the database so quotes can be sorted by it
+    cost_per_piece = models.GeneratedField(
+        expression=models.Case(
+            models.When(quantity__gt=0, then=DecimalDivide('total_cost', 'quantity')),
+            default=models.Value(Decimal('0')),
+        ),
+        output_field=models.DecimalField(max_digits=14, decimal_places=6),
+        db_persist=True,
+        help_text="Total cost / quantity"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['quantity']
         unique_together = ['job', 'quantity']
+        indexes = [
+            models.Index(fields=['cost_per_piece']),
+        ]
 
     def __str__(self):
         return f"{self.job} - {self.quantity} pcs"
 
-    @property
-    def cost_per_piece(self):
-        """Cost per piece for this variant."""
-        if self.quantity > 0:
-            return self.total_cost / self.quantity
-        return Decimal('0')
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        expire_generated_fields(self)
 
     @property
     def total_time(self):
         """Return total time as timedelta."""
-        return timedelta(minutes=self.total_time_minutes)
\ No newline at end of file
+        return timedelta(minutes=self.total_time_minutes)
+
+class JobStatusChange(models.Model):
+    """
+    Append-only log of job status transitions.
+
+    Dashboards follow this table with a "changes since id X" cursor.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='status_changes')
+    from_status = models.CharField(max_length=20, blank=True, help_text="Empty for newly created jobs")
+    to_status = models.CharField(max_length=20, choices=Job.STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['pk']
+
+    def __str__(self):
+        return f"{self.job} {self.from_status or 'new'} -> {self.to_status}"
+
+    @classmethod
+    def latest_id(cls):
+        """Cursor pointing at the newest recorded change."""
+        return cls.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    @classmethod
+    def set_status(cls, queryset, status):
+        """Bulk-update job status and record the transitions."""
+        rows = list(
+            queryset.filter(is_template=False).exclude(status=status)
+            .values_list('pk', 'status', 'created_by_id', 'client_id', 'total_cost', 'created_at')
+        )
+        with transaction.atomic(using=queryset.db):
+            updated = queryset.update(status=status)
+            cls.objects.bulk_create([
+                cls(job_id=pk, from_status=from_status, to_status=status) for pk, from_status, *_ in rows
+            ])
+            ClientRollup.apply_job_changes([
+                ((client_id, from_status, total_cost, created_at), (client_id, status, total_cost, created_at))
+                for _, from_status, _, client_id, total_cost, created_at in rows
+            ], using=queryset.db)
+        if rows:
+            invalidate_dashboards(owner_id for _, _, owner_id, *_ in rows)
+        return updated
+
+    def to_dict(self):
+        """Return the change as sent to dashboards."""
+        job = self.job
+        return {
+            'id': self.pk,
+            'job_id': job.pk,
+            'job_number': job.job_number,
+            'order_name': job.order_name,
+            'client_name': job.client.company_name,
+            'total_cost': str(job.total_cost) if job.total_cost else None,
+            'url': job.get_absolute_url(),
+            'from_status': self.from_status,
+            'to_status': self.to_status,
+            'to_status_display': self.get_to_status_display(),
+            'created_at': self.created_at.isoformat(),
+        }
+
+
+class ArchivedJob(models.Model):
+    """
+    Index entry of a job moved to cold storage by `manage.py archive_jobs`.
+
+    The job, with its operations, variants, PDF exports and status history,
+    is one gzip member of an append-only monthly archive file (see
+    jobs.archive); the entry records where, so reading it back is one seek.
+    """
+    job_id = models.PositiveIntegerField(unique=True, help_text="Primary key the job had")
+    job_number = models.CharField(max_length=20, unique=True)
+    client = models.ForeignKey(
+        'accounts.Client',
+        on_delete=models.PROTECT,
+        related_name='archived_jobs'
+    )
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    order_type = models.CharField(max_length=20, choices=Job.ORDER_TYPES)
+    order_name = models.CharField(max_length=200)
+    status = models.CharField(max_length=20, choices=Job.STATUS_CHOICES)
+    quantity = models.PositiveIntegerField()
+    total_cost = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField(help_text="When the job was created")
+
+    # Location of the job's record
+    archive_file = models.CharField(max_length=100, help_text="File name under JOB_ARCHIVE_ROOT")
+    offset = models.PositiveBigIntegerField()
+    length = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['client', 'created_at', 'id']),
+            models.Index(fields=['created_by', 'created_at', 'id']),
+            models.Index(fields=['created_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.job_number} - {self.order_name} (archived)"
+
+    def get_absolute_url(self):
+        return reverse('jobs:archived_detail', kwargs={'job_number': self.job_number})
@@ -0,0 +1,143 @@
+"""
+Full-text job search.
+
+Every job keeps a plain-text search document (job number, order and template
+name, client company and contact, notes) in Job.search_document, rebuilt
+whenever the job is saved.
+
+On PostgreSQL the document has a GIN index on its `simple` tsvector for
+ranked prefix matching and a pg_trgm GIN index so misspelt words still match.
+SQLite (development) mirrors the documents into an FTS5 table that is kept in
+sync on save. Other databases fall back to a substring match.
+"""
+
+import re
+
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
+
+SEARCH_FTS_TABLE = 'jobs_job_fts'
+
+# Job fields copied into the search document
+SEARCH_FIELDS = ('job_number', 'order_name', 'template_name', 'notes', 'client')
+
+# Client fields copied into the search document of its jobs
+CLIENT_SEARCH_FIELDS = ('company_name', 'contact_person')
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def build_search_document(job):
+    """Return the text job is found by."""
+    client = job.client
+    parts = [
+        job.job_number, job.order_name, job.template_name,
+        client.company_name, client.contact_person, job.notes,
+    ]
+    return ' '.join(part for part in parts if part)
+
+
+class SearchDocumentField(models.TextField):
+    """Text field rebuilt from the job on every save, like auto_now."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('default', '')
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        document = build_search_document(model_instance)
+        setattr(model_instance, self.attname, document)
+        return document
+
+
+def search_tokens(query):
+    """Split a search box query into words."""
+    return _TOKEN_RE.findall(query.lower())[:10]
+
+
+def index_jobs(jobs, using='default'):
+    """Copy the search documents of jobs into the SQLite FTS5 table."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not jobs:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_FTS_TABLE} WHERE rowid = %s', [(job.pk,) for job in jobs]
+        )
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_FTS_TABLE} (rowid, search_document) VALUES (%s, %s)',
+            [(job.pk, job.search_document) for job in jobs]
+        )
+
+
+def refresh_search_documents(queryset, batch_size=500):
+    """Rebuild the search documents of the jobs in queryset; returns the count."""
+    updated = 0
+    batch = []
+    for job in queryset.select_related('client').order_by('pk').iterator(chunk_size=batch_size):
+        job.search_document = build_search_document(job)
+        batch.append(job)
+        if len(batch) >= batch_size:
+            updated += _save_documents(queryset, batch)
+            batch = []
+    return updated + _save_documents(queryset, batch)
+
+
+def _save_documents(queryset, jobs):
+    if not jobs:
+        return 0
+    queryset.model.objects.using(queryset.db).bulk_update(jobs, ['search_document'])
+    index_jobs(jobs, using=queryset.db)
+    return len(jobs)
+
+
+def search_jobs(queryset, query):
+    """
+    Filter queryset to jobs matching query, annotated with search_rank.
+
+    Every word must match as a prefix; on PostgreSQL jobs containing a word
+    similar to the query (typos) match as well. Higher ranks are better.
+    """
+    tokens = search_tokens(query)
+    if not tokens:
+        return queryset.annotate(search_rank=models.Value(0.0, output_field=models.FloatField()))
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        text = ' '.join(tokens)
+        # Same expressions as the indexes created in migration 0020
+        matches = RawSQL(
+            "to_tsvector('simple', search_document) @@ to_tsquery('simple', %s) "
+            "OR %s <%% search_document",
+            (tsquery, text), output_field=models.BooleanField()
+        )
+        rank = RawSQL(
+            "ts_rank(to_tsvector('simple', search_document), to_tsquery('simple', %s)) "
+            "+ word_similarity(%s, search_document)",
+            (tsquery, text), output_field=models.FloatField()
+        )
+    elif vendor == 'sqlite':
+        table = queryset.model._meta.db_table
+        fts_query = ' '.join(f'"{token}"*' for token in tokens)
+        matches = RawSQL(
+            f'"{table}"."id" IN (SELECT rowid FROM {SEARCH_FTS_TABLE} WHERE {SEARCH_FTS_TABLE} MATCH %s)',
+            (fts_query,), output_field=models.BooleanField()
+        )
+        # bm25() is lower for better matches
+        rank = RawSQL(
+            f'(SELECT -bm25({SEARCH_FTS_TABLE}) FROM {SEARCH_FTS_TABLE} '
+            f'WHERE {SEARCH_FTS_TABLE} MATCH %s AND rowid = "{table}"."id")',
+            (fts_query,), output_field=models.FloatField()
+        )
+    else:
+        condition = models.Q()
+        for token in tokens:
+            condition &= models.Q(search_document__icontains=token)
+        return queryset.filter(condition).annotate(
+            search_rank=models.Value(0.0, output_field=models.FloatField())
+        )
+
+    return queryset.annotate(search_rank=rank).filter(matches)
@@ -7,67 +7,143 @@ from decimal import Decimal
 from datetime import timedelta
 from django.utils import timezone
 from django.db import models
-from .models import Job, JobOperation, JobVariant
-from PrintEstimation.operations.models import Operation
+from .models import Job, JobOperation, JobVariant, SEQUENCE_GAP
+from PrintEstimation.core.locks import named_lock
+from PrintEstimation.operations.models import Operation, PriceCatalogVersion, catalog_content_hash
+
+
+# Job fields whose change invalidates the calculated totals
+CALCULATION_INPUT_FIELDS = frozenset([
+    'quantity', 'paper_type', 'printing_size', 'selling_size', 'parts_of_selling_size',
+    'n_up', 'colors_front', 'colors_back', 'number_of_pages', 'n_up_signatures',
+])
 
 
 class PrintingCalculator:
     """
     Main calculation engine for printing jobs.
     Implements formula-based approach with sequential operations.
+
+    Prices come from a PriceCatalogVersion rather than live Operation rows,
+    so a job can be priced against any historical version of the catalog.
     """
 
-    def __init__(self, job):
+    def __init__(self, job, catalog_version=None):
         self.job = job
         self.current_quantity = 0
         self.total_cost = Decimal('0')
         self.total_time = 0  # in minutes
         self.operations_data = []
+        self.catalog_version = catalog_version
+        self.keep_status = False
 
-    def calculate_job(self):
+    def calculate_job(self, keep_status=False):
         """
         Main calculation method that processes all operations sequentially.
         Returns complete calculation breakdown.
+
+        Runs under a per-job lock shared by all worker processes. A request
+        that waited on an identical in-flight calculation returns its stored
+        result instead of recomputing.
+
+        With keep_status (automatic recalculation) only draft jobs become
+        "calculated"; jobs further along the workflow keep their status.
         """
-        # Step 1: Calculate initial paper requirements
-        self._calculate_paper_requirements()
+        self.keep_status = keep_status
+        with named_lock(f'job-calculation:{self.job.pk}'):
+            # Pick up whatever a concurrent calculation saved while we waited
+            self.job.refresh_from_db()
+
+            # Without an explicit version, price against the live catalog
+            if self.catalog_version is None:
+                self.catalog_version = PriceCatalogVersion.current()
+
+            job_operations = self._get_job_operations()
+            fingerprint = self._get_input_fingerprint(job_operations)
+            if (job_operations and self.job.calculation_fingerprint == fingerprint
+                    and (keep_status or self.job.status == 'calculated')):
+                if self.job.needs_recalculation:
+                    self.job.needs_recalculation = False
+                    self.job.save(update_fields=['needs_recalculation'])
+                return self._get_stored_result(job_operations)
+
+            result = self._calculate_job(job_operations)
+            if result['success']:
+                self.job.calculation_fingerprint = fingerprint
+                self.job.needs_recalculation = False
+                self.job.save(update_fields=['calculation_fingerprint', 'needs_recalculation'])
+            return result
+
+    def _get_input_fingerprint(self, job_operations):
+        """Hash everything the calculation result depends on."""
+        job = self.job
+        selling_size = job.selling_size
+        return catalog_content_hash({
+            'catalog_version': self.catalog_version.pk,
+            'job': [
+                job.quantity, job.n_up, job.colors_front, job.colors_back,
+                job.number_of_pages, job.n_up_signatures, job.parts_of_selling_size,
+                job.paper_type_id, str(selling_size.width_cm), str(selling_size.height_cm),
+            ],
+            'operations': [
+                [job_operation.pk, job_operation.operation_id, job_operation.sequence_order,
+                 job_operation.operation_parameters]
+                for job_operation in job_operations
+            ],
+        })
+
+    def _get_stored_result(self, job_operations):
+        """Build a calculate_job() result from the saved calculation."""
+        self.operations_data = [
+            {
+                'job_operation': job_operation,
+                'operation_name': job_operation.operation_name,
+                'sequence_order': job_operation.sequence_order,
+                'total_cost': job_operation.total_cost,
+                'total_time_minutes': job_operation.total_time_minutes,
+            }
+            for job_operation in job_operations
+        ]
+        self.total_cost = sum(
+            (job_operation.total_cost for job_operation in job_operations), Decimal('0')
+        )
+        self.total_time = self.job.total_time_minutes
+        return {
+            'success': True,
+            'coalesced': True,
+            'job': self.job,
+            'operations': self.operations_data,
+            'total_cost': self.total_cost,
+            'total_time_minutes': self.total_time,
+            'total_time_formatted': self._format_time(self.total_time)
+        }
 
-        # Step 2: Get operations for this job
-        job_operations = self.job.job_operations.all().order_by('sequence_order')
+    def _calculate_job(self, job_operations):
+        """Run the calculation and save the results."""
+        # Step 1: Calculate initial paper requirements
+        self._calculate_paper_requirements(job_operations)
 
-        if not job_operations.exists():
+        if not job_operations:
             return {
                 'success': False,
                 'error': 'No operations defined for this job. Please add operations first.'
             }
 
-        # Step 3: Process each operation sequentially
-        # Start with the target print run - operations will add their own waste
-        self.current_quantity = self.job.print_run
-        self.total_cost = Decimal('0')
-        self.total_time = 0
-        self.operations_data = []
-
-        for job_operation in job_operations:
-            operation_result = self._calculate_operation(job_operation.operation, job_operation)
+        # Step 2: Process each operation sequentially
+        quote = self.quote(job_operations=job_operations)
+        if not quote['success']:
+            return quote
 
-            if not operation_result['success']:
-                return operation_result
-
-            # Update job operation with calculated values
+        # Step 3: Update job operations with calculated values
+        for job_operation, operation_result in zip(job_operations, quote['operations_data']):
             self._update_job_operation(job_operation, operation_result)
 
-            # Update running totals
-            self.total_cost += operation_result['total_cost']
-            self.total_time += operation_result['total_time_minutes']
-
-            # Update current quantity for next operation
-            self.current_quantity = operation_result['quantity_after']
-
-            # Store operation data for breakdown
-            self.operations_data.append(operation_result)
+        self.total_cost = quote['operations_cost']
+        self.total_time = quote['total_time_minutes']
+        self.operations_data = quote['operations_data']
 
         # Step 4: Update job totals
+        self.job.category_breakdown = self._get_category_breakdown(job_operations)
         self._update_job_totals()
 
 
@@ -80,8 +156,136 @@ class PrintingCalculator:
             'total_time_formatted': self._format_time(self.total_time)
         }
 
-    def _calculate_paper_requirements(self):
-        """Calculate paper requirements based on job parameters and operation waste."""
+    def quote(self, quantity=None, job_operations=None):
+        """
+        Price the job for a quantity without saving anything.
+
+        Uses the calculator's catalog version (the live catalog if none was
+        given). Returns totals, paper requirements and per-operation results.
+        """
+        if self.catalog_version is None:
+            self.catalog_version = PriceCatalogVersion.current()
+        if quantity is None:
+            quantity = self.job.quantity
+        if job_operations is None:
+            job_operations = self._get_job_operations()
+
+        if not job_operations:
+            return {
+                'success': False,
+                'error': 'No operations defined for this job.'
+            }
+
+        paper = self._get_paper_requirements(quantity, job_operations)
+
+        # Start with the target print run - operations will add their own waste
+        current_quantity = paper['print_run']
+        operations_cost = Decimal('0')
+        total_time = 0
+        operations_data = []
+
+        for job_operation in job_operations:
+            job_params = self._get_job_params(
+                quantity, paper['print_run'], current_quantity, paper['paper_weight_kg']
+            )
+            result = self._calculate_operation(
+                self._get_operation(job_operation), job_operation, job_params
+            )
+
+            if not result['success']:
+                return result
+
+            # Update running totals
+            operations_cost += result['total_cost']
+            total_time += result['total_time_minutes']
+            current_quantity = result['quantity_after']
+
+            operations_data.append({
+                'job_operation': job_operation,
+                'operation_name': result['operation'].name,
+                'sequence_order': job_operation.sequence_order,
+                **result
+            })
+
+        # Total cost is operations + paper
+        total_cost = operations_cost + paper['paper_cost']
+
+        return {
+            'success': True,
+            'quantity': quantity,
+            'catalog_version': self.catalog_version,
+            'total_cost': total_cost,
+            'paper_cost': paper['paper_cost'],
+            'operations_cost': operations_cost,
+            'total_time_minutes': total_time,
+            'print_run': paper['print_run'],
+            'waste_sheets': paper['waste_sheets'],
+            'sheets_to_buy': paper['sheets_to_buy'],
+            'paper_weight_kg': paper['paper_weight_kg'],
+            'operations_data': operations_data,
+            'cost_per_piece': total_cost / quantity if quantity > 0 else Decimal('0')
+        }
+
+    def _get_job_operations(self):
+        """Return the job's operations in execution order."""
+        return list(
+            self.job.job_operations.select_related('operation__category').order_by('sequence_order')
+        )
+
+    def _get_category_breakdown(self, job_operations):
+        """Sum the calculated time and cost of the operations per category."""
+        categories = {}
+        for job_operation in job_operations:
+            category = job_operation.operation.category
+            row = categories.setdefault(category.pk, {
+                'category': category.name,
+                'sort_order': category.sort_order,
+                'time_minutes': 0,
+                'cost': Decimal('0'),
+            })
+            row['time_minutes'] += job_operation.total_time_minutes or 0
+            row['cost'] += job_operation.total_cost or Decimal('0')
+        rows = sorted(categories.values(), key=lambda row: (row['sort_order'], row['category']))
+        return [
+            {
+                'category': row['category'],
+                'time_minutes': row['time_minutes'],
+                'cost': str(row['cost'].quantize(Decimal('0.01'))),
+            }
+            for row in rows
+        ]
+
+    def _get_operation(self, job_operation):
+        """Return the operation priced with the calculator's catalog version."""
+        operation = None
+        if self.catalog_version is not None:
+            operation = self.catalog_version.build_operation(job_operation.operation_id)
+        # Operations added after the version was captured are priced live
+        return operation or job_operation.operation
+
+    def _get_paper_pricing(self):
+        """Return (weight_gsm, price_per_kg) for the job's paper type."""
+        paper_type = None
+        if self.catalog_version is not None:
+            paper_type = self.catalog_version.get_paper_type_data(self.job.paper_type_id)
+        if paper_type is None:
+            return self.job.paper_type.weight_gsm, self.job.paper_type.price_per_kg
+        return paper_type['weight_gsm'], Decimal(paper_type['price_per_kg'])
+
+    def _get_job_params(self, quantity, print_run, current_quantity, paper_weight_kg):
+        """Prepare job parameters for operation formulas."""
+        return {
+            'quantity': quantity,
+            'n_up': self.job.n_up,
+            'colors_front': self.job.colors_front,
+            'colors_back': self.job.colors_back,
+            'print_run': print_run,
+            'current_quantity': current_quantity,
+            'paper_weight_kg': float(paper_weight_kg or 0),
+        }
+
+    def _get_paper_requirements(self, quantity, job_operations):
+        """Calculate paper requirements for a quantity without touching the job."""
         # Calculate print run accounting for book signatures if applicable
         if self.job.number_of_pages and self.job.n_up_signatures:
             # For books: calculate based on signatures needed
@@ -90,7 +294,7 @@ class PrintingCalculator:
             pages_per_sheet = self.job.n_up_signatures * 2  # front + back
             
             # Total pages needed for all books
-            total_pages_needed = self.job.quantity * self.job.number_of_pages
+            total_pages_needed = quantity * self.job.number_of_pages
             
             # Sheets needed = total pages ÷ pages per sheet
             print_run = total_pages_needed // pages_per_sheet
@@ -98,12 +302,12 @@ class PrintingCalculator:
                 print_run += 1  # Round up for partial sheets
         else:
             # For regular products: standard calculation
-            print_run = self.job.quantity // self.job.n_up
-            if self.job.quantity % self.job.n_up > 0:
+            print_run = quantity // self.job.n_up
+            if quantity % self.job.n_up > 0:
                 print_run += 1  # Round up for partial sheets
 
         # Calculate total waste needed by simulating all operations
-        total_waste_needed = self._estimate_total_waste(print_run)
+        total_waste_needed = self._estimate_total_waste(print_run, job_operations)
         
         # Total printing sheets needed
         total_printing_sheets = print_run + total_waste_needed
@@ -114,29 +318,40 @@ class PrintingCalculator:
             sheets_to_buy += 1  # Round up for partial parent sheets
 
         # Calculate paper weight
+        weight_gsm, price_per_kg = self._get_paper_pricing()
         paper_area_m2 = self.job.selling_size.area_m2
         paper_weight_kg = (
             Decimal(str(paper_area_m2)) *
-            Decimal(str(self.job.paper_type.weight_gsm)) *
+            Decimal(str(weight_gsm)) *
             Decimal(str(sheets_to_buy)) / 1000
         )
 
-        # Calculate paper cost
-        paper_cost = paper_weight_kg * self.job.paper_type.price_per_kg
+        return {
+            'print_run': print_run,
+            'waste_sheets': total_waste_needed,
+            'sheets_to_buy': sheets_to_buy,
+            'paper_weight_kg': paper_weight_kg,
+            # Calculate paper cost
+            'paper_cost': paper_weight_kg * price_per_kg,
+        }
+
+    def _calculate_paper_requirements(self, job_operations=None):
+        """Calculate paper requirements based on job parameters and operation waste."""
+        if job_operations is None:
+            job_operations = self._get_job_operations()
+        paper = self._get_paper_requirements(self.job.quantity, job_operations)
 
         # Update job with calculated values
-        self.job.print_run = print_run
-        self.job.waste_sheets = total_waste_needed
-        self.job.sheets_to_buy = sheets_to_buy
-        self.job.paper_weight_kg = paper_weight_kg
-        self.job.paper_cost = paper_cost
+        self.job.print_run = paper['print_run']
+        self.job.waste_sheets = paper['waste_sheets']
+        self.job.sheets_to_buy = paper['sheets_to_buy']
+        self.job.paper_weight_kg = paper['paper_weight_kg']
+        self.job.paper_cost = paper['paper_cost']
         self.job.save()
 
-    def _estimate_total_waste(self, target_quantity):
+    def _estimate_total_waste(self, target_quantity, job_operations):
         """Estimate total waste needed across all operations to end with target quantity."""
-        job_operations = self.job.job_operations.all().order_by('sequence_order')
-        
-        if not job_operations.exists():
+        if not job_operations:
             # No operations, use basic 5% waste
             return int(target_quantity * 0.05)
         
@@ -144,7 +359,7 @@ class PrintingCalculator:
         current_quantity = target_quantity
         
         # Reverse through operations to estimate required input quantities
-        for operation in reversed(job_operations):
+        for job_operation in reversed(job_operations):
             # Estimate waste this operation will produce
             job_params = {
                 'quantity': self.job.quantity,
@@ -157,7 +372,7 @@ class PrintingCalculator:
             }
             
             # Calculate waste for this operation (access Operation model attributes)
-            op = operation.operation  # Get the related Operation model
+            op = self._get_operation(job_operation)
             waste_sheets = 0
             if op.base_waste_sheets > 0 or op.waste_percentage > 0:
                 if op.uses_colors:
@@ -185,13 +400,14 @@ class PrintingCalculator:
         # Total waste is the difference between starting and target quantities
         return max(0, current_quantity - target_quantity)
 
-    def _calculate_operation(self, operation, job_operation=None):
+    def _calculate_operation(self, operation, job_operation=None, job_params=None):
         """
         Calculate cost and time for a single operation using formulas.
 
         Args:
             operation: Operation model instance
             job_operation: JobOperation instance with dynamic parameters (optional)
+            job_params: prepared job parameters (defaults to the job's current state)
 
         Based on your examples:
         - Color Printing: number_of_plates * (PLATE_PRICE + MAKE_READY_PRICE + print_quantity * PRICE_PER_SHEET)
@@ -199,15 +415,11 @@ class PrintingCalculator:
         """
         try:
             # Prepare job parameters for calculation
-            job_params = {
-                'quantity': self.job.quantity,
-                'n_up': self.job.n_up,
-                'colors_front': self.job.colors_front,
-                'colors_back': self.job.colors_back,
-                'print_run': self.job.print_run,
-                'current_quantity': self.current_quantity,
-                'paper_weight_kg': float(self.job.paper_weight_kg or 0),
-            }
+            if job_params is None:
+                job_params = self._get_job_params(
+                    self.job.quantity, self.job.print_run,
+                    self.current_quantity, self.job.paper_weight_kg
+                )
 
             # Get dynamic operation parameters if available
             operation_parameters = {}
@@ -262,15 +474,7 @@ class PrintingCalculator:
 
     def _update_job_operation(self, job_operation, operation_result):
         """Update JobOperation with calculated values."""
-        operation = operation_result['operation']
-
-        job_operation.operation_name = operation.name
-        job_operation.makeready_price = operation.makeready_price
-        job_operation.price_per_sheet = operation.price_per_sheet
-        job_operation.plate_price = operation.plate_price
-        job_operation.makeready_time_minutes = operation.makeready_time_minutes
-        job_operation.cleaning_time_minutes = operation.cleaning_time_minutes
-        job_operation.sheets_per_minute = operation.sheets_per_minute
+        job_operation.catalog_version = self.catalog_version
 
         job_operation.quantity_before = operation_result['quantity_before']
         job_operation.quantity_after = operation_result['quantity_after']
@@ -295,7 +499,9 @@ class PrintingCalculator:
         self.job.total_outsourcing_cost = Decimal('0')
         self.job.total_cost = self.job.total_material_cost + self.job.total_labor_cost + self.job.total_outsourcing_cost
         self.job.total_time_minutes = self.total_time
-        self.job.status = 'calculated'
+        self.job.catalog_version = self.catalog_version
+        if not self.keep_status or self.job.status == 'draft':
+            self.job.status = 'calculated'
         self.job.calculated_at = timezone.now()
         self.job.save()
 
@@ -318,99 +524,16 @@ class PrintingCalculator:
         Calculate cost and time for a specific quantity variant.
         Returns calculation data without saving to database.
         """
-        # Store original job quantity and calculated values
-        original_quantity = self.job.quantity
-        original_print_run = self.job.print_run
-        original_sheets_to_buy = self.job.sheets_to_buy
-        original_paper_weight = self.job.paper_weight_kg
-        original_paper_cost = self.job.paper_cost
-        original_total_material_cost = self.job.total_material_cost
-        original_total_cost = self.job.total_cost
-        
-        try:
-            # Temporarily set the job quantity to the variant quantity
-            self.job.quantity = quantity
-            
-            # Recalculate paper requirements for this quantity
-            self._calculate_paper_requirements()
-            
-            # Process operations with the new quantity
-            job_operations = self.job.job_operations.all().order_by('sequence_order')
-            
-            if not job_operations.exists():
-                return {
-                    'success': False,
-                    'error': 'No operations defined for this job.'
-                }
-            
-            # Reset calculation state
-            self.current_quantity = self.job.print_run  # Use print_run like in main calculation
-            self.total_cost = Decimal('0')
-            self.total_time = 0
-            self.operations_data = []
-            
-            # Process each operation
-            for job_operation in job_operations:
-                result = self._calculate_operation(job_operation.operation, job_operation)
-                
-                if not result['success']:
-                    return result
-                
-                # Update running totals
-                self.total_cost += result['total_cost']
-                self.total_time += result['total_time_minutes']
-                self.current_quantity = result['quantity_after']
-                
-                # Store operation data
-                self.operations_data.append({
-                    'operation': job_operation.operation,
-                    'operation_name': job_operation.operation_name,
-                    'sequence_order': job_operation.sequence_order,
-                    **result
-                })
-            
-            # Calculate paper cost (use the job's calculated paper_cost)
-            paper_cost = self.job.paper_cost or Decimal('0')
-            
-            # Operations cost is what we calculated in self.total_cost
-            operations_cost = self.total_cost
-            
-            # Total cost is operations + paper
-            total_cost = operations_cost + paper_cost
-            
-            return {
-                'success': True,
-                'quantity': quantity,
-                'total_cost': total_cost,
-                'paper_cost': paper_cost,
-                'operations_cost': operations_cost,
-                'total_time_minutes': self.total_time,
-                'print_run': self.job.print_run,
-                'waste_sheets': self.job.waste_sheets,
-                'sheets_to_buy': self.job.sheets_to_buy,
-                'paper_weight_kg': self.job.paper_weight_kg,
-                'operations_data': self.operations_data,
-                'cost_per_piece': total_cost / quantity if quantity > 0 else Decimal('0')
-            }
-            
-        finally:
-            # Always restore original values
-            self.job.quantity = original_quantity
-            self.job.print_run = original_print_run
-            self.job.sheets_to_buy = original_sheets_to_buy
-            self.job.paper_weight_kg = original_paper_weight
-            self.job.paper_cost = original_paper_cost
-            self.job.total_material_cost = original_total_material_cost
-            self.job.total_cost = original_total_cost
-            # IMPORTANT: Save the restored values to database
-            self.job.save()
-
-    def calculate_all_variants(self, quantities):
+        return self.quote(quantity)
+
+    def calculate_all_variants(self, quantities, progress_callback=None):
         """
         Calculate multiple quantity variants and save them to the database.
         
         Args:
             quantities: List of quantities to calculate
+            progress_callback: Optional callable(done, quantity, result) invoked
+                after each variant
             
         Returns:
             Dictionary with success status and created variants
@@ -428,7 +551,7 @@ class PrintingCalculator:
             created_variants = []
             failed_calculations = []
             
-            for quantity in quantities:
+            for done, quantity in enumerate(quantities, start=1):
                 # Calculate this variant
                 result = self.calculate_variant(quantity)
                 
@@ -452,6 +575,9 @@ class PrintingCalculator:
                         'quantity': quantity,
                         'error': result.get('error', 'Unknown error')
                     })
+
+                if progress_callback:
+                    progress_callback(done, quantity, result)
             
             return {
                 'success': True,
@@ -467,170 +593,496 @@ class PrintingCalculator:
             }
 
 
+def _compare_values(baseline, candidate):
+    """Return baseline, candidate and their absolute and relative difference."""
+    delta = candidate - baseline
+    delta_percent = (delta / baseline * 100) if baseline else None
+    return {
+        'baseline': baseline,
+        'candidate': candidate,
+        'delta': delta,
+        'delta_percent': delta_percent,
+    }
+
+
+def compare_quotes(baseline, candidate):
+    """
+    Compare two quotes of the same job side by side.
+
+    Both arguments are successful results of PrintingCalculator.quote().
+    Returns per-operation and total differences (candidate - baseline).
+    """
+    candidate_operations = {
+        data['job_operation'].pk: data for data in candidate['operations_data']
+    }
+    operations = []
+    for data in baseline['operations_data']:
+        other = candidate_operations.get(data['job_operation'].pk)
+        operations.append({
+            'sequence_order': data['sequence_order'],
+            'baseline_name': data['operation_name'],
+            'candidate_name': other['operation_name'] if other else None,
+            'total_cost': _compare_values(
+                data['total_cost'], other['total_cost'] if other else Decimal('0')
+            ),
+        })
+
+    return {
+        'operations': operations,
+        'paper_cost': _compare_values(baseline['paper_cost'], candidate['paper_cost']),
+        'operations_cost': _compare_values(baseline['operations_cost'], candidate['operations_cost']),
+        'total_cost': _compare_values(baseline['total_cost'], candidate['total_cost']),
+        'cost_per_piece': _compare_values(baseline['cost_per_piece'], candidate['cost_per_piece']),
+        'total_time_minutes': _compare_values(
+            baseline['total_time_minutes'], candidate['total_time_minutes']
+        ),
+    }
+
+
+def quote_to_dict(quote):
+    """Return a JSON-ready summary of a PrintingCalculator.quote() result."""
+    if not quote['success']:
+        return {'success': False, 'quantity': quote.get('quantity'), 'error': quote['error']}
+    return {
+        'success': True,
+        'quantity': quote['quantity'],
+        'total_cost': str(round(quote['total_cost'], 2)),
+        'paper_cost': str(round(quote['paper_cost'], 2)),
+        'operations_cost': str(round(quote['operations_cost'], 2)),
+        'cost_per_piece': str(round(quote['cost_per_piece'], 4)),
+        'total_time_minutes': int(quote['total_time_minutes']),
+        'print_run': quote['print_run'],
+        'sheets_to_buy': quote['sheets_to_buy'],
+        'operations': [
+            {
+                'name': data['operation_name'],
+                'total_cost': str(round(data['total_cost'], 2)),
+                'total_time_minutes': int(data['total_time_minutes']),
+            }
+            for data in quote['operations_data']
+        ],
+    }
+
+
+def price_quantities(job, job_operations, catalog_version, quantities):
+    """
+    Quote several quantities of a job against one catalog version.
+
+    Works purely in memory: the job must have paper_type and selling_size
+    loaded and job_operations their operation, so this is safe to run in
+    an executor thread.
+    """
+    calculator = PrintingCalculator(job, catalog_version=catalog_version)
+    return [
+        quote_to_dict(calculator.quote(quantity, job_operations=job_operations))
+        for quantity in quantities
+    ]
+
+
+# Upper bound on the edits accepted in one apply_edits() batch
+MAX_JOB_EDITS = 200
+
+
+class JobEditConflict(Exception):
+    """Raised when a job's operations were changed since the editor loaded them."""
+
+    def __init__(self, expected_version, current_version):
+        super().__init__(
+            'This job was changed by someone else. Reload it and apply your change again.'
+        )
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
 class JobOperationManager:
     """
     Service for managing operations within a job.
+
+    Structural edits use optimistic concurrency: each one bumps Job.version
+    with a conditional UPDATE and fails with JobEditConflict if the version
+    the editor started from is no longer current. Every edit also schedules
+    a debounced background recalculation of the job.
     """
 
     @staticmethod
-    def add_operation(job, operation, sequence_order=None):
-        """Add an operation to a job."""
+    def bump_version(job, expected_version=None):
+        """
+        Advance job.version, checking it still equals expected_version.
+
+        Defaults to the version on the given instance. Call inside the edit's
+        transaction so a failed edit also rolls the version back.
+        """
+        from .tasks import queue_recalculation
+
+        expected = job.version if expected_version is None else int(expected_version)
+        updated = Job.objects.filter(pk=job.pk, version=expected).update(
+            version=models.F('version') + 1, needs_recalculation=True
+        )
+        if not updated:
+            current = Job.objects.filter(pk=job.pk).values_list('version', flat=True).first()
+            raise JobEditConflict(expected, current)
+        job.version = expected + 1
+        job.needs_recalculation = True
+        queue_recalculation(job)
+        return job.version
+
+    @staticmethod
+    def build_job_operation(job, operation, sequence_order, catalog_version=None,
+                            operation_parameters=None):
+        """
+        Return an unsaved JobOperation with empty calculation results.
+
+        The step references the catalog version holding its prices; the live
+        catalog is snapshotted when no version is given.
+        """
+        return JobOperation(
+            job=job,
+            operation=operation,
+            sequence_order=sequence_order,
+            catalog_version=catalog_version or PriceCatalogVersion.current(),
+            operation_parameters=operation_parameters,
+            quantity_before=0,
+            quantity_after=0,
+            waste_sheets=0,
+            processing_quantity=0,
+            total_cost=Decimal('0'),
+            total_time_minutes=0,
+            colors_used=0,
+        )
+
+    @staticmethod
+    def create_job_operations(job, steps):
+        """
+        Insert the operations of a new job with one query; returns them.
+
+        steps are (operation, catalog_version, operation_parameters) tuples
+        in order. Steps without a catalog version share one snapshot of the
+        live catalog.
+        """
+        live_version = None
+        job_operations = []
+        for position, (operation, catalog_version, operation_parameters) in enumerate(steps, 1):
+            if catalog_version is None:
+                live_version = live_version or PriceCatalogVersion.current()
+                catalog_version = live_version
+            job_operations.append(JobOperationManager.build_job_operation(
+                job, operation, position * SEQUENCE_GAP,
+                catalog_version=catalog_version, operation_parameters=operation_parameters,
+            ))
+        return JobOperation.objects.bulk_create(job_operations)
+
+    @staticmethod
+    def _sequence_keys(job, exclude=None):
+        """Return the (id, sequence_order) pairs of a job in order."""
+        job_operations = JobOperation.objects.filter(job=job)
+        if exclude is not None:
+            job_operations = job_operations.exclude(pk=exclude.pk)
+        return list(job_operations.order_by('sequence_order').values_list('id', 'sequence_order'))
+
+    @staticmethod
+    def _key_between(before, after):
+        """
+        Return a free sequence key strictly between two neighbours, or None.
+
+        None for before means the start of the list, None for after the end.
+        """
+        low = 0 if before is None else before
+        if after is None:
+            return low + SEQUENCE_GAP
+        if after - low > 1:
+            return (low + after) // 2
+        return None
+
+    @staticmethod
+    def _renumber(job, operation_ids, current_keys=None):
+        """
+        Give the job's operations evenly spaced keys in the given order.
+
+        Runs as a single bulk UPDATE. The new keys never overlap the current
+        ones (current_keys, read from the database when not given), so the
+        (job, sequence_order) unique constraint cannot trip halfway through
+        the statement.
+        """
+        if current_keys is None:
+            current_keys = JobOperation.objects.filter(job=job).values_list('sequence_order', flat=True)
+        current_keys = list(current_keys)
+        count = len(operation_ids)
+        if current_keys and min(current_keys) > count * SEQUENCE_GAP:
+            base = 0
+        else:
+            base = max(current_keys, default=0)
+        job_operations = [
+            JobOperation(pk=operation_id, sequence_order=base + position * SEQUENCE_GAP)
+            for position, operation_id in enumerate(operation_ids, 1)
+        ]
+        JobOperation.objects.bulk_update(job_operations, ['sequence_order'], batch_size=None)
+        return {job_operation.pk: job_operation.sequence_order for job_operation in job_operations}
+
+    @staticmethod
+    def _key_for_position(job, position, moving=None):
+        """
+        Return the sequence key that puts a step at a 1-based position.
+
+        moving is the operation being moved, which does not count as a
+        neighbour. When the neighbours have no gap left the job is
+        rebalanced first.
+        """
+        keys = JobOperationManager._sequence_keys(job, exclude=moving)
+        index = len(keys) if position is None else min(max(int(position), 1), len(keys) + 1) - 1
+        before = keys[index - 1][1] if index > 0 else None
+        after = keys[index][1] if index < len(keys) else None
+        key = JobOperationManager._key_between(before, after)
+        if key is None:
+            ordered_ids = [operation_id for operation_id, _ in keys]
+            new_keys = JobOperationManager._renumber(job, ordered_ids)
+            before = new_keys[ordered_ids[index - 1]] if index > 0 else None
+            key = JobOperationManager._key_between(before, new_keys[ordered_ids[index]])
+        return key
+
+    @staticmethod
+    def _add(job, operation, position=None, operation_parameters=None):
+        sequence_order = JobOperationManager._key_for_position(job, position)
+        job_operation = JobOperationManager.build_job_operation(
+            job, operation, sequence_order, operation_parameters=operation_parameters
+        )
+        job_operation.save()
+        return job_operation
+
+    @staticmethod
+    def _insert_after(job, after_operation, operation, operation_parameters=None):
+        following = JobOperation.objects.filter(
+            job=job, sequence_order__gt=after_operation.sequence_order
+        ).order_by('sequence_order').values_list('sequence_order', flat=True).first()
+        sequence_order = JobOperationManager._key_between(after_operation.sequence_order, following)
+        if sequence_order is None:
+            position = JobOperation.objects.filter(
+                job=job, sequence_order__lte=after_operation.sequence_order
+            ).count() + 1
+            sequence_order = JobOperationManager._key_for_position(job, position)
+
+        job_operation = JobOperationManager.build_job_operation(
+            job, operation, sequence_order,
+            operation_parameters=operation_parameters
+        )
+        job_operation.save()
+        return job_operation
+
+    @staticmethod
+    def _move(job_operation, position):
+        job_operation.sequence_order = JobOperationManager._key_for_position(
+            job_operation.job, position, moving=job_operation
+        )
+        JobOperation.objects.filter(pk=job_operation.pk).update(
+            sequence_order=job_operation.sequence_order
+        )
+        return job_operation
+
+    @staticmethod
+    def add_operation(job, operation, position=None, expected_version=None):
+        """Add an operation to a job, at the end unless a 1-based position is given."""
         from django.db import transaction
-        
+
         with transaction.atomic():
-            # Lock the job to prevent race conditions
-            job = Job.objects.select_for_update().get(pk=job.pk)
-            
-            if sequence_order is None:
-                # Add at the end - get current max sequence order
-                max_sequence = job.job_operations.aggregate(
-                    max_seq=models.Max('sequence_order')
-                )['max_seq']
-                sequence_order = (max_sequence or 0) + 1
-
-            # Shift existing operations if inserting in middle
-            current_count = job.job_operations.count()
-            if sequence_order <= current_count:
-                job.job_operations.filter(
-                    sequence_order__gte=sequence_order
-                ).update(sequence_order=models.F('sequence_order') + 1)
-
-            job_operation = JobOperation.objects.create(
-                job=job,
-                operation=operation,
-                sequence_order=sequence_order,
-                operation_name=operation.name,
-                makeready_price=operation.makeready_price,
-                price_per_sheet=operation.price_per_sheet,
-                plate_price=operation.plate_price,
-                makeready_time_minutes=operation.makeready_time_minutes,
-                cleaning_time_minutes=operation.cleaning_time_minutes,
-                sheets_per_minute=operation.sheets_per_minute,
-                quantity_before=0,
-                quantity_after=0,
-                waste_sheets=0,
-                processing_quantity=0,  # Add this required field
-                total_cost=Decimal('0'),
-                total_time_minutes=0
-            )
+            JobOperationManager.bump_version(job, expected_version)
+            return JobOperationManager._add(job, operation, position)
 
-        return job_operation
+    @staticmethod
+    def insert_operation_after(job, after_operation, operation, operation_parameters=None,
+                               expected_version=None):
+        """Insert an operation directly after an existing step of the job."""
+        from django.db import transaction
+
+        with transaction.atomic():
+            JobOperationManager.bump_version(job, expected_version)
+            return JobOperationManager._insert_after(job, after_operation, operation, operation_parameters)
+
+    @staticmethod
+    def remove_operation(job_operation, expected_version=None):
+        """Remove an operation from a job; the other steps keep their keys."""
+        from django.db import transaction
+
+        with transaction.atomic():
+            JobOperationManager.bump_version(job_operation.job, expected_version)
+            job_operation.delete()
+
+    @staticmethod
+    def move_operation(job_operation, position, expected_version=None):
+        """Move a step to a 1-based position within its job."""
+        from django.db import transaction
+
+        with transaction.atomic():
+            JobOperationManager.bump_version(job_operation.job, expected_version)
+            return JobOperationManager._move(job_operation, position)
 
     @staticmethod
-    def remove_operation(job_operation):
-        """Remove an operation from a job."""
-        sequence_order = job_operation.sequence_order
-        job = job_operation.job
+    def apply_edits(job, edits, expected_version=None):
+        """
+        Apply a batch of structural edits in one transaction and version bump.
+
+        Each edit is a dict with an "op" of add, insert, remove, move,
+        set_parameters or set_quantity. Steps are referenced by "id"; steps
+        added earlier in the same batch can be referenced by the "ref" label
+        they were given. Raises ValueError (naming the failing edit) and
+        leaves the job untouched if any edit is invalid.
+
+        Returns a dict mapping each ref to the id of the step it created.
+        """
+        from django.db import transaction
+
+        if not isinstance(edits, list) or not edits:
+            raise ValueError('No edits provided')
+        if len(edits) > MAX_JOB_EDITS:
+            raise ValueError(f'At most {MAX_JOB_EDITS} edits can be applied at once')
+
+        refs = {}
+        with transaction.atomic():
+            JobOperationManager.bump_version(job, expected_version)
+            steps = {}
+            for job_operation in JobOperation.objects.filter(job=job).select_related('operation'):
+                job_operation.job = job
+                steps[job_operation.pk] = job_operation
+            operations = {}
+
+            def get_step(edit):
+                key = edit.get('id')
+                step_id = refs.get(key, key)
+                if step_id not in steps:
+                    raise ValueError(f'Unknown step {key!r}')
+                return steps[step_id]
+
+            def get_operation(edit):
+                operation_id = edit.get('operation_id')
+                if operation_id not in operations:
+                    operations[operation_id] = Operation.objects.filter(
+                        pk=operation_id, is_active=True
+                    ).first()
+                if operations[operation_id] is None:
+                    raise ValueError(f'Unknown operation {operation_id!r}')
+                return operations[operation_id]
+
+            def get_parameters(edit):
+                parameters = edit.get('parameters')
+                if parameters is not None and not isinstance(parameters, dict):
+                    raise ValueError('parameters must be an object')
+                return parameters
+
+            for index, edit in enumerate(edits, 1):
+                try:
+                    if not isinstance(edit, dict):
+                        raise ValueError('edit must be an object')
+                    action = edit.get('op')
+                    if action == 'add':
+                        created = JobOperationManager._add(
+                            job, get_operation(edit), edit.get('position'), get_parameters(edit)
+                        )
+                    elif action == 'insert':
+                        after_operation = get_step({'id': edit.get('after')})
+                        # Earlier edits may have renumbered the job
+                        after_operation.refresh_from_db(fields=['sequence_order'])
+                        created = JobOperationManager._insert_after(
+                            job, after_operation, get_operation(edit), get_parameters(edit)
+                        )
+                    elif action == 'remove':
+                        step = get_step(edit)
+                        del steps[step.pk]
+                        step.delete()
+                        continue
+                    elif action == 'move':
+                        JobOperationManager._move(get_step(edit), int(edit['position']))
+                        continue
+                    elif action == 'set_parameters':
+                        step = get_step(edit)
+                        step.operation_parameters = get_parameters(edit)
+                        step.save(update_fields=['operation_parameters'])
+                        continue
+                    elif action == 'set_quantity':
+                        quantity = int(edit['quantity'])
+                        if quantity < 1:
+                            raise ValueError('quantity must be at least 1')
+                        job.quantity = quantity
+                        Job.objects.filter(pk=job.pk).update(quantity=quantity, updated_at=timezone.now())
+                        continue
+                    else:
+                        raise ValueError(f'Unknown op {action!r}')
+                except (KeyError, TypeError, ValueError) as e:
+                    message = f'missing {e}' if isinstance(e, KeyError) else str(e)
+                    raise ValueError(f'Edit {index}: {message}')
+
+                steps[created.pk] = created
+                if edit.get('ref') is not None:
+                    refs[edit['ref']] = created.pk
 
-        job_operation.delete()
+        return refs
 
-        # Reorder remaining operations
-        job.job_operations.filter(
-            sequence_order__gt=sequence_order
-        ).update(sequence_order=models.F('sequence_order') - 1)
+    @staticmethod
+    def structure_snapshot(job):
+        """Capture a job's steps and totals for structure_diff()."""
+        job_operations = JobOperation.objects.filter(job=job).select_related('operation').order_by('sequence_order')
+        return {
+            'job': {
+                'quantity': job.quantity,
+                'status': job.status,
+                'total_cost': job.total_cost,
+                'total_time_minutes': job.total_time_minutes,
+            },
+            'operations': {
+                job_operation.pk: {
+                    'position': position,
+                    'name': job_operation.operation_name,
+                    'parameters': job_operation.operation_parameters,
+                    'total_cost': job_operation.total_cost,
+                    'total_time_minutes': job_operation.total_time_minutes,
+                }
+                for position, job_operation in enumerate(job_operations, 1)
+            },
+        }
+
+    @staticmethod
+    def structure_diff(before, after, refs=None):
+        """Return only what changed between two structure snapshots."""
+        ref_for = {step_id: ref for ref, step_id in (refs or {}).items()}
+        created, changed = [], []
+        for step_id, values in after['operations'].items():
+            if step_id not in before['operations']:
+                entry = {'id': step_id, **values}
+                if step_id in ref_for:
+                    entry['ref'] = ref_for[step_id]
+                created.append(entry)
+                continue
+            old = before['operations'][step_id]
+            differences = {key: value for key, value in values.items() if old[key] != value}
+            if differences:
+                changed.append({'id': step_id, **differences})
+        return {
+            'created': created,
+            'removed': [step_id for step_id in before['operations'] if step_id not in after['operations']],
+            'changed': changed,
+            'job': {key: value for key, value in after['job'].items() if before['job'][key] != value},
+        }
 
     @staticmethod
-    def reorder_operations(job, operation_ids):
+    def reorder_operations(job, operation_ids, expected_version=None):
         """Reorder operations based on list of operation IDs."""
-        from django.db import transaction, connection
-        
+        from django.db import transaction
+
+        # Convert operation_ids to integers and validate
+        try:
+            operation_ids = [int(op_id) for op_id in operation_ids if str(op_id).isdigit()]
+        except (ValueError, TypeError):
+            raise ValueError("Invalid operation IDs provided")
+
+        if not operation_ids:
+            return
+
         with transaction.atomic():
-            # Convert operation_ids to integers and validate
-            try:
-                operation_ids = [int(op_id) for op_id in operation_ids if str(op_id).isdigit()]
-            except (ValueError, TypeError):
-                raise ValueError("Invalid operation IDs provided")
-            
-            if not operation_ids:
-                return
-            
-            # Get all operations for this job
-            job_operations = list(JobOperation.objects.filter(job=job).order_by('id'))
-            
-            if len(operation_ids) != len(job_operations):
+            JobOperationManager.bump_version(job, expected_version)
+
+            current = dict(JobOperation.objects.filter(job=job).values_list('id', 'sequence_order'))
+            existing_ids = set(current)
+            if len(operation_ids) != len(existing_ids) or len(set(operation_ids)) != len(operation_ids):
                 raise ValueError("Operation count mismatch")
-            
-            # Validate all operation IDs exist and belong to this job
-            existing_ids = {op.id for op in job_operations}
-            provided_ids = set(operation_ids)
-            
-            if not provided_ids.issubset(existing_ids):
+
+            if not set(operation_ids).issubset(existing_ids):
                 raise ValueError("Some operation IDs don't belong to this job")
-            
-            # Method 1: Try using raw SQL to bypass constraint temporarily
-            try:
-                with connection.cursor() as cursor:
-                    # Get table name
-                    table_name = JobOperation._meta.db_table
-                    
-                    # Set all sequence_order to NULL temporarily (if column allows it)
-                    # or to a large offset to avoid conflicts
-                    max_sequence = len(job_operations) * 1000
-                    
-                    for i, operation_id in enumerate(operation_ids, 1):
-                        cursor.execute(
-                            f"UPDATE {table_name} SET sequence_order = %s WHERE id = %s AND job_id = %s",
-                            [i + max_sequence, operation_id, job.id]
-                        )
-                    
-                    # Now set the correct sequence orders
-                    for i, operation_id in enumerate(operation_ids, 1):
-                        cursor.execute(
-                            f"UPDATE {table_name} SET sequence_order = %s WHERE id = %s AND job_id = %s",
-                            [i, operation_id, job.id]
-                        )
-                        
-            except Exception as e:
-                # Fallback: Delete and recreate approach
-                print(f"Raw SQL approach failed: {e}, trying delete/recreate approach")
-                
-                # Store all operation data
-                operations_data = []
-                for operation in job_operations:
-                    operations_data.append({
-                        'operation_id': operation.operation_id,
-                        'operation_name': operation.operation_name,
-                        'makeready_price': operation.makeready_price,
-                        'price_per_sheet': operation.price_per_sheet,
-                        'plate_price': operation.plate_price,
-                        'makeready_time_minutes': operation.makeready_time_minutes,
-                        'cleaning_time_minutes': operation.cleaning_time_minutes,
-                        'sheets_per_minute': operation.sheets_per_minute,
-                        'quantity_before': operation.quantity_before,
-                        'quantity_after': operation.quantity_after,
-                        'waste_sheets': operation.waste_sheets,
-                        'processing_quantity': operation.processing_quantity,
-                        'total_cost': operation.total_cost,
-                        'total_time_minutes': operation.total_time_minutes,
-                        'colors_used': operation.colors_used,
-                    })
-                
-                # Create lookup for operation data by ID
-                data_lookup = {op.id: data for op, data in zip(job_operations, operations_data)}
-                
-                # Delete all existing operations for this job
-                JobOperation.objects.filter(job=job).delete()
-                
-                # Recreate operations in the new order
-                for sequence, operation_id in enumerate(operation_ids, 1):
-                    if operation_id in data_lookup:
-                        data = data_lookup[operation_id]
-                        JobOperation.objects.create(
-                            job=job,
-                            operation_id=data['operation_id'],
-                            sequence_order=sequence,
-                            operation_name=data['operation_name'],
-                            makeready_price=data['makeready_price'],
-                            price_per_sheet=data['price_per_sheet'],
-                            plate_price=data['plate_price'],
-                            makeready_time_minutes=data['makeready_time_minutes'],
-                            cleaning_time_minutes=data['cleaning_time_minutes'],
-                            sheets_per_minute=data['sheets_per_minute'],
-                            quantity_before=data['quantity_before'],
-                            quantity_after=data['quantity_after'],
-                            waste_sheets=data['waste_sheets'],
-                            processing_quantity=data['processing_quantity'],
-                            total_cost=data['total_cost'],
-                            total_time_minutes=data['total_time_minutes'],
-                            colors_used=data['colors_used'],
-                        )
\ No newline at end of file
+
+            JobOperationManager._renumber(job, operation_ids, current_keys=current.values())
@@ -0,0 +1,139 @@
+"""
+Background tasks for job calculations.
+"""
+
+from django.conf import settings
+from django.db import transaction
+
+from PrintEstimation.core.tasks import enqueue, task
+from .models import Job
+from .services import PrintingCalculator
+
+
+# Calculations users start themselves; admission limits count only these
+REQUESTED_CALCULATIONS = ('jobs.calculate_job', 'jobs.calculate_variants')
+
+
+def job_reference(job_id):
+    """Reference string linking background tasks to a job."""
+    return f'job:{job_id}'
+
+
+def _money(value, places=2):
+    return str(round(value, places))
+
+
+@task(name='jobs.calculate_job')
+def calculate_job(background_task, job_id):
+    """Recalculate a job's operations and totals."""
+    job = Job.objects.get(pk=job_id)
+    background_task.set_progress(0, 1, f'Calculating {job.order_name}')
+
+    result = PrintingCalculator(job).calculate_job()
+    if not result['success']:
+        raise ValueError(result['error'])
+
+    background_task.emit('job', {
+        'job_id': job.pk,
+        'total_cost': _money(result['total_cost']),
+        'total_time_minutes': int(result['total_time_minutes']),
+        'operations': [
+            {
+                'id': data['job_operation'].pk,
+                'name': data['operation_name'],
+                'total_cost': _money(data['total_cost']),
+            }
+            for data in result['operations']
+        ],
+    })
+    background_task.set_progress(1, 1, 'Calculation complete')
+    return {
+        'job_id': job.pk,
+        'total_cost': str(result['total_cost']),
+        'total_time_minutes': result['total_time_minutes'],
+    }
+
+
+@task(name='jobs.recalculate_job')
+def recalculate_job(background_task, job_id):
+    """Bring a job's totals up to date after its inputs changed."""
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None or not job.job_operations.exists():
+        Job.objects.filter(pk=job_id).update(needs_recalculation=False)
+        return {'job_id': job_id, 'skipped': True}
+
+    result = PrintingCalculator(job).calculate_job(keep_status=True)
+    if not result['success']:
+        raise ValueError(result['error'])
+
+    background_task.emit('job', {
+        'job_id': job.pk,
+        'total_cost': _money(result['total_cost']),
+        'total_time_minutes': int(result['total_time_minutes']),
+    })
+    return {
+        'job_id': job.pk,
+        'total_cost': str(result['total_cost']),
+        'total_time_minutes': result['total_time_minutes'],
+        'coalesced': result.get('coalesced', False),
+    }
+
+
+def schedule_recalculation(job, user=None):
+    """
+    Mark a job dirty and queue a debounced recalculation once the current
+    transaction commits. A burst of edits results in a single calculation.
+    """
+    job.needs_recalculation = True
+    Job.objects.filter(pk=job.pk).update(needs_recalculation=True)
+    queue_recalculation(job, user)
+
+
+def queue_recalculation(job, user=None):
+    """Queue the debounced recalculation of a job already marked dirty."""
+    transaction.on_commit(lambda: enqueue(
+        recalculate_job,
+        reference=job_reference(job.pk),
+        user=user,
+        debounce=getattr(settings, 'JOB_RECALCULATION_DELAY', 5),
+        job_id=job.pk,
+    ))
+
+
+@task(name='jobs.calculate_variants')
+def calculate_variants(background_task, job_id, quantities):
+    """Calculate a set of quantity variants for a job."""
+    job = Job.objects.get(pk=job_id)
+    background_task.set_progress(0, len(quantities), 'Starting variant calculation')
+
+    def report(done, quantity, variant_result):
+        if variant_result['success']:
+            background_task.emit('variant', {
+                'quantity': quantity,
+                'success': True,
+                'total_cost': _money(variant_result['total_cost']),
+                'paper_cost': _money(variant_result['paper_cost']),
+                'operations_cost': _money(variant_result['operations_cost']),
+                'cost_per_piece': _money(variant_result['cost_per_piece'], 3),
+                'total_time_minutes': int(variant_result['total_time_minutes']),
+            })
+        else:
+            background_task.emit('variant', {
+                'quantity': quantity,
+                'success': False,
+                'error': variant_result.get('error', 'Unknown error'),
+            })
+        background_task.set_progress(done, message=f'Calculated {quantity:,} pcs')
+
+    result = PrintingCalculator(job).calculate_all_variants(quantities, progress_callback=report)
+    if not result['success']:
+        raise ValueError(result['error'])
+
+    return {
+        'job_id': job.pk,
+        'created': len(result['created_variants']),
+        'failed': [
+            {'quantity': failed['quantity'], 'error': failed['error']}
+            for failed in result['failed_calculations']
+        ],
+    }
@@ -2,16 +2,34 @@
 Tests for job models and functionality.
 """
 
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 
-from .models import Job, JobOperation, JobVariant
+from .archive import archive_jobs, load_archived_job
+from .models import ArchivedJob, Job, JobOperation, JobVariant, JobStatusChange, SEQUENCE_GAP
+from .dashboard import DASHBOARD_LIST_SIZE, get_dashboard
+from .search import search_jobs
+from .services import PrintingCalculator, JobOperationManager, JobEditConflict, compare_quotes
+from . import tasks as job_tasks
+from PrintEstimation.core.models import BackgroundTask
+from PrintEstimation.core.tasks import enqueue, run_worker
 from PrintEstimation.accounts.models import Client
-from PrintEstimation.operations.models import Operation, PaperType, PaperSize, OperationCategory
+from PrintEstimation.operations.models import (
+    Operation, PaperType, PaperSize, OperationCategory, PriceCatalogVersion
+)
 
 User = get_user_model()
 
@@ -153,6 +171,23 @@ class JobModelTest(TestCase):
         self.assertTrue(job1.job_number.startswith('JOB-'))
         self.assertTrue(job2.job_number.startswith('JOB-'))
 
+    def test_job_numbers_are_consecutive_and_allocated_in_one_query(self):
+        """Test that job numbers come from the yearly counter without gaps."""
+        from django.db import IntegrityError
+        from .models import JobNumberCounter
+
+        year = timezone.now().year
+        job1 = Job.objects.create(**self.job_data)
+        # A failed insert gives its number back
+        with self.assertRaises(IntegrityError):
+            Job.objects.create(**{**self.job_data, 'quantity': None})
+        job2 = Job.objects.create(**self.job_data)
+
+        self.assertEqual(job1.job_number, f'JOB-{year}-0001')
+        self.assertEqual(job2.job_number, f'JOB-{year}-0002')
+        with self.assertNumQueries(1):
+            self.assertEqual(JobNumberCounter.next_number(year), 3)
+
     def test_template_job_no_job_number(self):
         """Test that template jobs don't get job numbers."""
         template_data = {**self.job_data, 'is_template': True, 'template_name': 'Test Template'}
@@ -205,11 +240,6 @@ class JobOperationModelTest(TestCase):
             job=self.job,
             operation=self.operation,
             sequence_order=1,
-            operation_name='Color Printing',
-            makeready_price=Decimal('15.00'),
-            price_per_sheet=Decimal('0.05'),
-            makeready_time_minutes=30,
-            sheets_per_minute=100,
             quantity_before=1000,
             quantity_after=1000,
             processing_quantity=1030,
@@ -228,10 +258,6 @@ class JobOperationModelTest(TestCase):
             job=self.job,
             operation=self.operation,
             sequence_order=1,
-            operation_name='Color Printing',
-            makeready_price=Decimal('15.00'),
-            price_per_sheet=Decimal('0.05'),
-            makeready_time_minutes=30,
             quantity_before=1000,
             quantity_after=1000,
             processing_quantity=1000,
@@ -248,10 +274,6 @@ class JobOperationModelTest(TestCase):
             job=self.job,
             operation=self.operation,
             sequence_order=1,
-            operation_name='Color Printing',
-            makeready_price=Decimal('15.00'),
-            price_per_sheet=Decimal('0.05'),
-            makeready_time_minutes=30,
             quantity_before=1000,
             quantity_after=1000,
             processing_quantity=1000,
@@ -268,10 +290,6 @@ class JobOperationModelTest(TestCase):
             job=self.job,
             operation=self.operation,
             sequence_order=1,
-            operation_name='Printing',
-            makeready_price=Decimal('15.00'),
-            price_per_sheet=Decimal('0.05'),
-            makeready_time_minutes=30,
             quantity_before=500,  # print run (quantity/n_up)
             quantity_after=500,
             waste_sheets=30,
@@ -293,10 +311,6 @@ class JobOperationModelTest(TestCase):
             job=self.job,
             operation=cutting_operation,
             sequence_order=2,
-            operation_name='Cutting',
-            makeready_price=Decimal('5.00'),
-            price_per_sheet=Decimal('0.02'),
-            makeready_time_minutes=15,
             quantity_before=500,
             quantity_after=1000,  # doubled due to cutting
             processing_quantity=500,
@@ -316,10 +330,6 @@ class JobOperationModelTest(TestCase):
             job=self.job,
             operation=self.operation,
             sequence_order=1,
-            operation_name='Custom Cutting',
-            makeready_price=Decimal('5.00'),
-            price_per_sheet=Decimal('0.02'),
-            makeready_time_minutes=15,
             operation_parameters={'cut_pieces': 4, 'cut_type': 'straight'},
             quantity_before=1000,
             quantity_after=4000,
@@ -488,3 +498,1268 @@ class JobVariantModelTest(TestCase):
         self.assertEqual(variants[0].quantity, 500)
         self.assertEqual(variants[1].quantity, 1000)
         self.assertEqual(variants[2].quantity, 2000)
+
+
+class PrintingCalculatorTest(TestCase):
+    """Tests for the PrintingCalculator service."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com')
+        self.client = Client.objects.create(company_name='Test Client', email='client@example.com')
+
+        self.paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        self.paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+
+        self.job = Job.objects.create(
+            client=self.client,
+            order_type='flyer',
+            order_name='Test Job',
+            quantity=1000,
+            paper_type=self.paper_type,
+            printing_size=self.paper_size,
+            selling_size=self.paper_size,
+            colors_front=4,
+            colors_back=0,
+            created_by=self.user
+        )
+
+        category = OperationCategory.objects.create(name='Printing')
+        self.operation = Operation.objects.create(
+            name='Color Printing',
+            category=category,
+            makeready_price=Decimal('15.00'),
+            price_per_sheet=Decimal('0.05'),
+            makeready_time_minutes=30,
+            sheets_per_minute=100
+        )
+        JobOperationManager.add_operation(self.job, self.operation)
+        PriceCatalogVersion.clear_cache()
+
+    def test_calculation_stores_category_breakdown(self):
+        """Test that the per-category time and cost is saved with the totals."""
+        PrintingCalculator(self.job).calculate_job()
+
+        self.job.refresh_from_db()
+        job_operation = self.job.job_operations.get()
+        self.assertEqual(self.job.category_breakdown, [{
+            'category': 'Printing',
+            'time_minutes': job_operation.total_time_minutes,
+            'cost': str(job_operation.total_cost),
+        }])
+        self.assertEqual(self.job.get_time_by_category(), {'Printing': job_operation.total_time_minutes})
+
+    def test_calculation_records_catalog_version(self):
+        """Test that a calculation references the catalog version it used."""
+        result = PrintingCalculator(self.job).calculate_job()
+
+        self.assertTrue(result['success'])
+        self.job.refresh_from_db()
+        job_operation = self.job.job_operations.get()
+        self.assertIsNotNone(self.job.catalog_version)
+        self.assertEqual(job_operation.catalog_version, self.job.catalog_version)
+
+    def test_operation_name_comes_from_catalog_version(self):
+        """Test that renaming the live operation does not change quoted steps."""
+        PrintingCalculator(self.job).calculate_job()
+
+        self.operation.name = 'Renamed Printing'
+        self.operation.save()
+
+        job_operation = self.job.job_operations.get()
+        self.assertEqual(job_operation.operation_name, 'Color Printing')
+
+    def test_quote_does_not_modify_job(self):
+        """Test that quoting leaves the stored job untouched."""
+        result = PrintingCalculator(self.job).quote(quantity=5000)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['quantity'], 5000)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'draft')
+        self.assertIsNone(self.job.total_cost)
+        self.assertIsNone(self.job.catalog_version)
+
+    def test_requote_against_historical_version(self):
+        """Test comparing the quoted catalog version with current prices."""
+        PrintingCalculator(self.job).calculate_job()
+        self.job.refresh_from_db()
+        quoted_version = self.job.catalog_version
+
+        self.operation.makeready_price = Decimal('25.00')
+        self.operation.save()
+        current_version = PriceCatalogVersion.current()
+        self.assertNotEqual(current_version.pk, quoted_version.pk)
+
+        quoted = PrintingCalculator(
+            self.job, catalog_version=PriceCatalogVersion.load(quoted_version.pk)
+        ).quote()
+        current = PrintingCalculator(self.job, catalog_version=current_version).quote()
+        comparison = compare_quotes(quoted, current)
+
+        self.assertEqual(round(quoted['total_cost'], 2), self.job.total_cost)
+        self.assertEqual(comparison['operations'][0]['total_cost']['delta'], Decimal('10.00'))
+        self.assertEqual(comparison['total_cost']['delta'], Decimal('10.00'))
+        self.assertEqual(comparison['paper_cost']['delta'], Decimal('0'))
+
+    def test_loaded_versions_are_cached(self):
+        """Test that loading a catalog version twice reuses the same instance."""
+        version = PriceCatalogVersion.current()
+
+        self.assertIs(PriceCatalogVersion.load(version.pk), PriceCatalogVersion.load(version.pk))
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=False)
+class JobCalculationTaskTest(TestCase):
+    """Tests for job calculations run as background tasks."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com')
+        customer = Client.objects.create(company_name='Test Client', email='client@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+
+        self.job = Job.objects.create(
+            client=customer,
+            order_type='flyer',
+            order_name='Test Job',
+            quantity=1000,
+            paper_type=paper_type,
+            printing_size=paper_size,
+            selling_size=paper_size,
+            created_by=self.user
+        )
+        operation = Operation.objects.create(
+            name='Cutting',
+            category=OperationCategory.objects.create(name='Finishing'),
+            makeready_price=Decimal('10.00'),
+            price_per_sheet=Decimal('0.01')
+        )
+        JobOperationManager.add_operation(self.job, operation)
+
+    def test_calculate_job_task(self):
+        """Test that the worker calculates a queued job."""
+        background_task = enqueue(
+            job_tasks.calculate_job, reference=job_tasks.job_reference(self.job.pk), job_id=self.job.pk
+        )
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'draft')
+
+        run_worker('test-worker', burst=True)
+
+        background_task.refresh_from_db()
+        self.job.refresh_from_db()
+        self.assertEqual(background_task.status, BackgroundTask.STATUS_SUCCEEDED)
+        self.assertEqual(self.job.status, 'calculated')
+
+    def test_calculate_variants_task_reports_progress(self):
+        """Test that variant calculation reports one step per quantity."""
+        background_task = enqueue(
+            job_tasks.calculate_variants, job_id=self.job.pk, quantities=[500, 1000, 2000]
+        )
+
+        run_worker('test-worker', burst=True)
+
+        background_task.refresh_from_db()
+        self.assertEqual(background_task.status, BackgroundTask.STATUS_SUCCEEDED)
+        self.assertEqual(background_task.result['created'], 3)
+        self.assertEqual(background_task.progress_current, 3)
+        self.assertEqual(self.job.variants.count(), 3)
+
+        variant_events = background_task.events.filter(event='variant')
+        self.assertEqual([event.data['quantity'] for event in variant_events], [500, 1000, 2000])
+
+    def test_unchanged_recalculation_is_coalesced(self):
+        """Test that recalculating unchanged inputs reuses the stored result."""
+        first = PrintingCalculator(self.job).calculate_job()
+        self.assertNotIn('coalesced', first)
+        self.job.refresh_from_db()
+        calculated_at = self.job.calculated_at
+
+        second = PrintingCalculator(self.job).calculate_job()
+        self.assertTrue(second['coalesced'])
+        self.assertEqual(second['total_cost'], first['total_cost'])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.calculated_at, calculated_at)
+
+        self.job.quantity = 2000
+        self.job.save()
+        third = PrintingCalculator(self.job).calculate_job()
+        self.assertNotIn('coalesced', third)
+
+    def test_duplicate_calculation_is_not_queued_twice(self):
+        """Test that enqueue(dedupe=True) returns the task already in flight."""
+        first = enqueue(job_tasks.calculate_job, dedupe=True, job_id=self.job.pk)
+        second = enqueue(job_tasks.calculate_job, dedupe=True, job_id=self.job.pk)
+
+        self.assertEqual(first.pk, second.pk)
+        run_worker('test-worker', burst=True)
+        third = enqueue(job_tasks.calculate_job, dedupe=True, job_id=self.job.pk)
+        self.assertNotEqual(third.pk, first.pk)
+
+    @override_settings(ADMISSION_USER_LIMIT=1)
+    def test_queued_calculations_are_limited_per_user(self):
+        """Test that calculations are admitted against the user's queued tasks."""
+        cache.clear()
+        self.client.force_login(self.user)
+        url = reverse('jobs:detail', args=[self.job.pk])
+
+        self.client.post(url, {'calculate': '1'})
+        # Calculating the same job again joins the queued task
+        self.assertEqual(self.client.post(url, {'calculate': '1'}).status_code, 302)
+        self.assertEqual(BackgroundTask.objects.count(), 1)
+
+        other_job = Job.objects.create(
+            client=self.job.client, order_type='flyer', order_name='Other Job', quantity=500,
+            paper_type=self.job.paper_type, printing_size=self.job.printing_size,
+            selling_size=self.job.selling_size, created_by=self.user
+        )
+        response = self.client.post(
+            reverse('jobs:detail', args=[other_job.pk]), {'calculate': '1'}, HTTP_ACCEPT='application/json'
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '5')
+
+        run_worker('test-worker', burst=True)
+        response = self.client.post(reverse('jobs:detail', args=[other_job.pk]), {'calculate': '1'})
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(ADMISSION_USER_LIMIT=2)
+    def test_automatic_recalculations_do_not_use_up_the_limit(self):
+        """Test that calculating right after editing two jobs is admitted."""
+        cache.clear()
+        other_job = Job.objects.create(
+            client=self.job.client, order_type='flyer', order_name='Other Job', quantity=500,
+            paper_type=self.job.paper_type, printing_size=self.job.printing_size,
+            selling_size=self.job.selling_size, created_by=self.user
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            job_tasks.schedule_recalculation(self.job, user=self.user)
+            job_tasks.schedule_recalculation(other_job, user=self.user)
+        self.assertEqual(BackgroundTask.objects.active().filter(created_by=self.user).count(), 2)
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('jobs:detail', args=[self.job.pk]), {'calculate': '1'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(BackgroundTask.objects.filter(name='jobs.calculate_job').exists())
+
+    def test_edit_page_calculation_is_queued(self):
+        """Test that calculating from the edit page hands the work to a worker."""
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('jobs:edit', args=[self.job.pk]), {'calculate': '1'})
+
+        self.assertRedirects(response, reverse('jobs:detail', args=[self.job.pk]), fetch_redirect_response=False)
+        background_task = BackgroundTask.objects.get(name='jobs.calculate_job')
+        self.assertEqual(background_task.status, BackgroundTask.STATUS_QUEUED)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'draft')
+
+    def test_idempotency_key_replays_response(self):
+        """Test that a retried POST with the same key is not executed again."""
+        self.client.force_login(self.user)
+        url = reverse('jobs:change_status', args=[self.job.pk])
+
+        first = self.client.post(
+            url, json.dumps({'status': 'waiting_client'}), content_type='application/json',
+            headers={'Idempotency-Key': 'status-1'}
+        )
+        self.assertEqual(first.json()['new_status'], 'waiting_client')
+
+        # Change the status out of band; a replay must not undo it
+        Job.objects.filter(pk=self.job.pk).update(status='approved')
+        replay = self.client.post(
+            url, json.dumps({'status': 'waiting_client'}), content_type='application/json',
+            headers={'Idempotency-Key': 'status-1'}
+        )
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), first.json())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'approved')
+
+        mismatch = self.client.post(
+            url, json.dumps({'status': 'rejected'}), content_type='application/json',
+            headers={'Idempotency-Key': 'status-1'}
+        )
+        self.assertEqual(mismatch.status_code, 422)
+
+
+class JobQuoteAsyncViewTest(TestCase):
+    """Tests for the async quote and summary endpoints."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com')
+        customer = Client.objects.create(company_name='Test Client', email='client@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+
+        self.job = Job.objects.create(
+            client=customer,
+            order_type='flyer',
+            order_name='Test Job',
+            quantity=1000,
+            paper_type=paper_type,
+            printing_size=paper_size,
+            selling_size=paper_size,
+            created_by=self.user
+        )
+        operation = Operation.objects.create(
+            name='Cutting',
+            category=OperationCategory.objects.create(name='Finishing'),
+            makeready_price=Decimal('10.00'),
+            price_per_sheet=Decimal('0.01')
+        )
+        JobOperationManager.add_operation(self.job, operation)
+        PriceCatalogVersion.clear_cache()
+
+    async def test_quote_matches_sync_calculator(self):
+        """Test that the async quote endpoint prices like the calculator."""
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(
+            reverse('jobs:quote', args=[self.job.pk]), {'quantities': '1000,5000'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        quotes = response.json()['quotes']
+        self.assertEqual([quote['quantity'] for quote in quotes], [1000, 5000])
+        expected = await sync_to_async(PrintingCalculator(self.job).quote)(5000)
+        self.assertEqual(quotes[1]['total_cost'], str(round(expected['total_cost'], 2)))
+
+    async def test_quote_rejects_too_many_quantities(self):
+        """Test that the quantity list is bounded."""
+        await self.async_client.aforce_login(self.user)
+        quantities = ','.join(str(quantity) for quantity in range(1, 30))
+
+        response = await self.async_client.get(
+            reverse('jobs:quote', args=[self.job.pk]), {'quantities': quantities}
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_summary_requires_owner(self):
+        """Test that other users cannot read a job summary."""
+        other = await User.objects.acreate(username='other', email='other@example.com')
+        await self.async_client.aforce_login(other)
+
+        response = await self.async_client.get(reverse('jobs:summary', args=[self.job.pk]))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class JobRequoteViewTest(TestCase):
+    """Tests for the job re-quote view."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com')
+        customer = Client.objects.create(company_name='Test Client', email='client@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+
+        self.job = Job.objects.create(
+            client=customer,
+            order_type='flyer',
+            order_name='Test Job',
+            quantity=1000,
+            paper_type=paper_type,
+            printing_size=paper_size,
+            selling_size=paper_size,
+            created_by=self.user
+        )
+        self.operation = Operation.objects.create(
+            name='Cutting',
+            category=OperationCategory.objects.create(name='Finishing'),
+            makeready_price=Decimal('10.00'),
+            price_per_sheet=Decimal('0.01')
+        )
+        JobOperationManager.add_operation(self.job, self.operation)
+        PrintingCalculator(self.job).calculate_job()
+        PriceCatalogVersion.clear_cache()
+        self.client.force_login(self.user)
+
+    def test_requote_shows_price_changes(self):
+        """Test that the view compares quoted and current prices."""
+        self.operation.makeready_price = Decimal('12.00')
+        self.operation.save()
+
+        response = self.client.get(reverse('jobs:requote', args=[self.job.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['prices_changed'])
+        self.assertEqual(response.context['comparison']['total_cost']['delta'], Decimal('2.00'))
+
+    def test_recalculate_with_current_prices(self):
+        """Test that posting recalculates the job against the current catalog."""
+        self.operation.makeready_price = Decimal('12.00')
+        self.operation.save()
+        quoted_version_id = self.job.catalog_version_id
+
+        response = self.client.post(
+            reverse('jobs:requote', args=[self.job.pk]), {'catalog_version': 'current'}
+        )
+
+        self.assertRedirects(response, reverse('jobs:detail', args=[self.job.pk]), fetch_redirect_response=False)
+        self.job.refresh_from_db()
+        self.assertNotEqual(self.job.catalog_version_id, quoted_version_id)
+
+
+@override_settings(DASHBOARD_FEED_TIMEOUT=0)
+class JobStatusChangeTest(TestCase):
+    """Tests for the job status change feed."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com')
+        self.customer = Client.objects.create(company_name='Test Client', email='client@example.com')
+        self.paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        self.paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        self.job = self._create_job(order_name='Test Job', quantity=1000, created_by=self.user)
+
+    def _create_job(self, **kwargs):
+        return Job.objects.create(
+            client=self.customer,
+            order_type='flyer',
+            paper_type=self.paper_type,
+            printing_size=self.paper_size,
+            selling_size=self.paper_size,
+            **kwargs
+        )
+
+    def test_transitions_are_recorded(self):
+        """Test that creating and changing status appends to the log."""
+        job = Job.objects.get(pk=self.job.pk)
+        job.status = 'approved'
+        job.save()
+        job.order_name = 'Renamed'
+        job.save()
+
+        changes = list(JobStatusChange.objects.values_list('from_status', 'to_status'))
+        self.assertEqual(changes, [('', 'draft'), ('draft', 'approved')])
+
+    def test_templates_are_not_recorded(self):
+        """Test that template jobs stay out of the feed."""
+        self._create_job(order_name='Template', quantity=1000, is_template=True, created_by=self.user)
+
+        self.assertEqual(JobStatusChange.objects.count(), 1)
+
+    def test_feed_returns_changes_since_cursor(self):
+        """Test the dashboard change feed endpoint."""
+        cursor = JobStatusChange.latest_id()
+        self.job.status = 'urgent'
+        self.job.save()
+        other_user = User.objects.create_user(username='other', email='other@example.com')
+        self._create_job(order_name='Other Job', quantity=500, created_by=other_user)
+        self.client.force_login(self.user)
+
+        data = self.client.get(reverse('core:dashboard_changes'), {'since': cursor}).json()
+
+        self.assertEqual(len(data['changes']), 1)
+        self.assertEqual(data['changes'][0]['to_status'], 'urgent')
+        self.assertEqual(data['changes'][0]['job_id'], self.job.pk)
+
+        data = self.client.get(reverse('core:dashboard_changes'), {'since': data['cursor']}).json()
+        self.assertEqual(data['changes'], [])
+
+    def test_dashboard_is_two_queries_and_follows_status_changes(self):
+        """Test that the dashboard is built with two queries and cached until a status changes."""
+        cache.clear()
+        jobs = [
+            self._create_job(order_name=f'Urgent {number}', quantity=100, created_by=self.user, status='urgent')
+            for number in range(DASHBOARD_LIST_SIZE + 2)
+        ]
+
+        with self.assertNumQueries(2):
+            dashboard = get_dashboard(self.user)
+        with self.assertNumQueries(0):
+            get_dashboard(self.user)
+
+        self.assertEqual(dashboard['urgent_count'], DASHBOARD_LIST_SIZE + 2)
+        self.assertEqual(dashboard['urgent_jobs'], jobs[::-1][:DASHBOARD_LIST_SIZE])
+        self.assertEqual(dashboard['approved_jobs'], [])
+        self.assertEqual(dashboard['status_feed_cursor'], JobStatusChange.latest_id())
+
+        JobStatusChange.set_status(Job.objects.filter(pk=jobs[0].pk), 'approved')
+        dashboard = get_dashboard(self.user)
+        self.assertEqual(dashboard['urgent_count'], DASHBOARD_LIST_SIZE + 1)
+        self.assertEqual(dashboard['approved_jobs'], [jobs[0]])
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:home'))
+        self.assertContains(response, jobs[-1].order_name)
+
+
+class JobEditConflictTest(TestCase):
+    """Tests for optimistic concurrency on job operation edits."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com')
+        customer = Client.objects.create(company_name='Test Client', email='client@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        self.job = Job.objects.create(
+            client=customer,
+            order_type='flyer',
+            order_name='Test Job',
+            quantity=1000,
+            paper_type=paper_type,
+            printing_size=paper_size,
+            selling_size=paper_size,
+            created_by=self.user
+        )
+        category = OperationCategory.objects.create(name='Finishing')
+        self.cutting = Operation.objects.create(name='Cutting', category=category)
+        self.folding = Operation.objects.create(name='Folding', category=category)
+
+    def test_edits_bump_version(self):
+        """Test that every structural edit advances the version."""
+        first = JobOperationManager.add_operation(self.job, self.cutting)
+        second = JobOperationManager.add_operation(self.job, self.folding)
+        JobOperationManager.reorder_operations(self.job, [second.pk, first.pk])
+        JobOperationManager.remove_operation(first)
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.version, 5)
+
+    def test_stale_edit_raises_conflict(self):
+        """Test that an edit based on an old version is rejected."""
+        stale_job = Job.objects.get(pk=self.job.pk)
+        JobOperationManager.add_operation(self.job, self.cutting)
+
+        with self.assertRaises(JobEditConflict) as conflict:
+            JobOperationManager.add_operation(stale_job, self.folding)
+
+        self.assertEqual(conflict.exception.current_version, 2)
+        self.assertEqual(self.job.job_operations.count(), 1)
+
+    def test_saving_stale_job_keeps_version(self):
+        """Test that a full save of an old instance does not roll the version back."""
+        stale_job = Job.objects.get(pk=self.job.pk)
+        JobOperationManager.add_operation(self.job, self.cutting)
+
+        stale_job.order_name = 'Renamed'
+        stale_job.save()
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.version, 2)
+        self.assertEqual(self.job.order_name, 'Renamed')
+
+    def test_reorder_with_stale_version_returns_409(self):
+        """Test the conflict response of the reorder endpoint."""
+        first = JobOperationManager.add_operation(self.job, self.cutting)
+        second = JobOperationManager.add_operation(self.job, self.folding)
+        self.client.force_login(self.user)
+        url = reverse('jobs:reorder_operations', args=[self.job.pk])
+
+        response = self.client.post(
+            url, json.dumps({'operation_ids': [second.pk, first.pk], 'version': 1}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 3)
+
+        response = self.client.post(
+            url, json.dumps({'operation_ids': [second.pk, first.pk], 'version': 3}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.json(), {'success': True, 'version': 4})
+
+
+    def test_detail_page_edit_with_stale_version_returns_409(self):
+        """Test that structural edits from the detail page check the version they carry."""
+        JobOperationManager.add_operation(self.job, self.cutting)
+        self.client.force_login(self.user)
+        url = reverse('jobs:detail', args=[self.job.pk])
+
+        response = self.client.post(
+            url, {'add_operation': '', 'operation': self.folding.pk, 'version': 1},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 2)
+
+        response = self.client.post(
+            url, {'add_operation': '', 'operation': self.folding.pk},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.job.job_operations.count(), 1)
+
+        response = self.client.post(
+            url, {'add_operation': '', 'operation': self.folding.pk, 'version': 2},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.json()['version'], 3)
+        self.assertEqual(self.job.job_operations.count(), 2)
+
+    def test_edit_endpoints_require_version(self):
+        """Test that structural edits without a usable version are rejected."""
+        first = JobOperationManager.add_operation(self.job, self.cutting)
+        second = JobOperationManager.add_operation(self.job, self.folding)
+        self.client.force_login(self.user)
+        json_edits = {
+            reverse('jobs:reorder_operations', args=[self.job.pk]): {'operation_ids': [second.pk, first.pk]},
+            reverse('jobs:apply_edits', args=[self.job.pk]): {'edits': [{'op': 'remove', 'id': first.pk}]},
+        }
+        form_edits = {
+            reverse('jobs:add_operation', args=[self.job.pk]): {'operation_id': self.folding.pk},
+            reverse('jobs:remove_operation', args=[self.job.pk, first.pk]): {},
+            reverse('jobs:move_operation', args=[self.job.pk, first.pk]): {'position': 2},
+        }
+
+        for version in (None, 'latest'):
+            extra = {} if version is None else {'version': version}
+            for url, data in json_edits.items():
+                response = self.client.post(url, json.dumps({**data, **extra}), content_type='application/json')
+                self.assertEqual(response.status_code, 400, url)
+            for url, data in form_edits.items():
+                self.assertEqual(self.client.post(url, {**data, **extra}).status_code, 400, url)
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.version, 3)
+        self.assertEqual(list(self.job.job_operations.order_by('sequence_order')), [first, second])
+
+class JobOperationSequenceTest(TestCase):
+    """Tests for gap-based operation sequence keys."""
+
+    def setUp(self):
+        """Set up test data."""
+        user = User.objects.create_user(username='testuser', email='test@example.com')
+        customer = Client.objects.create(company_name='Test Client', email='client@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        self.job = Job.objects.create(
+            client=customer,
+            order_type='flyer',
+            order_name='Test Job',
+            quantity=1000,
+            paper_type=paper_type,
+            printing_size=paper_size,
+            selling_size=paper_size,
+            created_by=user
+        )
+        self.operation = Operation.objects.create(
+            name='Cutting', category=OperationCategory.objects.create(name='Finishing')
+        )
+        self.steps = [JobOperationManager.add_operation(self.job, self.operation) for _ in range(3)]
+
+    def _order(self):
+        return list(self.job.job_operations.order_by('sequence_order').values_list('id', flat=True))
+
+    def test_appended_steps_are_spaced(self):
+        """Test that new steps get keys one gap apart."""
+        self.assertEqual(
+            [step.sequence_order for step in self.steps],
+            [SEQUENCE_GAP, 2 * SEQUENCE_GAP, 3 * SEQUENCE_GAP]
+        )
+
+    def test_insert_and_move_leave_other_steps_alone(self):
+        """Test that inserting and moving only write the affected step."""
+        first, second, third = self.steps
+        inserted = JobOperationManager.insert_operation_after(self.job, first, self.operation)
+        JobOperationManager.move_operation(third, 1)
+
+        self.assertEqual(self._order(), [third.pk, first.pk, inserted.pk, second.pk])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.sequence_order, second.sequence_order), (SEQUENCE_GAP, 2 * SEQUENCE_GAP))
+
+    def test_exhausted_gap_is_rebalanced(self):
+        """Test that repeated inserts at one spot eventually renumber the job."""
+        first = self.steps[0]
+        for _ in range(12):
+            JobOperationManager.insert_operation_after(self.job, first, self.operation)
+            first.refresh_from_db()
+
+        keys = list(self.job.job_operations.order_by('sequence_order').values_list('sequence_order', flat=True))
+        self.assertEqual(len(keys), 15)
+        self.assertEqual(len(set(keys)), 15)
+        self.assertEqual(self._order()[0], first.pk)
+
+    def test_reorder_is_a_single_update(self):
+        """Test that a full reorder is written with one bulk statement."""
+        new_order = [step.pk for step in reversed(self.steps)]
+
+        # Savepoint, version bump, reading the current keys, the bulk UPDATE, release
+        with self.assertNumQueries(5):
+            JobOperationManager.reorder_operations(self.job, new_order)
+
+        self.assertEqual(self._order(), new_order)
+
+
+class JobBatchEditTest(TestCase):
+    """Tests for the batched job-structure edit endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        PriceCatalogVersion.clear_cache()
+        self.user = User.objects.create_user(username='testuser', email='test@example.com')
+        customer = Client.objects.create(company_name='Test Client', email='client@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        self.job = Job.objects.create(
+            client=customer,
+            order_type='flyer',
+            order_name='Test Job',
+            quantity=1000,
+            paper_type=paper_type,
+            printing_size=paper_size,
+            selling_size=paper_size,
+            created_by=self.user
+        )
+        category = OperationCategory.objects.create(name='Finishing')
+        self.cutting = Operation.objects.create(
+            name='Cutting', category=category, makeready_price=Decimal('10.00'), price_per_sheet=Decimal('0.01')
+        )
+        self.folding = Operation.objects.create(
+            name='Folding', category=category, makeready_price=Decimal('5.00'), price_per_sheet=Decimal('0.02')
+        )
+        self.existing = JobOperationManager.add_operation(self.job, self.cutting)
+        self.url = reverse('jobs:apply_edits', args=[self.job.pk])
+        self.client.force_login(self.user)
+
+    def _post(self, payload):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json').json()
+
+    def test_batch_is_applied_and_calculated_once(self):
+        """Test that a batch of edits returns a diff of the changes."""
+        data = self._post({'version': 2, 'edits': [
+            {'op': 'add', 'operation_id': self.folding.pk, 'ref': 'fold'},
+            {'op': 'insert', 'after': 'fold', 'operation_id': self.cutting.pk, 'ref': 'trim'},
+            {'op': 'move', 'id': 'trim', 'position': 1},
+            {'op': 'set_parameters', 'id': self.existing.pk, 'parameters': {'cut_pieces': 2}},
+            {'op': 'set_quantity', 'quantity': 2000},
+        ]})
+
+        self.assertTrue(data['success'])
+        self.assertEqual(data['version'], 3)
+        self.assertIsNone(data['calculation_error'])
+        diff = data['diff']
+        created = {entry['ref']: entry for entry in diff['created']}
+        self.assertEqual(created['trim']['position'], 1)
+        self.assertEqual(created['fold']['position'], 3)
+        changed = {entry['id']: entry for entry in diff['changed']}
+        self.assertEqual(changed[self.existing.pk]['position'], 2)
+        self.assertEqual(changed[self.existing.pk]['parameters'], {'cut_pieces': 2})
+        self.assertEqual(diff['job']['quantity'], 2000)
+        self.assertEqual(diff['job']['status'], 'calculated')
+
+    def test_invalid_edit_rolls_back_batch(self):
+        """Test that one bad edit leaves the job untouched."""
+        data = self._post({'version': 2, 'edits': [
+            {'op': 'remove', 'id': self.existing.pk},
+            {'op': 'add', 'operation_id': 999999},
+        ]})
+
+        self.assertFalse(data['success'])
+        self.assertIn('Edit 2', data['error'])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.version, 2)
+        self.assertTrue(self.job.job_operations.filter(pk=self.existing.pk).exists())
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=False, JOB_RECALCULATION_DELAY=0)
+class JobRecalculationTest(TestCase):
+    """Tests for debounced automatic recalculation of edited jobs."""
+
+    def setUp(self):
+        """Set up test data."""
+        PriceCatalogVersion.clear_cache()
+        user = User.objects.create_user(username='testuser', email='test@example.com')
+        customer = Client.objects.create(company_name='Test Client', email='client@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        self.job = Job.objects.create(
+            client=customer,
+            order_type='flyer',
+            order_name='Test Job',
+            quantity=1000,
+            paper_type=paper_type,
+            printing_size=paper_size,
+            selling_size=paper_size,
+            status='approved',
+            created_by=user
+        )
+        self.operation = Operation.objects.create(
+            name='Cutting',
+            category=OperationCategory.objects.create(name='Finishing'),
+            makeready_price=Decimal('10.00'),
+            price_per_sheet=Decimal('0.01')
+        )
+
+    def test_burst_of_edits_is_calculated_once(self):
+        """Test that several edits queue a single background recalculation."""
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                JobOperationManager.add_operation(self.job, self.operation)
+
+        self.job.refresh_from_db()
+        self.assertTrue(self.job.needs_recalculation)
+        tasks = BackgroundTask.objects.filter(name='jobs.recalculate_job')
+        self.assertEqual(tasks.count(), 1)
+
+        run_worker('test-worker', burst=True)
+
+        self.job.refresh_from_db()
+        self.assertFalse(self.job.needs_recalculation)
+        self.assertIsNotNone(self.job.total_cost)
+        # Automatic recalculation leaves the workflow status alone
+        self.assertEqual(self.job.status, 'approved')
+        self.assertEqual(tasks.get().status, BackgroundTask.STATUS_SUCCEEDED)
+
+
+class JobDetailFragmentTest(TestCase):
+    """Tests for re-rendering sections of the job detail page."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass')
+        customer = Client.objects.create(company_name='Test Client', email='client@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        self.job = Job.objects.create(
+            client=customer,
+            order_type='flyer',
+            order_name='Test Job',
+            quantity=1000,
+            paper_type=paper_type,
+            printing_size=paper_size,
+            selling_size=paper_size,
+            created_by=self.user
+        )
+        self.operation = Operation.objects.create(
+            name='Cutting', category=OperationCategory.objects.create(name='Finishing')
+        )
+        self.client.force_login(self.user)
+
+    def test_fragments_endpoint_renders_requested_parts(self):
+        """Test that only the requested sections are rendered."""
+        JobOperationManager.add_operation(self.job, self.operation)
+
+        response = self.client.get(
+            reverse('jobs:fragments', args=[self.job.pk]), {'parts': 'operations'}
+        )
+
+        data = response.json()
+        self.assertEqual(list(data['fragments']), ['operations'])
+        self.assertIn('id="job-operations"', data['fragments']['operations'])
+        self.assertIn('Cutting', data['fragments']['operations'])
+
+        response = self.client.get(reverse('jobs:fragments', args=[self.job.pk]), {'parts': 'catalog'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ajax_post_returns_changed_fragments(self):
+        """Test that an AJAX detail page action gets fragments instead of a redirect."""
+        response = self.client.post(
+            reverse('jobs:detail', args=[self.job.pk]),
+            {'add_quantities': '', 'quantities': '500, 2500'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(list(data['fragments']), ['variants'])
+        self.assertIn('data-quantity="2500"', data['fragments']['variants'])
+        self.assertEqual(data['messages'][0]['level'], 'success')
+
+        # Regular form posts still redirect back to the page
+        response = self.client.post(
+            reverse('jobs:detail', args=[self.job.pk]),
+            {'delete_variant': '', 'variant_id': self.job.variants.first().pk}
+        )
+        self.assertRedirects(response, reverse('jobs:detail', args=[self.job.pk]))
+
+    def test_detail_page_queries_do_not_grow_with_rows(self):
+        """Test that the detail page loads operations and variants in fixed queries."""
+        url = reverse('jobs:detail', args=[self.job.pk])
+        JobOperationManager.add_operation(self.job, self.operation)
+        self.client.post(url, {'add_quantities': '', 'quantities': '500'})
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        # Every request resets the query log, so keep the count now
+        baseline = len(queries)
+
+        for index in range(3):
+            JobOperationManager.add_operation(
+                self.job, Operation.objects.create(
+                    name=f'Folding {index}', category=OperationCategory.objects.create(name=f'Binding {index}')
+                )
+            )
+        self.client.post(url, {'add_quantities': '', 'quantities': '1000, 2500'})
+        with self.assertNumQueries(baseline):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['job_operations']), 4)
+        self.assertEqual(len(response.context['variants']), 3)
+
+
+class JobListPaginationTest(TestCase):
+    """Tests for cursor pagination of the job lists."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        for number in range(25):
+            Job.objects.create(
+                client=Client.objects.create(company_name=f'Client {number}', email=f'c{number}@example.com'),
+                order_type='flyer',
+                order_name=f'Job {number}',
+                quantity=1000,
+                paper_type=paper_type,
+                printing_size=paper_size,
+                selling_size=paper_size,
+                created_by=self.user
+            )
+        self.client.force_login(self.user)
+
+    def test_next_page_via_cursor(self):
+        """Test that the second page continues where the first stopped."""
+        response = self.client.get(reverse('jobs:list'))
+        first_page = [job.pk for job in response.context['jobs']]
+        self.assertEqual(len(first_page), 20)
+        self.assertTrue(response.context['next_page_url'])
+
+        response = self.client.get(reverse('jobs:list') + response.context['next_page_url'])
+        second_page = [job.pk for job in response.context['jobs']]
+        self.assertEqual(len(second_page), 5)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertEqual(response.context['next_page_url'], '')
+
+        response = self.client.get(reverse('jobs:list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_results_page_by_rank(self):
+        """Test that ranked search results page without repeats."""
+        response = self.client.get(reverse('jobs:list'), {'search': 'job'})
+        first_page = [job.pk for job in response.context['jobs']]
+
+        response = self.client.get(reverse('jobs:list') + response.context['next_page_url'])
+        second_page = [job.pk for job in response.context['jobs']]
+        self.assertEqual(len(set(first_page) | set(second_page)), 25)
+
+    def test_sort_and_filter_by_operations_cost(self):
+        """Test that the list sorts and filters on the generated operations cost column."""
+        for job in Job.objects.all():
+            Job.objects.filter(pk=job.pk).update(
+                total_material_cost=Decimal(job.pk % 7 * 10 + 5), paper_cost=Decimal('5.00')
+            )
+        url = reverse('jobs:list')
+
+        response = self.client.get(url, {'sort': 'operations_cost'})
+        costs = [job.operations_cost for job in response.context['jobs']]
+        response = self.client.get(url + response.context['next_page_url'])
+        costs += [job.operations_cost for job in response.context['jobs']]
+        self.assertEqual(len(costs), 25)
+        self.assertEqual(costs, sorted(costs, reverse=True))
+
+        response = self.client.get(url, {'min_operations_cost': '60'})
+        self.assertTrue(response.context['jobs'])
+        self.assertTrue(all(job.operations_cost == Decimal('60.00') for job in response.context['jobs']))
+
+    def test_infinite_scroll_json(self):
+        """Test that AJAX requests get rendered rows and the next page URL."""
+        response = self.client.get(reverse('jobs:pdf_export_list'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        data = response.json()
+        self.assertEqual(data['html'].count('card h-100'), 20)
+        self.assertIn('cursor=', data['next_url'])
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        """Test that client names do not cost a query per row."""
+        with self.assertNumQueries(3):
+            self.client.get(reverse('jobs:list'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+
+class JobFacetTest(TestCase):
+    """Tests for faceted job filtering."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass')
+        self.acme = Client.objects.create(company_name='Acme', email='acme@example.com')
+        self.globex = Client.objects.create(company_name='Globex', email='globex@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        for client, order_type, status, quantity in [
+            (self.acme, 'flyer', 'draft', 500),
+            (self.acme, 'flyer', 'approved', 1000),
+            (self.acme, 'book', 'approved', 2000),
+            (self.globex, 'poster', 'urgent', 5000),
+        ]:
+            Job.objects.create(
+                client=client, order_type=order_type, order_name='Job', quantity=quantity, status=status,
+                paper_type=paper_type, printing_size=paper_size, selling_size=paper_size, created_by=self.user
+            )
+        self.client.force_login(self.user)
+
+    def facet(self, response, name):
+        facet = next(facet for facet in response.context['facets'] if facet['name'] == name)
+        return {option['value']: (option['count'], option['selected']) for option in facet['options']}
+
+    def test_filters_combine_and_counts_exclude_own_facet(self):
+        """Test that a facet's counts ignore its own selection but honour the others."""
+        response = self.client.get(reverse('jobs:list'), {
+            'status': 'approved', 'order_type': ['flyer', 'book'], 'quantity_min': '800',
+        })
+
+        self.assertEqual(len(response.context['jobs']), 2)
+        self.assertEqual(self.facet(response, 'status'), {'approved': (2, True)})
+        self.assertEqual(self.facet(response, 'order_type'), {'flyer': (1, True), 'book': (1, True)})
+        self.assertEqual(self.facet(response, 'client'), {str(self.acme.pk): (2, False)})
+        self.assertTrue(response.context['filters_active'])
+
+    def test_facets_are_one_query(self):
+        """Test that all facet counts come from a single query."""
+        from .facets import JobFilters
+        from django.http import QueryDict
+
+        filters = JobFilters(QueryDict('status=urgent&client=%d&cost_max=oops&client=x' % self.globex.pk))
+        with self.assertNumQueries(1):
+            facets = filters.facet_counts(Job.objects.filter(is_template=False))
+
+        statuses = next(facet for facet in facets if facet['name'] == 'status')['options']
+        self.assertEqual([(option['value'], option['count']) for option in statuses], [('urgent', 1)])
+
+        # A selected client that matches nothing stays listed so it can be unticked
+        filters = JobFilters(QueryDict('status=draft&client=%d' % self.globex.pk))
+        facets = filters.facet_counts(Job.objects.filter(is_template=False))
+        clients = next(facet for facet in facets if facet['name'] == 'client')['options']
+        self.assertIn({'value': str(self.globex.pk), 'label': 'Globex', 'count': 0, 'selected': True}, clients)
+        self.assertEqual(filters.ranges, {})
+
+class JobSearchTest(TestCase):
+    """Tests for the full-text job search index."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass')
+        self.customer = Client.objects.create(
+            company_name='Acme Printing', contact_person='Maria Petrova', email='client@example.com'
+        )
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        job_fields = {
+            'order_type': 'flyer', 'quantity': 1000, 'paper_type': paper_type,
+            'printing_size': paper_size, 'selling_size': paper_size, 'created_by': self.user,
+        }
+        self.flyer = Job.objects.create(
+            client=self.customer, order_name='Spring flyers', notes='Matte lamination', **job_fields
+        )
+        self.other = Job.objects.create(
+            client=Client.objects.create(company_name='Globex', email='globex@example.com'),
+            order_name='Annual report', **job_fields
+        )
+        self.client.force_login(self.user)
+
+    def search(self, query):
+        return list(search_jobs(Job.objects.all(), query).order_by('-search_rank'))
+
+    def test_search_covers_all_fields(self):
+        """Test that jobs are found by number, names, client and notes prefixes."""
+        for query in [self.flyer.job_number, 'spring', 'acme', 'petrov', 'lamin', 'Acme spring']:
+            self.assertEqual(self.search(query), [self.flyer], query)
+        self.assertEqual(self.search('acme annual'), [])
+
+    def test_index_follows_edits(self):
+        """Test that job and client edits are searchable right away."""
+        self.other.notes = 'Gloss varnish'
+        self.other.save()
+        self.assertEqual(self.search('varnish'), [self.other])
+
+        self.customer.company_name = 'Initech'
+        self.customer.save()
+        self.assertEqual(self.search('initech'), [self.flyer])
+        self.assertEqual(self.search('acme'), [])
+
+    def test_list_view_search(self):
+        """Test that the job list searches the index."""
+        response = self.client.get(reverse('jobs:list'), {'search': 'globex'})
+
+        self.assertEqual(list(response.context['jobs']), [self.other])
+
+    def test_job_autocomplete(self):
+        """Test that the job picker searches only the user's jobs."""
+        stranger = User.objects.create_user(username='stranger', email='stranger@example.com', password='pass')
+        Job.objects.filter(pk=self.other.pk).update(created_by=stranger)
+        url = reverse('jobs:autocomplete')
+
+        results = self.client.get(url, {'q': 'spring'}).json()['results']
+        self.assertEqual(results, [{'id': self.flyer.pk, 'text': f'Spring flyers ({self.flyer.job_number})'}])
+        self.assertEqual(self.client.get(url, {'q': 'annual'}).json()['results'], [])
+
+        response = self.client.get(reverse('jobs:pdf_export_history'), {'job': self.flyer.pk})
+        self.assertEqual(response.context['selected_job'], self.flyer)
+        self.assertContains(response, f'data-autocomplete-url="{url}"')
+
+
+class JobArchiveTest(TestCase):
+    """Tests for moving old jobs to the archive."""
+
+    def setUp(self):
+        """Set up test data."""
+        archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_root)
+        settings_override = self.settings(JOB_ARCHIVE_ROOT=archive_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass')
+        self.customer = Client.objects.create(company_name='Acme', email='acme@example.com')
+        paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        category = OperationCategory.objects.create(name='Printing')
+        operation = Operation.objects.create(
+            name='Color Printing', category=category, makeready_price=Decimal('15.00'),
+            price_per_sheet=Decimal('0.05'), makeready_time_minutes=30, sheets_per_minute=100
+        )
+
+        def create_job(status, months_old):
+            job = Job.objects.create(
+                client=self.customer, order_type='flyer', order_name=f'{status} job', quantity=1000,
+                status=status, total_cost=Decimal('100.00'), paper_type=paper_type,
+                printing_size=paper_size, selling_size=paper_size, created_by=self.user
+            )
+            Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(days=31 * months_old))
+            return job
+
+        self.old_draft = create_job('draft', 13)
+        self.recent = create_job('finished', 1)
+        self.old = create_job('finished', 13)
+        JobOperation.objects.create(
+            job=self.old, operation=operation, sequence_order=SEQUENCE_GAP, quantity_before=1000,
+            quantity_after=1000, processing_quantity=1030, total_cost=Decimal('66.50'), total_time_minutes=40
+        )
+        JobVariant.objects.create(
+            job=self.old, quantity=2000, total_cost=Decimal('150.00'), total_time_minutes=60,
+            print_run=2000, waste_sheets=30, sheets_to_buy=1015, paper_weight_kg=Decimal('10.000')
+        )
+        self.client.force_login(self.user)
+
+    def test_archive_moves_old_finished_jobs_and_reads_them_back(self):
+        """Test that archived jobs leave the job tables but stay readable."""
+        revenue = Client.objects.get(pk=self.customer.pk).get_total_revenue()
+
+        archived = archive_jobs(timezone.now() - timedelta(days=6 * 31), batch_size=1)
+
+        self.assertEqual(archived, 1)
+        self.assertEqual(set(Job.objects.values_list('pk', flat=True)), {self.old_draft.pk, self.recent.pk})
+        self.assertFalse(JobOperation.objects.filter(job_id=self.old.pk).exists())
+        # Client totals still count the archived job
+        customer = Client.objects.get(pk=self.customer.pk)
+        self.assertEqual(customer.get_total_revenue(), revenue)
+        self.assertEqual(customer.get_jobs_count(), 3)
+
+        entry = ArchivedJob.objects.get(job_number=self.old.job_number)
+        archived_job = load_archived_job(entry)
+        self.assertEqual(archived_job['job'].order_name, 'finished job')
+        self.assertEqual(archived_job['job'].labels['client'], str(self.customer))
+        self.assertEqual([step.labels['operation'] for step in archived_job['job_operations']], ['Color Printing'])
+        self.assertEqual(archived_job['variants'][0].total_cost, Decimal('150.00'))
+        self.assertEqual([change.to_status for change in archived_job['status_changes']], ['finished'])
+
+        # The old URL leads to the read-only archived copy
+        response = self.client.get(reverse('jobs:detail', kwargs={'pk': self.old.pk}))
+        self.assertRedirects(response, entry.get_absolute_url())
+        response = self.client.get(entry.get_absolute_url())
+        self.assertContains(response, 'Color Printing')
+
+        response = self.client.get(reverse('jobs:archive'), {'job_number': self.old.job_number[:8].lower()})
+        self.assertEqual(list(response.context['archived_jobs']), [entry])
+
+        # Archived job numbers are not handed out again
+        new_job = Job.objects.create(
+            client=self.customer, order_type='flyer', order_name='New', quantity=10,
+            paper_type=self.old_draft.paper_type, printing_size=self.old_draft.printing_size,
+            selling_size=self.old_draft.selling_size, created_by=self.user
+        )
+        self.assertNotEqual(new_job.job_number, entry.job_number)
+
+
+    def test_archive_refuses_without_configured_root(self):
+        """Test that nothing is archived to a default directory outside DEBUG."""
+        with self.settings(JOB_ARCHIVE_ROOT='', DEBUG=False):
+            with self.assertRaises(ImproperlyConfigured):
+                archive_jobs(timezone.now() - timedelta(days=6 * 31))
+
+        self.assertTrue(Job.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(ArchivedJob.objects.exists())
+
+class JobCreateViewTest(TestCase):
+    """Tests for creating jobs with operations."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass')
+        self.customer = Client.objects.create(company_name='Acme', email='acme@example.com')
+        self.paper_type = PaperType.objects.create(name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50'))
+        self.paper_size = PaperSize.objects.create(name='A4', width_cm=Decimal('21.0'), height_cm=Decimal('29.7'))
+        category = OperationCategory.objects.create(name='Finishing')
+        self.operations = [
+            Operation.objects.create(
+                name=f'Step {number}', category=category, makeready_price=Decimal('5.00'),
+                price_per_sheet=Decimal('0.01'), makeready_time_minutes=5, sheets_per_minute=100
+            )
+            for number in range(30)
+        ]
+        # Snapshot the catalog once so every create reuses it
+        self.catalog_version = PriceCatalogVersion.current()
+        self.client.force_login(self.user)
+
+    def post_job(self, url, **extra):
+        data = {
+            'client': self.customer.pk, 'order_type': 'flyer', 'order_name': 'New Job', 'quantity': 1000,
+            'paper_type': self.paper_type.pk, 'printing_size': self.paper_size.pk,
+            'selling_size': self.paper_size.pk, 'end_size': self.paper_size.pk, 'parts_of_selling_size': 1, 'n_up': 1,
+            'colors_front': 4, 'colors_back': 0, 'special_colors': 0, **extra,
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        return Job.objects.latest('pk'), len(queries)
+
+    def selected(self, operations):
+        return json.dumps([
+            {'operation_id': operation.pk, 'sequence_order': position, 'parameters': {'position': position}}
+            for position, operation in enumerate(operations)
+        ])
+
+    def test_selected_operations_take_constant_queries(self):
+        """Test that a 30-step job costs the same number of queries as a 3-step one."""
+        small_job, small_queries = self.post_job(
+            reverse('jobs:create'), selected_operations=self.selected(self.operations[:3])
+        )
+        large_job, large_queries = self.post_job(
+            reverse('jobs:create'), selected_operations=self.selected(self.operations)
+        )
+
+        self.assertEqual(small_job.job_operations.count(), 3)
+        steps = list(large_job.job_operations.order_by('sequence_order'))
+        self.assertEqual([step.operation_id for step in steps], [operation.pk for operation in self.operations])
+        self.assertEqual(steps[5].operation_parameters, {'position': 5})
+        self.assertEqual({step.catalog_version_id for step in steps}, {self.catalog_version.pk})
+        self.assertEqual(large_queries, small_queries)
+
+    def test_template_operations_are_copied(self):
+        """Test that creating from a template copies its operations in order."""
+        template = Job.objects.create(
+            client=self.customer, order_type='flyer', order_name='Template', quantity=1000,
+            is_template=True, template_name='Flyer', paper_type=self.paper_type,
+            printing_size=self.paper_size, selling_size=self.paper_size, created_by=self.user
+        )
+        for position, operation in enumerate(reversed(self.operations[:4]), 1):
+            JobOperationManager.build_job_operation(
+                template, operation, position * 10, catalog_version=self.catalog_version,
+                operation_parameters={'cut_pieces': position}
+            ).save()
+
+        job, _ = self.post_job(f"{reverse('jobs:create')}?template={template.pk}")
+
+        steps = list(job.job_operations.order_by('sequence_order'))
+        self.assertEqual([step.operation_id for step in steps], [operation.pk for operation in reversed(self.operations[:4])])
+        self.assertEqual([step.operation_parameters for step in steps], [{'cut_pieces': n} for n in range(1, 5)])
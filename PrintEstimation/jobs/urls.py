@@ -9,15 +9,24 @@ app_name = 'jobs'
 
 urlpatterns = [
     path('', views.JobListView.as_view(), name='list'),
+    path('autocomplete/', views.job_autocomplete, name='autocomplete'),
     path('create/', views.JobCreateView.as_view(), name='create'),
     path('<int:pk>/', views.JobDetailView.as_view(), name='detail'),
+    path('<int:pk>/fragments/', views.JobFragmentsView.as_view(), name='fragments'),
     path('<int:pk>/edit/', views.JobUpdateView.as_view(), name='edit'),
     path('<int:pk>/delete/', views.JobDeleteView.as_view(), name='delete'),
+    path('<int:pk>/requote/', views.JobRequoteView.as_view(), name='requote'),
+    path('<int:pk>/quote/', views.job_quote, name='quote'),
+    path('<int:pk>/summary/', views.job_summary, name='summary'),
     path('<int:pk>/change-status/', views.change_job_status, name='change_status'),
     path('<int:pk>/reorder-operations/', views.ReorderOperationsView.as_view(), name='reorder_operations'),
+    path('<int:pk>/edits/', views.apply_job_edits, name='apply_edits'),
     path('<int:job_id>/add-operation/', views.add_operation_to_job, name='add_operation'),
     path('<int:job_id>/remove-operation/<int:operation_id>/', views.remove_operation_from_job, name='remove_operation'),
+    path('<int:job_id>/move-operation/<int:operation_id>/', views.move_operation, name='move_operation'),
     path('templates/', views.TemplateListView.as_view(), name='templates'),
+    path('archive/', views.ArchivedJobListView.as_view(), name='archive'),
+    path('archive/<str:job_number>/', views.ArchivedJobDetailView.as_view(), name='archived_detail'),
     
     # PDF Export URLs
     path('pdf-exports/', views.JobPDFExportListView.as_view(), name='pdf_export_list'),
@@ -3,6 +3,7 @@ Views for jobs app - job and estimation management.
 """
 
 from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy, reverse
 from django.views.generic import (
     CreateView, ListView, DetailView, UpdateView, DeleteView, TemplateView
@@ -12,27 +13,48 @@ from PrintEstimation.accounts.mixins import OwnerRequiredMixin, SecureFormMixin,
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse, Http404
-from django.views.decorators.http import require_POST
+from django.db import transaction
+from django.views.decorators.http import require_GET, require_POST
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 import json
+import uuid
+from decimal import Decimal, InvalidOperation
 
-from .models import Job, JobOperation, JobVariant, JobPDFExport
+from .archive import load_archived_job
+from .models import ArchivedJob, Job, JobOperation, JobVariant, JobPDFExport
 from .forms import (
     JobForm, JobOperationForm, JobStatusChangeForm, JobCalculationForm,
-    AddOperationForm, AddOperationAfterForm, RemoveOperationForm, ReorderOperationsForm,
+    AddOperationForm, AddOperationAfterForm, RemoveOperationForm,
     JobVariantForm, MultiQuantityForm, CalculateVariantsForm
 )
-from .services import PrintingCalculator, JobOperationManager
+from .facets import JobFilters
+from .search import search_jobs
+from .services import (
+    PrintingCalculator, JobOperationManager, JobEditConflict, CALCULATION_INPUT_FIELDS,
+    compare_quotes, price_quantities
+)
+from . import tasks as job_tasks
+from PrintEstimation.core.models import BackgroundTask
+from PrintEstimation.core.admission import (
+    AdmissionController, AdmissionRejected, admission_control, rejected_response
+)
+from PrintEstimation.core.concurrency import run_calculation
+from PrintEstimation.core.idempotency import idempotent
+from PrintEstimation.core.autocomplete import autocomplete_response, selected_object
+from PrintEstimation.core.pagination import KeysetPaginationMixin
+from PrintEstimation.core.replicas import ReplicaReadMixin
+from PrintEstimation.core.tasks import enqueue
 from PrintEstimation.accounts.models import Client
-from PrintEstimation.operations.models import Operation
+from PrintEstimation.operations.models import Operation, PriceCatalogVersion
 
 
 
-class JobListView(LoginRequiredMixin, OwnerRequiredMixin, ListView):
+class JobListView(LoginRequiredMixin, OwnerRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     """List all jobs (non-templates)."""
     model = Job
     template_name = 'jobs/job_list.html'
+    rows_template_name = 'jobs/partials/job_list_rows.html'
     context_object_name = 'jobs'
     paginate_by = 20
 
@@ -40,44 +62,160 @@ class JobListView(LoginRequiredMixin, OwnerRequiredMixin, ListView):
         # Use the parent mixin for ownership filtering, then add our filter
         queryset = super().get_queryset().filter(is_template=False)
 
-        # Filter by status
-        status = self.request.GET.get('status')
-        if status:
-            queryset = queryset.filter(status=status)
+        # Facet and range filters (status, type, client, paper, dates, quantity, cost)
+        self.filters = JobFilters(self.request.GET)
+
+        # Filter on the database-generated operations cost
+        min_operations_cost = self.request.GET.get('min_operations_cost')
+        if min_operations_cost:
+            try:
+                queryset = queryset.filter(operations_cost__gte=Decimal(min_operations_cost))
+            except InvalidOperation:
+                pass
 
         # Search
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                order_name__icontains=search
-            )
+            queryset = search_jobs(queryset, search)
 
-        return queryset.order_by('-created_at')
+        # Facet counts ignore each facet's own selection
+        self.unfaceted_queryset = queryset
+
+        # KeysetPaginationMixin applies the ordering
+        return self.filters.filter(queryset).select_related('client', 'created_by')
+
+    def get_keyset_ordering(self):
+        # Explicit sort first, then best matches when searching, otherwise newest first
+        if self.request.GET.get('sort') == 'operations_cost':
+            return ('-operations_cost', '-id')
+        if self.request.GET.get('search'):
+            return ('-search_rank', '-id')
+        return self.keyset_ordering
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['status_choices'] = Job.STATUS_CHOICES
-        context['current_status'] = self.request.GET.get('status', '')
         context['search_query'] = self.request.GET.get('search', '')
+        context['min_operations_cost'] = self.request.GET.get('min_operations_cost', '')
+        context['filters_active'] = self.filters.is_active
+        if not is_ajax(self.request):
+            # Infinite scroll only needs the rows
+            context['facets'] = self.filters.facet_counts(
+                self.unfaceted_queryset,
+                choices={'status': Job.STATUS_CHOICES, 'order_type': Job.ORDER_TYPES}
+            )
+        context['current_sort'] = self.request.GET.get('sort', '')
+        search = self.request.GET.get('search', '').strip()
+        if search and not is_ajax(self.request):
+            # Searching for the number of an archived job links to it
+            archived = ArchivedJob.objects.filter(job_number__iexact=search)
+            if not self.request.user.is_staff_user():
+                archived = archived.filter(created_by=self.request.user)
+            context['archived_match'] = archived.first()
         return context
 
 
+# Sections of the job detail page that can be re-rendered on their own
+DETAIL_FRAGMENTS = {
+    'totals': 'jobs/partials/job_totals.html',
+    'operations': 'jobs/partials/job_operations.html',
+    'variants': 'jobs/partials/job_variants.html',
+}
+
+# Detail page actions that change the operation list and must carry the
+# job version they were made against
+STRUCTURAL_ACTIONS = ('add_operation', 'add_operation_after', 'remove_operation')
+
+# Sections affected by each detail page action (keyed by submit button name)
+FRAGMENTS_BY_ACTION = {
+    'add_operation': ('operations', 'totals'),
+    'add_operation_after': ('operations', 'totals'),
+    'remove_operation': ('operations', 'totals'),
+    'add_quantities': ('variants',),
+    'delete_variant': ('variants',),
+}
+
+
+def is_ajax(request):
+    return request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+
+def report_task(request, background_task, success_message):
+    """Add a message describing the state of a just-enqueued task."""
+    if background_task.status == BackgroundTask.STATUS_SUCCEEDED:
+        messages.success(request, success_message)
+    elif background_task.status == BackgroundTask.STATUS_FAILED:
+        messages.error(request, f'Calculation error: {background_task.error_message}')
+    else:
+        messages.info(request, 'Calculation started. Results will appear when it finishes.')
+
+
+def edit_version(value):
+    """Return the job version a structural edit was made against, or None if missing or invalid."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def missing_version_response():
+    """400 response for a structural edit that does not say which version it was made against."""
+    return JsonResponse({
+        'success': False,
+        'error': 'A valid job version is required. Please reload the page and try again.',
+    }, status=400)
+
+
+def render_job_fragments(request, job, names):
+    """Render the named detail page sections for a job loaded with_details()."""
+    context = {
+        'job': job,
+        'job_operations': job.job_operations.all(),
+        'variants': job.variants.all(),
+        'idempotency_key': uuid.uuid4().hex,
+    }
+    return {
+        name: render_to_string(DETAIL_FRAGMENTS[name], context, request=request)
+        for name in names
+    }
+
+
+def pop_messages(request):
+    """Consume queued messages so a fragment response can show them inline."""
+    return [
+        {'level': message.level_tag, 'message': str(message)}
+        for message in messages.get_messages(request)
+    ]
+
+
 class JobDetailView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
     """Job detail view with calculation breakdown."""
     model = Job
     template_name = 'jobs/job_detail.html'
     context_object_name = 'job'
 
-    # Remove get_queryset - handled by OwnerRequiredMixin
+    def get_queryset(self):
+        # Ownership filtering comes from OwnerRequiredMixin
+        return super().get_queryset().with_details()
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return super().get(request, *args, **kwargs)
+        except Http404:
+            # Archived jobs stay reachable under their old URL
+            archived = ArchivedJob.objects.filter(job_id=kwargs['pk'])
+            if not request.user.is_staff_user():
+                archived = archived.filter(created_by=request.user)
+            archived = archived.first()
+            if archived is None:
+                raise
+            return redirect(archived)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Get job operations in order
-        context['job_operations'] = self.object.job_operations.all().order_by('sequence_order')
-
-        # Get quantity variants
-        context['variants'] = self.object.variants.all().order_by('quantity')
+        # Operations (in order) and quantity variants are prefetched
+        context['job_operations'] = self.object.job_operations.all()
+        context['variants'] = self.object.variants.all()
 
         # Set view mode for template
         context['view_mode'] = 'detail'
@@ -86,22 +224,62 @@ class JobDetailView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
         context['status_form'] = JobStatusChangeForm(instance=self.object)
         context['calculation_form'] = JobCalculationForm()
         context['add_operation_form'] = AddOperationForm()
-        context['reorder_form'] = ReorderOperationsForm(job=self.object)
-        
-        # Add available operations for adding
-        context['available_operations'] = Operation.objects.filter(is_active=True).order_by('category__sort_order', 'name')
-        
-        # Add variant forms and data
+
+        # Add variant forms
         context['multi_quantity_form'] = MultiQuantityForm()
         context['calculate_variants_form'] = CalculateVariantsForm(job=self.object)
-        
-        # Add existing variants
-        context['variants'] = self.object.variants.all().order_by('quantity')
+
+        # One-time key so a double-submitted calculation runs once
+        context['idempotency_key'] = uuid.uuid4().hex
+
+        # Calculation running in the background, if any
+        context['active_task'] = BackgroundTask.objects.active().for_reference(
+            job_tasks.job_reference(self.object.pk)
+        ).order_by('created_at').first()
 
         return context
 
+    @method_decorator(idempotent)
     def post(self, request, *args, **kwargs):
         """Handle form submissions from detail view (status change, calculation, operations)."""
+        if 'calculate' in request.POST or 'calculate_variants' in request.POST:
+            # Calculations run in the worker, so limit what may be queued
+            try:
+                AdmissionController('calculation').admit_task(
+                    request.user.pk, reference=job_tasks.job_reference(self.kwargs['pk']),
+                    names=job_tasks.REQUESTED_CALCULATIONS,
+                )
+            except AdmissionRejected as exc:
+                return rejected_response(request, exc)
+            return self._handle_post(request)
+
+        action = next((name for name in FRAGMENTS_BY_ACTION if name in request.POST), None)
+        if action in STRUCTURAL_ACTIONS and edit_version(request.POST.get('version')) is None:
+            error = 'This page is out of date. Please reload it and try again.'
+            if is_ajax(request):
+                return JsonResponse({'success': False, 'error': error}, status=400)
+            messages.error(request, error)
+            return redirect('jobs:detail', pk=self.kwargs['pk'])
+
+        try:
+            response = self._handle_post(request)
+        except JobEditConflict as exc:
+            if is_ajax(request):
+                return edit_conflict_response(exc)
+            messages.warning(request, str(exc))
+            return redirect('jobs:detail', pk=self.kwargs['pk'])
+        if action and is_ajax(request):
+            # Send back only the sections the action changed instead of the whole page
+            job = self.get_object()
+            return JsonResponse({
+                'success': True,
+                'version': job.version,
+                'fragments': render_job_fragments(request, job, FRAGMENTS_BY_ACTION[action]),
+                'messages': pop_messages(request),
+            })
+        return response
+
+    def _handle_post(self, request):
         job = self.get_object()
         
         # Handle status change
@@ -118,16 +296,14 @@ class JobDetailView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
         
         # Handle calculation  
         elif 'calculate' in request.POST:
-            try:
-                calculator = PrintingCalculator(job)
-                result = calculator.calculate_job()
-                
-                if result['success']:
-                    messages.success(request, 'Job calculated successfully!')
-                else:
-                    messages.error(request, f'Calculation error: {result["error"]}')
-            except Exception as e:
-                messages.error(request, f'Calculation error: {str(e)}')
+            background_task = enqueue(
+                job_tasks.calculate_job,
+                reference=job_tasks.job_reference(job.pk),
+                user=request.user,
+                dedupe=True,
+                job_id=job.pk,
+            )
+            report_task(request, background_task, 'Job calculated successfully!')
             return redirect('jobs:detail', pk=job.pk)
         
         # Handle add operation
@@ -136,8 +312,12 @@ class JobDetailView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
             if add_form.is_valid():
                 operation = add_form.cleaned_data['operation']
                 try:
-                    job_operation = JobOperationManager.add_operation(job, operation)
+                    job_operation = JobOperationManager.add_operation(
+                        job, operation, expected_version=request.POST['version']
+                    )
                     messages.success(request, f'Added operation: {operation.name}')
+                except JobEditConflict:
+                    raise
                 except Exception as e:
                     messages.error(request, f'Error adding operation: {str(e)}')
             else:
@@ -152,50 +332,21 @@ class JobDetailView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
                 after_operation_id = add_after_form.cleaned_data['after_operation_id']
                 operation_parameters = add_after_form.cleaned_data.get('operation_parameters', {})
                 try:
-                    from django.db import transaction, models
-                    
-                    with transaction.atomic():
-                        # Get the operation after which to insert
-                        after_operation = JobOperation.objects.get(id=after_operation_id, job=job)
-                        target_sequence = after_operation.sequence_order + 1
-                        
-                        # Shift all operations after this position up by 1 (starting from the highest sequence)
-                        operations_to_update = JobOperation.objects.filter(
-                            job=job, 
-                            sequence_order__gte=target_sequence
-                        ).order_by('-sequence_order')
-                        
-                        for op in operations_to_update:
-                            op.sequence_order += 1
-                            op.save()
-                        
-                        # Add the new operation at the target position
-                        job_operation = JobOperation.objects.create(
-                            job=job,
-                            operation=operation,
-                            sequence_order=target_sequence,
-                            operation_name=operation.name,
-                            makeready_price=operation.makeready_price,
-                            price_per_sheet=operation.price_per_sheet,
-                            plate_price=operation.plate_price,
-                            makeready_time_minutes=operation.makeready_time_minutes,
-                            cleaning_time_minutes=operation.cleaning_time_minutes,
-                            sheets_per_minute=operation.sheets_per_minute,
-                            operation_parameters=operation_parameters,
-                            quantity_before=0,
-                            quantity_after=0,
-                            waste_sheets=0,
-                            processing_quantity=0,
-                            total_cost=0,
-                            total_time_minutes=0,
-                            colors_used=0,
-                        )
-                    
+                    # Get the operation after which to insert
+                    after_operation = JobOperation.objects.get(id=after_operation_id, job=job)
+                    JobOperationManager.insert_operation_after(
+                        job, after_operation, operation,
+                        operation_parameters=operation_parameters,
+                        expected_version=request.POST['version']
+                    )
+
                     messages.success(request, f'Added "{operation.name}" after "{after_operation.operation_name}"')
                     # Redirect to the operation we added after (to stay in context)
                     return redirect(f"{reverse('jobs:detail', kwargs={'pk': job.pk})}#operation-{after_operation_id}")
                 except JobOperation.DoesNotExist:
                     messages.error(request, 'Target operation not found.')
+                except JobEditConflict:
+                    raise
                 except Exception as e:
                     messages.error(request, f'Error adding operation: {str(e)}')
             else:
@@ -215,7 +366,9 @@ class JobDetailView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
                     prev_operation = job.job_operations.filter(sequence_order__lt=job_operation.sequence_order).last()
                     anchor_target = next_operation or prev_operation
                     
-                    JobOperationManager.remove_operation(job_operation)
+                    JobOperationManager.remove_operation(
+                        job_operation, expected_version=request.POST['version']
+                    )
                     messages.success(request, f'Removed operation: {operation_name}')
                     
                     # Redirect to nearby operation if one exists
@@ -223,6 +376,8 @@ class JobDetailView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
                         return redirect(f"{reverse('jobs:detail', kwargs={'pk': job.pk})}#operation-{anchor_target.id}")
                 except JobOperation.DoesNotExist:
                     messages.error(request, 'Operation not found.')
+                except JobEditConflict:
+                    raise
                 except Exception as e:
                     messages.error(request, f'Error removing operation: {str(e)}')
             else:
@@ -267,26 +422,27 @@ class JobDetailView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
         
         # Handle calculate all variants
         elif 'calculate_variants' in request.POST:
-            try:
-                calculator = PrintingCalculator(job)
-                variant_quantities = list(job.variants.values_list('quantity', flat=True))
-                
-                if not variant_quantities:
-                    messages.warning(request, 'No quantity variants found. Add some quantities first.')
+            variant_quantities = list(job.variants.order_by('quantity').values_list('quantity', flat=True))
+
+            if not variant_quantities:
+                messages.warning(request, 'No quantity variants found. Add some quantities first.')
+            else:
+                background_task = enqueue(
+                    job_tasks.calculate_variants,
+                    reference=job_tasks.job_reference(job.pk),
+                    user=request.user,
+                    dedupe=True,
+                    job_id=job.pk,
+                    quantities=variant_quantities,
+                )
+                if background_task.status == BackgroundTask.STATUS_SUCCEEDED:
+                    count = background_task.result['created']
+                    messages.success(request, f'Successfully calculated {count} quantity variants!')
+                    if background_task.result['failed']:
+                        failed_qty = [str(f['quantity']) for f in background_task.result['failed']]
+                        messages.warning(request, f'Failed to calculate: {", ".join(failed_qty)}')
                 else:
-                    result = calculator.calculate_all_variants(variant_quantities)
-                    
-                    if result['success']:
-                        count = len(result['created_variants'])
-                        messages.success(request, f'Successfully calculated {count} quantity variants!')
-                        
-                        if result['failed_calculations']:
-                            failed_qty = [str(f['quantity']) for f in result['failed_calculations']]
-                            messages.warning(request, f'Failed to calculate: {", ".join(failed_qty)}')
-                    else:
-                        messages.error(request, f'Calculation error: {result["error"]}')
-            except Exception as e:
-                messages.error(request, f'Error calculating variants: {str(e)}')
+                    report_task(request, background_task, '')
             return redirect('jobs:detail', pk=job.pk)
         
         # Handle delete variant
@@ -308,6 +464,29 @@ class JobDetailView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
         return redirect('jobs:detail', pk=job.pk)
 
 
+
+class JobFragmentsView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
+    """Re-render sections of the job detail page, e.g. ?parts=totals,variants."""
+    model = Job
+
+    def get_queryset(self):
+        return super().get_queryset().with_details()
+
+    def get(self, request, *args, **kwargs):
+        names = [name for name in request.GET.get('parts', '').split(',') if name]
+        unknown = [name for name in names if name not in DETAIL_FRAGMENTS]
+        if unknown:
+            return JsonResponse(
+                {'success': False, 'error': f'Unknown fragment: {", ".join(unknown)}'}, status=400
+            )
+        job = self.get_object()
+        return JsonResponse({
+            'success': True,
+            'version': job.version,
+            'fragments': render_job_fragments(request, job, names or DETAIL_FRAGMENTS),
+        })
+
+
 class JobCreateView(LoginRequiredMixin, SecureFormMixin, CreateView):
     """Create new job."""
     model = Job
@@ -392,83 +571,61 @@ class JobCreateView(LoginRequiredMixin, SecureFormMixin, CreateView):
         if not form.instance.is_template:
             form.instance.template_name = ''
         
-        response = super().form_valid(form)
-        
-        # Handle operations for new job creation
-        selected_operations = self.request.POST.get('selected_operations')
-        if selected_operations:
-            try:
-                import json
-                operations_data = json.loads(selected_operations)
-                for op_data in operations_data:
-                    operation = Operation.objects.get(id=op_data['operation_id'])
-                    JobOperation.objects.create(
-                        job=self.object,
-                        operation=operation,
-                        sequence_order=op_data['sequence_order'],
-                        operation_name=operation.name,
-                        makeready_price=operation.makeready_price,
-                        price_per_sheet=operation.price_per_sheet,
-                        plate_price=operation.plate_price,
-                        makeready_time_minutes=operation.makeready_time_minutes,
-                        cleaning_time_minutes=operation.cleaning_time_minutes,
-                        sheets_per_minute=operation.sheets_per_minute,
-                        operation_parameters=op_data.get('parameters'),  # Save parameters
-                        quantity_before=0,
-                        quantity_after=0,
-                        waste_sheets=0,
-                        processing_quantity=0,
-                        total_cost=0,
-                        total_time_minutes=0,
-                        colors_used=0,
+        # The job and its operations are created together
+        with transaction.atomic():
+            response = super().form_valid(form)
+            
+            # Handle operations for new job creation
+            selected_operations = self.request.POST.get('selected_operations')
+            if selected_operations:
+                try:
+                    operations_data = json.loads(selected_operations)
+                    operations_data.sort(key=lambda op_data: int(op_data['sequence_order']))
+                    # One catalog fetch for all selected operations
+                    operations = Operation.objects.in_bulk([op_data['operation_id'] for op_data in operations_data])
+                    steps = []
+                    for op_data in operations_data:
+                        operation = operations.get(int(op_data['operation_id']))
+                        if operation is None:
+                            raise Operation.DoesNotExist(f'Operation {op_data["operation_id"]} does not exist')
+                        steps.append((operation, None, op_data.get('parameters')))
+                    JobOperationManager.create_job_operations(self.object, steps)
+                    messages.success(
+                        self.request, 
+                        f'Job "{form.instance.order_name}" created with {len(steps)} operations!'
                     )
-                messages.success(
-                    self.request, 
-                    f'Job "{form.instance.order_name}" created with {len(operations_data)} operations!'
-                )
-                return response
-            except (json.JSONDecodeError, Operation.DoesNotExist, KeyError) as e:
-                messages.warning(self.request, f'Job created but operations could not be added: {str(e)}')
-                return response
-        
-        # Copy operations from template if creating from template
-        template_id = self.request.GET.get('template')
-        if template_id:
-            try:
-                template = Job.objects.get(
-                    id=template_id, 
-                    is_template=True, 
-                    created_by=self.request.user
-                )
-                
-                # Copy operations from template
-                for template_operation in template.job_operations.all().order_by('sequence_order'):
-                    JobOperation.objects.create(
-                        job=self.object,
-                        operation=template_operation.operation,
-                        sequence_order=template_operation.sequence_order,
-                        operation_name=template_operation.operation_name,
-                        makeready_price=template_operation.makeready_price,
-                        price_per_sheet=template_operation.price_per_sheet,
-                        plate_price=template_operation.plate_price,
-                        makeready_time_minutes=template_operation.makeready_time_minutes,
-                        cleaning_time_minutes=template_operation.cleaning_time_minutes,
-                        sheets_per_minute=template_operation.sheets_per_minute,
-                        quantity_before=0,  # Will be calculated
-                        quantity_after=0,   # Will be calculated
-                        processing_quantity=0,  # Will be calculated
-                        total_cost=0,       # Will be calculated
-                        total_time_minutes=0,  # Will be calculated
+                    return response
+                except (json.JSONDecodeError, Operation.DoesNotExist, KeyError, TypeError, ValueError) as e:
+                    messages.warning(self.request, f'Job created but operations could not be added: {str(e)}')
+                    return response
+            
+            # Copy operations from template if creating from template
+            template_id = self.request.GET.get('template')
+            if template_id:
+                try:
+                    template = Job.objects.get(
+                        id=template_id, 
+                        is_template=True, 
+                        created_by=self.request.user
                     )
-                
-                messages.success(
-                    self.request, 
-                    f'Job "{form.instance.order_name}" created from template "{template.template_name or template.order_name}" with {template.job_operations.count()} operations!'
-                )
-            except Job.DoesNotExist:
+                    
+                    # Results are calculated later; prices come from the template's catalog version
+                    template_operations = template.job_operations.select_related(
+                        'operation', 'catalog_version'
+                    ).order_by('sequence_order')
+                    job_operations = JobOperationManager.create_job_operations(self.object, [
+                        (step.operation, step.catalog_version, step.operation_parameters)
+                        for step in template_operations
+                    ])
+                    
+                    messages.success(
+                        self.request, 
+                        f'Job "{form.instance.order_name}" created from template "{template.template_name or template.order_name}" with {len(job_operations)} operations!'
+                    )
+                except (Job.DoesNotExist, ValueError):
+                    messages.success(self.request, f'Job "{form.instance.order_name}" created successfully!')
+            else:
                 messages.success(self.request, f'Job "{form.instance.order_name}" created successfully!')
-        else:
-            messages.success(self.request, f'Job "{form.instance.order_name}" created successfully!')
         
         return response
 
@@ -500,16 +657,22 @@ class JobUpdateView(LoginRequiredMixin, OwnerRequiredMixin, UpdateView):
         # Handle calculation request
         if 'calculate' in request.POST:
             job = self.get_object()
+            reference = job_tasks.job_reference(job.pk)
             try:
-                calculator = PrintingCalculator(job)
-                result = calculator.calculate_job()
-                
-                if result['success']:
-                    messages.success(request, 'Job calculated successfully!')
-                else:
-                    messages.error(request, f'Calculation error: {result["error"]}')
-            except Exception as e:
-                messages.error(request, f'Calculation error: {str(e)}')
+                AdmissionController('calculation').admit_task(
+                    request.user.pk, reference=reference, names=job_tasks.REQUESTED_CALCULATIONS
+                )
+            except AdmissionRejected as exc:
+                return rejected_response(request, exc)
+            background_task = enqueue(
+                job_tasks.calculate_job,
+                reference=reference,
+                user=request.user,
+                dedupe=True,
+                job_id=job.pk,
+            )
+            # The detail page follows the task's progress
+            report_task(request, background_task, 'Job calculated successfully!')
             return redirect('jobs:detail', pk=job.pk)
         
         # Handle regular form submission
@@ -517,7 +680,10 @@ class JobUpdateView(LoginRequiredMixin, OwnerRequiredMixin, UpdateView):
 
     def form_valid(self, form):
         messages.success(self.request, f'Job "{form.instance.order_name}" updated successfully!')
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        if CALCULATION_INPUT_FIELDS.intersection(form.changed_data) and self.object.job_operations.exists():
+            job_tasks.schedule_recalculation(self.object, user=self.request.user)
+        return response
 
 
 class JobDeleteView(LoginRequiredMixin, OwnerRequiredMixin, DeleteView):
@@ -540,6 +706,76 @@ class JobDeleteView(LoginRequiredMixin, OwnerRequiredMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
+@method_decorator(admission_control('calculation'), name='dispatch')
+class JobRequoteView(LoginRequiredMixin, OwnerRequiredMixin, DetailView):
+    """Compare a job's quote under its original price catalog with current prices."""
+    model = Job
+    template_name = 'jobs/job_requote.html'
+    context_object_name = 'job'
+
+    def get_queryset(self):
+        return super().get_queryset().select_related(
+            'client', 'paper_type', 'selling_size'
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        job = self.object
+
+        current_version = PriceCatalogVersion.current()
+        current_quote = PrintingCalculator(job, catalog_version=current_version).quote()
+        context['current_version'] = current_version
+        context['current_quote'] = current_quote
+
+        quoted_version = None
+        if job.catalog_version_id:
+            quoted_version = PriceCatalogVersion.load(job.catalog_version_id)
+            quoted_quote = PrintingCalculator(job, catalog_version=quoted_version).quote()
+            context['quoted_quote'] = quoted_quote
+            if quoted_quote['success'] and current_quote['success']:
+                context['comparison'] = compare_quotes(quoted_quote, current_quote)
+        context['quoted_version'] = quoted_version
+        context['prices_changed'] = (
+            quoted_version is not None and quoted_version.pk != current_version.pk
+        )
+        context['idempotency_key'] = uuid.uuid4().hex
+        return context
+
+    @method_decorator(idempotent)
+    def post(self, request, *args, **kwargs):
+        """Recalculate the job against the quoted or the current catalog version."""
+        job = self.get_object()
+        use_version = request.POST.get('catalog_version')
+
+        if use_version == 'quoted' and job.catalog_version_id:
+            catalog_version = PriceCatalogVersion.load(job.catalog_version_id)
+        elif use_version == 'current':
+            catalog_version = PriceCatalogVersion.current()
+        else:
+            messages.error(request, 'Please choose a price catalog version.')
+            return redirect('jobs:requote', pk=job.pk)
+
+        try:
+            result = PrintingCalculator(job, catalog_version=catalog_version).calculate_job()
+            if result['success']:
+                label = 'quoted' if use_version == 'quoted' else 'current'
+                messages.success(request, f'Job recalculated with {label} prices.')
+            else:
+                messages.error(request, f'Calculation error: {result["error"]}')
+        except Exception as e:
+            messages.error(request, f'Calculation error: {str(e)}')
+        return redirect('jobs:detail', pk=job.pk)
+
+
+
+def edit_conflict_response(exc):
+    """409 response for an edit based on an outdated version of the job."""
+    return JsonResponse({
+        'success': False,
+        'conflict': True,
+        'error': str(exc),
+        'version': exc.current_version,
+    }, status=409)
 
 
 @require_POST
@@ -549,15 +785,19 @@ def add_operation_to_job(request, job_id):
         return JsonResponse({'success': False, 'error': 'Authentication required'})
 
     try:
+        version = edit_version(request.POST.get('version'))
+        if version is None:
+            return missing_version_response()
         job = get_object_or_404(Job, id=job_id, created_by=request.user)
         operation_id = request.POST.get('operation_id')
         operation = get_object_or_404(Operation, id=operation_id, is_active=True)
 
         # Add operation to job
-        job_operation = JobOperationManager.add_operation(job, operation)
+        job_operation = JobOperationManager.add_operation(job, operation, expected_version=version)
 
         return JsonResponse({
             'success': True,
+            'version': job.version,
             'operation': {
                 'id': job_operation.id,
                 'name': job_operation.operation_name,
@@ -566,6 +806,8 @@ def add_operation_to_job(request, job_id):
             }
         })
 
+    except JobEditConflict as e:
+        return edit_conflict_response(e)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -574,6 +816,7 @@ def add_operation_to_job(request, job_id):
 
 
 @require_POST
+@idempotent
 def change_job_status(request, pk):
     """Change job status via AJAX."""
     if not request.user.is_authenticated:
@@ -618,6 +861,10 @@ def remove_operation_from_job(request, job_id, operation_id):
     if not request.user.is_authenticated:
         return JsonResponse({'success': False, 'error': 'Authentication required'})
 
+    version = edit_version(request.POST.get('version'))
+    if version is None:
+        return missing_version_response()
+
     try:
         # Use the same queryset logic as JobUpdateView
         if request.user.is_staff_user():
@@ -628,10 +875,12 @@ def remove_operation_from_job(request, job_id, operation_id):
         job = get_object_or_404(jobs_queryset, id=job_id)
         job_operation = get_object_or_404(JobOperation, id=operation_id, job=job)
 
-        JobOperationManager.remove_operation(job_operation)
+        JobOperationManager.remove_operation(job_operation, expected_version=version)
 
-        return JsonResponse({'success': True})
+        return JsonResponse({'success': True, 'version': job.version})
 
+    except JobEditConflict as e:
+        return edit_conflict_response(e)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -639,6 +888,102 @@ def remove_operation_from_job(request, job_id, operation_id):
         })
 
 
+@require_POST
+def move_operation(request, job_id, operation_id):
+    """Move one operation of a job to a new 1-based position via AJAX."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'})
+
+    version = edit_version(request.POST.get('version'))
+    if version is None:
+        return missing_version_response()
+
+    try:
+        if request.user.is_staff_user():
+            jobs_queryset = Job.objects.all()
+        else:
+            jobs_queryset = Job.objects.filter(created_by=request.user)
+
+        job = get_object_or_404(jobs_queryset, id=job_id)
+        job_operation = get_object_or_404(JobOperation, id=operation_id, job=job)
+        position = int(request.POST.get('position', ''))
+        if position < 1:
+            raise ValueError('Position must be 1 or greater')
+
+        job_operation.job = job
+        JobOperationManager.move_operation(job_operation, position, expected_version=version)
+
+        return JsonResponse({
+            'success': True,
+            'version': job.version,
+            'position': job.job_operations.filter(sequence_order__lt=job_operation.sequence_order).count() + 1,
+        })
+
+    except JobEditConflict as e:
+        return edit_conflict_response(e)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': f'Validation error: {str(e)}'})
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
+
+
+@require_POST
+@idempotent
+@admission_control('calculation')
+def apply_job_edits(request, pk):
+    """
+    Apply a batch of structural edits to a job and recalculate it once.
+
+    Expects a JSON body {"version": n, "edits": [...], "recalculate": true}
+    (see JobOperationManager.apply_edits for the edit format) and returns
+    only the steps and totals that changed.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'})
+
+    try:
+        if request.user.is_staff_user():
+            jobs_queryset = Job.objects.all()
+        else:
+            jobs_queryset = Job.objects.filter(created_by=request.user)
+        job = get_object_or_404(jobs_queryset.select_related('paper_type', 'selling_size'), id=pk)
+
+        data = json.loads(request.body)
+        version = edit_version(data.get('version'))
+        if version is None:
+            return missing_version_response()
+        before = JobOperationManager.structure_snapshot(job)
+        refs = JobOperationManager.apply_edits(job, data.get('edits'), expected_version=version)
+
+        calculation_error = None
+        if data.get('recalculate', True) and job.job_operations.exists():
+            result = PrintingCalculator(job).calculate_job()
+            if not result['success']:
+                calculation_error = result['error']
+
+        job.refresh_from_db()
+        after = JobOperationManager.structure_snapshot(job)
+        return JsonResponse({
+            'success': True,
+            'version': job.version,
+            'refs': refs,
+            'diff': JobOperationManager.structure_diff(before, after, refs),
+            'calculation_error': calculation_error,
+        })
+
+    except JobEditConflict as e:
+        return edit_conflict_response(e)
+    except json.JSONDecodeError as e:
+        return JsonResponse({'success': False, 'error': f'Invalid JSON data: {str(e)}'})
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': f'Validation error: {str(e)}'})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
 class ReorderOperationsView(LoginRequiredMixin, DetailView):
     """Reorder operations in a job via AJAX."""
     model = Job
@@ -652,6 +997,9 @@ class ReorderOperationsView(LoginRequiredMixin, DetailView):
         try:
             
             data = json.loads(request.body)
+            version = edit_version(data.get('version'))
+            if version is None:
+                return missing_version_response()
             operation_ids = data.get('operation_ids', [])
             
             
@@ -676,9 +1024,12 @@ class ReorderOperationsView(LoginRequiredMixin, DetailView):
                     'error': 'Invalid operation IDs provided'
                 })
 
-            JobOperationManager.reorder_operations(job, operation_ids)
-            
-            return JsonResponse({'success': True})
+            JobOperationManager.reorder_operations(job, operation_ids, expected_version=version)
+
+            return JsonResponse({'success': True, 'version': job.version})
+
+        except JobEditConflict as e:
+            return edit_conflict_response(e)
 
         except json.JSONDecodeError as e:
             return JsonResponse({
@@ -697,12 +1048,132 @@ class ReorderOperationsView(LoginRequiredMixin, DetailView):
             })
 
 
-class TemplateListView(LoginRequiredMixin, ListView):
+# Async read and quote endpoints (served natively under ASGI)
+
+MAX_QUOTE_QUANTITIES = 20
+
+
+async def _aget_job_for_user(request, pk):
+    """Return (user, job) for an async view, job is None if not visible."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return user, None
+
+    jobs = Job.objects.select_related('client', 'paper_type', 'selling_size')
+    if not user.is_staff_user():
+        jobs = jobs.filter(created_by=user)
+    return user, await jobs.filter(pk=pk).afirst()
+
+
+@require_GET
+@admission_control('calculation')
+async def job_quote(request, pk):
+    """
+    Quote a job for one or more quantities without saving anything.
+
+    Query parameters: `quantities` (comma separated, defaults to the job
+    quantity) and `prices` ("current" or "quoted").
+    """
+    user, job = await _aget_job_for_user(request, pk)
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    if job is None:
+        return JsonResponse({'success': False, 'error': 'Job not found'}, status=404)
+
+    try:
+        quantities = [
+            int(value) for value in request.GET.get('quantities', '').split(',') if value.strip()
+        ] or [job.quantity]
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid quantities'}, status=400)
+    if len(quantities) > MAX_QUOTE_QUANTITIES or min(quantities) < 1:
+        return JsonResponse({
+            'success': False,
+            'error': f'Provide between 1 and {MAX_QUOTE_QUANTITIES} positive quantities'
+        }, status=400)
+
+    if request.GET.get('prices') == 'quoted' and job.catalog_version_id:
+        catalog_version = await PriceCatalogVersion.aload(job.catalog_version_id)
+    else:
+        catalog_version = await PriceCatalogVersion.acurrent()
+
+    job_operations = [
+        job_operation async for job_operation in
+        job.job_operations.select_related('operation').order_by('sequence_order')
+    ]
+    quotes = await run_calculation(
+        price_quantities, job, job_operations, catalog_version, quantities
+    )
+
+    return JsonResponse({
+        'success': True,
+        'job_id': job.pk,
+        'catalog_version': catalog_version.pk,
+        'quotes': quotes,
+    })
+
+
+@require_GET
+async def job_summary(request, pk):
+    """Return a job's stored totals, operations and variants as JSON."""
+    user, job = await _aget_job_for_user(request, pk)
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    if job is None:
+        return JsonResponse({'success': False, 'error': 'Job not found'}, status=404)
+
+    operations = []
+    async for job_operation in job.job_operations.select_related('operation').order_by('sequence_order'):
+        if job_operation.catalog_version_id:
+            # Shared per-process copy instead of one JSON blob per row
+            job_operation.catalog_version = await PriceCatalogVersion.aload(
+                job_operation.catalog_version_id
+            )
+        operations.append({
+            'id': job_operation.pk,
+            'name': job_operation.operation_name,
+            'sequence_order': job_operation.sequence_order,
+            'total_cost': str(job_operation.total_cost),
+            'total_time_minutes': job_operation.total_time_minutes,
+        })
+    variants = [
+        {
+            'quantity': variant.quantity,
+            'total_cost': str(variant.total_cost),
+            'cost_per_piece': str(round(variant.cost_per_piece, 4)),
+            'total_time_minutes': variant.total_time_minutes,
+        }
+        async for variant in job.variants.order_by('quantity')
+    ]
+
+    return JsonResponse({
+        'success': True,
+        'job': {
+            'id': job.pk,
+            'job_number': job.job_number,
+            'order_name': job.order_name,
+            'client': job.client.company_name,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'quantity': job.quantity,
+            'total_cost': str(job.total_cost) if job.total_cost is not None else None,
+            'total_time_minutes': job.total_time_minutes,
+            'catalog_version': job.catalog_version_id,
+        },
+        'operations': operations,
+        'variants': variants,
+    })
+
+
+class TemplateListView(LoginRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     """List all templates."""
     model = Job
     template_name = 'jobs/template_list.html'
+    rows_template_name = 'jobs/partials/template_list_rows.html'
     context_object_name = 'templates'
     paginate_by = 20
+    # Grouped by type; id keeps templates with the same name apart
+    keyset_ordering = ('order_type', 'template_name', 'id')
 
     def get_queryset(self):
         # Staff can see all templates, regular users only see their own
@@ -719,7 +1190,7 @@ class TemplateListView(LoginRequiredMixin, ListView):
         if order_type:
             queryset = queryset.filter(order_type=order_type)
 
-        return queryset.order_by('order_type', 'template_name')
+        return queryset.select_related('client', 'created_by', 'paper_type', 'end_size')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -728,12 +1199,85 @@ class TemplateListView(LoginRequiredMixin, ListView):
         return context
 
 
+def autocomplete_jobs(user):
+    """Jobs user may pick in a job filter."""
+    queryset = Job.objects.filter(is_template=False)
+    if not user.is_superuser:
+        queryset = queryset.filter(created_by=user)
+    return queryset
+
+
+@require_GET
+def job_autocomplete(request):
+    """Jobs matching ?q= for job pickers, best matches first."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    query = request.GET.get('q', '').strip()
+    queryset = autocomplete_jobs(request.user)
+    if query:
+        queryset = search_jobs(queryset, query)
+        ordering = ('-search_rank', '-id')
+    else:
+        ordering = ('-created_at', '-id')
+    return autocomplete_response(
+        request, queryset, ordering=ordering,
+        label=lambda job: f'{job.order_name} ({job.job_number or "Draft"})'
+    )
+
+
+class ArchivedJobListView(LoginRequiredMixin, OwnerRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
+    """Look up archived jobs by job number and client."""
+    model = ArchivedJob
+    template_name = 'jobs/archived_job_list.html'
+    rows_template_name = 'jobs/partials/archived_job_list_rows.html'
+    context_object_name = 'archived_jobs'
+    paginate_by = 20
+
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('client')
+        job_number = self.request.GET.get('job_number', '').strip()
+        if job_number:
+            queryset = queryset.filter(job_number__istartswith=job_number)
+        self.selected_client = selected_object(Client.objects.all(), self.request.GET.get('client'))
+        if self.selected_client:
+            queryset = queryset.filter(client=self.selected_client)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['job_number_query'] = self.request.GET.get('job_number', '')
+        context['selected_client'] = self.selected_client
+        return context
+
+
+class ArchivedJobDetailView(LoginRequiredMixin, OwnerRequiredMixin, ReplicaReadMixin, DetailView):
+    """Read-only view of an archived job, loaded from the archive file."""
+    model = ArchivedJob
+    template_name = 'jobs/archived_job_detail.html'
+    context_object_name = 'entry'
+    slug_field = 'job_number'
+    slug_url_kwarg = 'job_number'
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('client')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            context.update(load_archived_job(self.object))
+        except (OSError, ValueError):
+            # Missing or unreadable archive file; the index entry is still shown
+            context['archive_unavailable'] = True
+        return context
+
+
 # PDF Export Views
 
-class JobPDFExportListView(LoginRequiredMixin, ListView):
+class JobPDFExportListView(LoginRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     """List view for PDF exports with filtering and export generation."""
     model = Job
     template_name = 'jobs/pdf_export_list.html'
+    rows_template_name = 'jobs/partials/pdf_export_list_rows.html'
     context_object_name = 'jobs'
     paginate_by = 20
 
@@ -756,12 +1300,13 @@ class JobPDFExportListView(LoginRequiredMixin, ListView):
         if calculated_only:
             queryset = queryset.exclude(status='draft')
         
-        return queryset.order_by('-created_at')
+        return queryset.select_related('client', 'created_by')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['status_choices'] = Job.STATUS_CHOICES
-        context['clients'] = Client.objects.filter(is_active=True)
+        # The client filter loads its options from accounts:client_autocomplete
+        context['selected_client'] = selected_object(Client.objects.all(), self.request.GET.get('client'))
         context['export_types'] = JobPDFExport.EXPORT_TYPES
         context['current_status'] = self.request.GET.get('status', '')
         context['current_client'] = self.request.GET.get('client', '')
@@ -769,6 +1314,7 @@ class JobPDFExportListView(LoginRequiredMixin, ListView):
         return context
 
 
+@method_decorator(admission_control('export'), name='get')
 class JobPDFGenerateView(LoginRequiredMixin, DetailView):
     """Generate and download PDF for a specific job."""
     model = Job
@@ -785,6 +1331,12 @@ class JobPDFGenerateView(LoginRequiredMixin, DetailView):
         try:
             from .pdf_service import PDFExportService
             
+            if job.needs_recalculation:
+                messages.warning(
+                    request,
+                    'This job is being recalculated after recent changes; the export shows the last calculated figures.'
+                )
+
             # Create the export
             export, html_content = PDFExportService.create_export(job, export_type, request.user)
             
@@ -801,7 +1353,7 @@ class JobPDFGenerateView(LoginRequiredMixin, DetailView):
             return redirect('jobs:pdf_export_list')
 
 
-class JobPDFHistoryView(LoginRequiredMixin, ListView):
+class JobPDFHistoryView(LoginRequiredMixin, ReplicaReadMixin, ListView):
     """View export history for all jobs or a specific job."""
     model = JobPDFExport
     template_name = 'jobs/pdf_export_history.html'
@@ -833,11 +1385,10 @@ class JobPDFHistoryView(LoginRequiredMixin, ListView):
         context['current_job'] = self.request.GET.get('job', '')
         context['current_type'] = self.request.GET.get('type', '')
         
-        # Add jobs for filtering
-        if self.request.user.is_superuser:
-            context['jobs'] = Job.objects.filter(is_template=False).order_by('-created_at')[:100]
-        else:
-            context['jobs'] = Job.objects.filter(is_template=False, created_by=self.request.user).order_by('-created_at')[:100]
+        # The job filter loads its options from jobs:autocomplete
+        context['selected_job'] = selected_object(
+            autocomplete_jobs(self.request.user), self.request.GET.get('job')
+        )
         
         return context
 
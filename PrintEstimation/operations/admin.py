@@ -3,7 +3,7 @@ Admin configuration for operations app with simplified formula approach.
 """
 
 from django.contrib import admin
-from .models import OperationCategory, Operation, PaperType, PaperSize
+from .models import OperationCategory, Operation, PaperType, PaperSize, PriceCatalogVersion
 
 
 @admin.register(OperationCategory)
@@ -94,4 +94,29 @@ class PaperSizeAdmin(admin.ModelAdmin):
     def area_cm2(self, obj):
         """Display area in cm²."""
         return f"{obj.area_cm2:.1f} cm²"
-    area_cm2.short_description = "Area"
\ No newline at end of file
+    area_cm2.short_description = "Area"
+
+
+@admin.register(PriceCatalogVersion)
+class PriceCatalogVersionAdmin(admin.ModelAdmin):
+    """Read-only admin for immutable price catalog versions."""
+    list_display = ['content_hash', 'created_at', 'operations_count', 'paper_types_count']
+    search_fields = ['content_hash']
+    ordering = ['-created_at']
+    readonly_fields = ['content_hash', 'data', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def operations_count(self, obj):
+        """Display number of operations captured in this version."""
+        return len(obj.data.get('operations', {}))
+    operations_count.short_description = "Operations"
+
+    def paper_types_count(self, obj):
+        """Display number of paper types captured in this version."""
+        return len(obj.data.get('paper_types', {}))
+    paper_types_count.short_description = "Paper Types"
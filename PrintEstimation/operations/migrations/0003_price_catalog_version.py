@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0002_add_paper_size_parent_relationship'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceCatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(editable=False, max_length=64, unique=True)),
+                ('data', models.JSONField(editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Price Catalog Version',
+                'verbose_name_plural': 'Price Catalog Versions',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
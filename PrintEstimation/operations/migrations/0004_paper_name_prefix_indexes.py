@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from PrintEstimation.core.autocomplete import CreatePrefixIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0003_price_catalog_version'),
+    ]
+
+    operations = [
+        CreatePrefixIndex('papertype', 'name', 'operations_papertype_name_prefix_idx'),
+        CreatePrefixIndex('papersize', 'name', 'operations_papersize_name_prefix_idx'),
+    ]
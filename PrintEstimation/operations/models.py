@@ -3,7 +3,14 @@ Models for printing operations with simplified formula-based approach.
 Each operation contains its own constants and formulas.
 """
 
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 from datetime import timedelta
+from decimal import Decimal
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
@@ -366,4 +373,214 @@ class PaperSize(models.Model):
         """Get the parts of parent size for job calculations."""
         if self.parent_size:
             return self.parts_of_parent
-        return 1  # If no parent, this is 1 part of itself
\ No newline at end of file
+        return 1  # If no parent, this is 1 part of itself
+
+
+# Operation and paper fields captured in a price catalog snapshot
+OPERATION_SNAPSHOT_FIELDS = (
+    'name', 'category_id', 'makeready_price', 'price_per_sheet', 'plate_price',
+    'base_waste_sheets', 'waste_percentage', 'makeready_time_minutes',
+    'cleaning_time_minutes', 'sheets_per_minute', 'divides_quantity_by',
+    'multiplies_quantity_by', 'uses_colors', 'uses_front_colors_only',
+)
+PAPER_TYPE_SNAPSHOT_FIELDS = ('name', 'weight_gsm', 'price_per_kg')
+
+
+def _snapshot_value(value):
+    """Convert a field value to a JSON-stable representation."""
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def build_catalog_payload(operations, paper_types):
+    """
+    Build a catalog payload from iterables of operation and paper type dicts.
+
+    Each dict must contain 'id' plus the snapshot fields. Keys are stringified
+    ids so the payload survives a JSON round trip unchanged.
+    """
+    return {
+        'operations': {
+            str(op['id']): {field: _snapshot_value(op[field]) for field in OPERATION_SNAPSHOT_FIELDS}
+            for op in operations
+        },
+        'paper_types': {
+            str(paper['id']): {field: _snapshot_value(paper[field]) for field in PAPER_TYPE_SNAPSHOT_FIELDS}
+            for paper in paper_types
+        },
+    }
+
+
+def catalog_content_hash(payload):
+    """Return the SHA-256 hex digest of a canonical JSON encoding of the payload."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+# Per-process cache of loaded catalog versions, keyed by primary key.
+# Versions are immutable, so cached entries never go stale.
+_loaded_catalog_versions = OrderedDict()
+_loaded_catalog_versions_lock = threading.Lock()
+LOADED_CATALOG_VERSIONS_LIMIT = 32
+
+
+class PriceCatalogVersion(models.Model):
+    """
+    Immutable snapshot of operation and paper prices.
+
+    Versions are content-addressed: identical catalogs hash to the same row,
+    so every job quoted against the same prices shares one version.
+    """
+    content_hash = models.CharField(max_length=64, unique=True, editable=False)
+    data = models.JSONField(editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Price Catalog Version'
+        verbose_name_plural = 'Price Catalog Versions'
+
+    def __str__(self):
+        return f"Catalog {self.content_hash[:12]} ({self.created_at:%Y-%m-%d})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Price catalog versions are immutable.")
+        if not self.content_hash:
+            self.content_hash = catalog_content_hash(self.data)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def build_payload(cls):
+        """Build a catalog payload from the live Operation and PaperType rows."""
+        return build_catalog_payload(
+            Operation.objects.values('id', *OPERATION_SNAPSHOT_FIELDS),
+            PaperType.objects.values('id', *PAPER_TYPE_SNAPSHOT_FIELDS),
+        )
+
+    @classmethod
+    def snapshot(cls, payload=None):
+        """Return the version matching the live catalog (or payload), creating it if needed."""
+        payload = payload if payload is not None else cls.build_payload()
+        version, created = cls.objects.get_or_create(
+            content_hash=catalog_content_hash(payload),
+            defaults={'data': payload}
+        )
+        return version
+
+    @classmethod
+    def current(cls):
+        """
+        Return the version for the live catalog.
+
+        The live snapshot fields are read and hashed on every call, so price
+        changes are picked up however they were made, bulk updates included.
+        Only the lookup of the version row by hash is cached.
+        """
+        payload = cls.build_payload()
+        cache_key = cls._current_cache_key(payload)
+
+        version_id = cache.get(cache_key)
+        if version_id is not None:
+            version = cls.objects.filter(pk=version_id).first()
+            if version is not None:
+                return version
+
+        version = cls.snapshot(payload)
+        cache.set(cache_key, version.pk, timeout=None)
+        return version
+
+    @classmethod
+    async def acurrent(cls):
+        """Async variant of current()."""
+        payload = build_catalog_payload(
+            [op async for op in Operation.objects.values('id', *OPERATION_SNAPSHOT_FIELDS)],
+            [paper async for paper in PaperType.objects.values('id', *PAPER_TYPE_SNAPSHOT_FIELDS)],
+        )
+        cache_key = cls._current_cache_key(payload)
+
+        version_id = await cache.aget(cache_key)
+        if version_id is not None:
+            version = await cls.objects.filter(pk=version_id).afirst()
+            if version is not None:
+                return version
+
+        version = await sync_to_async(cls.snapshot)(payload)
+        await cache.aset(cache_key, version.pk, timeout=None)
+        return version
+
+    @staticmethod
+    def _current_cache_key(payload):
+        return f'price_catalog:current:{catalog_content_hash(payload)}'
+
+    @classmethod
+    def load(cls, pk):
+        """
+        Return a version by primary key, cached per process.
+
+        Repeated re-quotes against the same version reuse the parsed payload
+        and the operations already built from it.
+        """
+        version = cls._get_loaded(pk)
+        if version is None:
+            version = cls._remember_loaded(cls.objects.get(pk=pk))
+        return version
+
+    @classmethod
+    async def aload(cls, pk):
+        """Async variant of load()."""
+        version = cls._get_loaded(pk)
+        if version is None:
+            version = cls._remember_loaded(await cls.objects.aget(pk=pk))
+        return version
+
+    @staticmethod
+    def _get_loaded(pk):
+        with _loaded_catalog_versions_lock:
+            version = _loaded_catalog_versions.get(pk)
+            if version is not None:
+                _loaded_catalog_versions.move_to_end(pk)
+            return version
+
+    @staticmethod
+    def _remember_loaded(version):
+        with _loaded_catalog_versions_lock:
+            _loaded_catalog_versions[version.pk] = version
+            if len(_loaded_catalog_versions) > LOADED_CATALOG_VERSIONS_LIMIT:
+                _loaded_catalog_versions.popitem(last=False)
+        return version
+
+    @classmethod
+    def clear_cache(cls):
+        """Forget all versions loaded into this process."""
+        with _loaded_catalog_versions_lock:
+            _loaded_catalog_versions.clear()
+
+    def get_operation_data(self, operation_id):
+        """Return the snapshot dict for an operation, or None if not captured."""
+        return self.data['operations'].get(str(operation_id))
+
+    def get_paper_type_data(self, paper_type_id):
+        """Return the snapshot dict for a paper type, or None if not captured."""
+        return self.data['paper_types'].get(str(paper_type_id))
+
+    def build_operation(self, operation_id):
+        """
+        Return an unsaved Operation carrying this version's prices.
+
+        The instance exposes calculate_cost/calculate_time, so the calculator
+        can price against a historical version exactly like a live operation.
+        """
+        built = self.__dict__.setdefault('_built_operations', {})
+        operation_id = int(operation_id)
+        if operation_id not in built:
+            data = self.get_operation_data(operation_id)
+            if data is None:
+                built[operation_id] = None
+            else:
+                values = dict(data)
+                for field in ('makeready_price', 'price_per_sheet', 'plate_price', 'waste_percentage'):
+                    values[field] = Decimal(values[field])
+                built[operation_id] = Operation(id=operation_id, **values)
+        return built[operation_id]
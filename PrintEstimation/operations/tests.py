@@ -1,3 +1,78 @@
+"""
+Tests for operations models and functionality.
+"""
+
 from django.test import TestCase
+from decimal import Decimal
+
+from .models import Operation, OperationCategory, PaperType, PriceCatalogVersion
+
+
+class PriceCatalogVersionTest(TestCase):
+    """Tests for the PriceCatalogVersion model."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.category = OperationCategory.objects.create(name='Printing')
+        self.operation = Operation.objects.create(
+            name='Color Printing',
+            category=self.category,
+            makeready_price=Decimal('15.00'),
+            price_per_sheet=Decimal('0.05'),
+            sheets_per_minute=100
+        )
+        self.paper_type = PaperType.objects.create(
+            name='Paper', weight_gsm=80, price_per_kg=Decimal('2.50')
+        )
+
+    def test_identical_catalogs_share_one_version(self):
+        """Test that snapshots of an unchanged catalog are deduplicated."""
+        first = PriceCatalogVersion.snapshot()
+        second = PriceCatalogVersion.snapshot()
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(PriceCatalogVersion.objects.count(), 1)
+
+    def test_price_change_creates_new_version(self):
+        """Test that changing a price produces a new version."""
+        first = PriceCatalogVersion.current()
+
+        self.operation.makeready_price = Decimal('20.00')
+        self.operation.save()
+        second = PriceCatalogVersion.current()
+
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(first.get_operation_data(self.operation.pk)['makeready_price'], '15.00')
+        self.assertEqual(second.get_operation_data(self.operation.pk)['makeready_price'], '20.00')
+
+    def test_bulk_price_update_creates_new_version(self):
+        """Test that prices changed without touching updated_at still produce a new version."""
+        first = PriceCatalogVersion.current()
+        updated_at = Operation.objects.get(pk=self.operation.pk).updated_at
+
+        Operation.objects.filter(pk=self.operation.pk).update(
+            price_per_sheet=Decimal('0.07'), updated_at=updated_at
+        )
+        second = PriceCatalogVersion.current()
+
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(second.get_operation_data(self.operation.pk)['price_per_sheet'], '0.0700')
+
+    def test_versions_are_immutable(self):
+        """Test that a saved version cannot be modified."""
+        version = PriceCatalogVersion.snapshot()
+
+        with self.assertRaises(ValueError):
+            version.save()
+
+    def test_build_operation_uses_snapshot_prices(self):
+        """Test that a built operation carries the version's prices."""
+        version = PriceCatalogVersion.snapshot()
+        Operation.objects.filter(pk=self.operation.pk).update(makeready_price=Decimal('99.00'))
+
+        operation = version.build_operation(self.operation.pk)
 
-# Create your tests here.
+        self.assertEqual(operation.pk, self.operation.pk)
+        self.assertEqual(operation.makeready_price, Decimal('15.00'))
+        self.assertEqual(operation.name, 'Color Printing')
+        self.assertIsNone(version.build_operation(999999))
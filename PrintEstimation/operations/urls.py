@@ -29,6 +29,8 @@ urlpatterns = [
     
     # API endpoints
     path('paper-sizes/<int:pk>/parent-info/', views.paper_size_parent_info, name='paper_size_parent_info'),
+    path('paper-types/autocomplete/', views.paper_type_autocomplete, name='paper_type_autocomplete'),
+    path('paper-sizes/autocomplete/', views.paper_size_autocomplete, name='paper_size_autocomplete'),
     
     # path('machines/', views.MachineListView.as_view(), name='machines'),
 ]
\ No newline at end of file
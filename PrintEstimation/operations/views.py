@@ -12,6 +12,7 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.db.models import ProtectedError
+from PrintEstimation.core.autocomplete import autocomplete_response
 from .models import (
     Operation, OperationCategory, PaperType,
     PaperSize,
@@ -342,4 +343,14 @@ def paper_size_parent_info(request, pk):
         'parent_size_name': parent_size.name,
         'parts_of_parent': parts_of_parent,
         'has_parent': paper_size.parent_size is not None
-    })
\ No newline at end of file
+    })
+
+
+def paper_type_autocomplete(request):
+    """Active paper types whose name starts with ?q=."""
+    return autocomplete_response(request, PaperType.objects.filter(is_active=True), 'name')
+
+
+def paper_size_autocomplete(request):
+    """Paper sizes whose name starts with ?q=."""
+    return autocomplete_response(request, PaperSize.objects.all(), 'name')
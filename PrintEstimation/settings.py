@@ -58,6 +58,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'PrintEstimation.core.replicas.PrimaryStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -114,6 +115,21 @@ else:
         }
     }
 
+# Optional read replica for list, dashboard and report pages
+# (PrintEstimation.core.replicas). Any second database works for local
+# testing, e.g. sqlite:///replica.sqlite3 holding a copy of the primary.
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+DATABASE_REPLICA_ALIAS = None
+if DATABASE_REPLICA_URL:
+    DATABASE_REPLICA_ALIAS = 'replica'
+    DATABASES[DATABASE_REPLICA_ALIAS] = dj_database_url.parse(DATABASE_REPLICA_URL)
+    # Tests read the primary's test database through the replica alias
+    DATABASES[DATABASE_REPLICA_ALIAS]['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['PrintEstimation.core.replicas.ReplicaRouter']
+# Seconds a browser keeps reading from the primary after it writes; keep
+# above the replication lag
+DATABASE_REPLICA_STICKY_SECONDS = config('DATABASE_REPLICA_STICKY_SECONDS', default=10, cast=int)
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -162,6 +178,28 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Append-only files of archived jobs (manage.py archive_jobs). Must point at
+# persistent storage in production; only DEBUG falls back to BASE_DIR/archive
+JOB_ARCHIVE_ROOT = config('JOB_ARCHIVE_ROOT', default='')
+
+# Cache (shared Redis cache when REDIS_URL is set, per-process memory otherwise).
+# Admission control and calculation locks only coordinate across worker
+# processes with a shared cache.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -171,6 +209,42 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
+# Background tasks (processed by `python manage.py run_workers`)
+# Set BACKGROUND_TASKS_EAGER to run tasks inline in the request instead.
+BACKGROUND_TASKS_EAGER = config('BACKGROUND_TASKS_EAGER', default=False, cast=bool)
+BACKGROUND_TASKS_RETRY_DELAY = config('BACKGROUND_TASKS_RETRY_DELAY', default=10, cast=int)
+BACKGROUND_TASKS_STALE_AFTER = config('BACKGROUND_TASKS_STALE_AFTER', default=600, cast=int)
+# Seconds to wait after the last edit before recalculating a job
+JOB_RECALCULATION_DELAY = config('JOB_RECALCULATION_DELAY', default=5, cast=int)
+# Server-Sent Events progress streams for background tasks
+TASK_EVENTS_POLL_INTERVAL = config('TASK_EVENTS_POLL_INTERVAL', default=0.5, cast=float)
+TASK_EVENTS_STREAM_TIMEOUT = config('TASK_EVENTS_STREAM_TIMEOUT', default=300, cast=int)
+
+# Thread pool used by async views for CPU-bound calculation work
+CALCULATION_EXECUTOR_WORKERS = config('CALCULATION_EXECUTOR_WORKERS', default=4, cast=int)
+
+# Admission control for calculation and export endpoints
+ADMISSION_GLOBAL_LIMIT = config('ADMISSION_GLOBAL_LIMIT', default=8, cast=int)
+ADMISSION_USER_LIMIT = config('ADMISSION_USER_LIMIT', default=2, cast=int)
+ADMISSION_QUEUE_LIMIT = config('ADMISSION_QUEUE_LIMIT', default=16, cast=int)
+ADMISSION_MAX_WAIT = config('ADMISSION_MAX_WAIT', default=5, cast=float)
+ADMISSION_RETRY_AFTER = config('ADMISSION_RETRY_AFTER', default=5, cast=int)
+ADMISSION_SLOT_TIMEOUT = config('ADMISSION_SLOT_TIMEOUT', default=300, cast=int)
+ADMISSION_SCOPES = {
+    'export': {'global_limit': 4, 'user_limit': 1},
+}
+
+# Single-flight calculations and idempotent POSTs
+CALCULATION_LOCK_TIMEOUT = config('CALCULATION_LOCK_TIMEOUT', default=60, cast=int)
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+
+# Dashboard live updates (long-poll on job status changes)
+DASHBOARD_FEED_POLL_INTERVAL = config('DASHBOARD_FEED_POLL_INTERVAL', default=1.0, cast=float)
+DASHBOARD_FEED_TIMEOUT = config('DASHBOARD_FEED_TIMEOUT', default=20, cast=int)
+# Cached dashboards are dropped on status changes; the timeout bounds how
+# long other edits (names, totals) take to show
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)
+
 # Login/Logout URLs
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'core:home'
@@ -32,6 +32,12 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 5000);
     });
 
+    // Load the next page of cursor-paginated lists as the user scrolls
+    document.querySelectorAll('[data-infinite-scroll]').forEach(initInfiniteScroll);
+
+    // Load the options of large dropdowns from their autocomplete endpoint
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(initAutocompleteSelect);
+
     // Smooth scroll to anchor if present in URL
     if (window.location.hash) {
         setTimeout(function() {
@@ -43,6 +49,124 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+function initInfiniteScroll(nav) {
+    const target = document.querySelector(nav.dataset.infiniteScroll);
+    let link = nav.querySelector('[data-next-page]');
+    if (!target || !link || !('IntersectionObserver' in window)) {
+        return;
+    }
+
+    let loading = false;
+    const observer = new IntersectionObserver(function(entries) {
+        if (loading || !entries.some(entry => entry.isIntersecting)) {
+            return;
+        }
+        loading = true;
+        fetch(link.href, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(response => response.json())
+            .then(function(data) {
+                target.insertAdjacentHTML('beforeend', data.html);
+                if (data.next_url) {
+                    link.href = data.next_url;
+                    // Re-check in case the new rows did not push the link off screen
+                    observer.unobserve(nav);
+                    observer.observe(nav);
+                } else {
+                    observer.disconnect();
+                    link.closest('.page-item').remove();
+                }
+            })
+            .catch(function() {
+                // Fall back to the plain Next link
+                observer.disconnect();
+            })
+            .finally(function() {
+                loading = false;
+            });
+    }, { rootMargin: '200px' });
+    observer.observe(nav);
+}
+
+function initAutocompleteSelect(select) {
+    const MORE = '__more__';
+    const search = document.createElement('input');
+    search.type = 'search';
+    search.className = 'form-control form-control-sm mb-1';
+    search.placeholder = 'Type to search...';
+    search.setAttribute('aria-label', 'Search options');
+    select.parentNode.insertBefore(search, select);
+
+    let loaded = false;
+    let nextCursor = null;
+    let previousValue = select.value;
+    let request = 0;
+    let timer = null;
+
+    function load(append) {
+        const params = new URLSearchParams({ q: search.value.trim() });
+        if (append && nextCursor) {
+            params.set('cursor', nextCursor);
+        }
+        const current = ++request;
+        fetch(select.dataset.autocompleteUrl + '?' + params, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' }
+        })
+            .then(response => response.json())
+            .then(function(data) {
+                // Ignore answers to queries the user has already typed past
+                if (current !== request || !data.success) {
+                    return;
+                }
+                const more = select.querySelector(`option[value="${MORE}"]`);
+                if (more) {
+                    more.remove();
+                }
+                if (!append) {
+                    // Keep the blank choice and the current selection
+                    [...select.options].forEach(function(option) {
+                        if (option.value !== '' && !option.selected) {
+                            option.remove();
+                        }
+                    });
+                }
+                const present = new Set([...select.options].map(option => option.value));
+                data.results.forEach(function(result) {
+                    if (!present.has(String(result.id))) {
+                        select.add(new Option(result.text, result.id));
+                    }
+                });
+                nextCursor = data.next_cursor;
+                if (nextCursor) {
+                    select.add(new Option('Load more...', MORE));
+                }
+                loaded = true;
+            });
+    }
+
+    function loadOnce() {
+        if (!loaded) {
+            load(false);
+        }
+    }
+
+    select.addEventListener('focus', loadOnce);
+    select.addEventListener('mousedown', loadOnce);
+    search.addEventListener('focus', loadOnce);
+    search.addEventListener('input', function() {
+        clearTimeout(timer);
+        timer = setTimeout(() => load(false), 250);
+    });
+    select.addEventListener('change', function(event) {
+        if (select.value === MORE) {
+            event.stopImmediatePropagation();
+            select.value = previousValue;
+            load(true);
+            return;
+        }
+        previousValue = select.value;
+    });
+}
+
 // Utility functions
 const PrintEstimation = {
     // Format currency